@@ -0,0 +1,41 @@
+"""
+    RECONSTRUCCIÓN DE LOS AGREGADOS POR HORA Y POR DÍA
+
+    python -m back.agregados
+    python -m back.agregados --desde 2024-10-01
+
+    La ingesta y la importación mantienen `agregados_hora` y `agregados_dia`
+    lote a lote. Este comando los borra y los vuelve a calcular desde
+    `paquetes` (todos, o los de los días a partir de --desde, en hora
+    local), p.ej. después de cargar o borrar lecturas a mano.
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from .database import SessionLocal
+from .paquete.services import reconstruir_agregados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruye los agregados por hora y día.")
+    parser.add_argument("--desde", type=datetime.fromisoformat, default=None,
+                        help="Recalcular solo desde este día (hora local, AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    db = SessionLocal()
+    try:
+        procesadas = reconstruir_agregados(db, args.desde)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"Agregados reconstruidos a partir de {procesadas} lecturas en {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
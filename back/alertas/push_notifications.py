@@ -10,6 +10,7 @@ import os
 from pywebpush import webpush, WebPushException
 from back.paquete.schemas import PaqueteCreate
 from back.depends.config import get_config_alertas
+from back.depends.metricas import duracion_push
 from back.database import get_db
 from back.nodos.models import Nodo
 
@@ -28,17 +29,14 @@ class NotificationHandler:
     
 
     def __init__(self):
-        self.last_sent = {
-        1: None,  # amarillo
-        2: None,  # naranja
-        3: None,  # rojo
-        4: None,  # dato invalido
-        5: None,  # bateria baja
-    }
+        # Último envío por (nodo_id, alerta_id). El estado queda particionado por
+        # nodo, así cada proceso de ingesta lleva el de los nodos que atiende.
+        # El singleton vuelve a llamar a __init__: no hay que pisar el estado.
+        if not hasattr(self, "last_sent"):
+            self.last_sent = {}
 
     def get_last_notification_time(self):
-        alerts = [self.last_sent[1], self.last_sent[2], self.last_sent[3], self.last_sent[4], self.last_sent[5]]
-        return max(filter(None, alerts), default=None)
+        return max(filter(None, list(self.last_sent.values())), default=None)
     
     def trigger_notification(self, db: Session, message: str, alerta_id: int, nodo_id: int):
 
@@ -48,13 +46,14 @@ class NotificationHandler:
 
         ten_minutes_ago = datetime.now() - timedelta(minutes=10)
         twenty_seconds_ago = datetime.now() - timedelta(seconds=20)
-        # Enviar push solo si el mismo tipo de alerta no se salio en los ultimos 10 minutos
-        if self.last_sent[alerta_id] is None or self.last_sent[alerta_id] < ten_minutes_ago:
+        ultimo_envio = self.last_sent.get((nodo_id, alerta_id))
+        # Enviar push solo si la misma alerta del nodo no salió en los últimos 10 minutos
+        if ultimo_envio is None or ultimo_envio < ten_minutes_ago:
             # Si hubo alguna noti en los ultimos 20 segundos, esperar
             if self.get_last_notification_time() is None or self.get_last_notification_time() < twenty_seconds_ago:
                 print("Enviando notificacion push de alerta de tipo ", alerta_id)
                 self.notificar_a_endpoints(db, endpoints, notification_data)
-                self.last_sent[alerta_id] = datetime.now()
+                self.last_sent[(nodo_id, alerta_id)] = datetime.now()
             
 
     def get_notification_body(self, db: Session, alerta_id: int, nodo_id: int, message: str) -> AlertaCreate:
@@ -77,21 +76,22 @@ class NotificationHandler:
     def notificar_a_endpoints(self, db: Session, endpoints, notification_data: NotificationData):
         for endpoint in endpoints:
             try:
-                webpush(
-                    subscription_info={
-                        "endpoint": endpoint.endpoint,
-                        "keys": {
-                            "auth": endpoint.keys_auth,
-                            "p256dh": endpoint.keys_p256dh
+                with duracion_push.medir():
+                    webpush(
+                        subscription_info={
+                            "endpoint": endpoint.endpoint,
+                            "keys": {
+                                "auth": endpoint.keys_auth,
+                                "p256dh": endpoint.keys_p256dh
+                            }
+                        },
+                        data=json.dumps(notification_data),
+                        vapid_private_key=VAPID_PRIVATE_KEY,
+                        vapid_claims={
+                            "sub": VAPID_EMAIL,
+                            "aud": ""
                         }
-                    },
-                    data=json.dumps(notification_data),
-                    vapid_private_key=VAPID_PRIVATE_KEY,
-                    vapid_claims={
-                        "sub": VAPID_EMAIL,
-                        "aud": ""
-                    }
-                )
+                    )
             except WebPushException as ex:
                 print(f"Error enviando notificación: {str(ex)}")
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 from ..auth.dependencies import get_current_user
@@ -14,6 +14,8 @@ from typing import List, Optional
 from ..usuarios.schemas import Usuario
 from .push_notifications import NotificationHandler
 from ..database import get_db
+from ..depends.respuestas import verificar_etag
+from ..depends.versiones import etag, version_catalogo
 
 router = APIRouter()
 
@@ -52,7 +54,8 @@ def get_alertas(alerta_id: int, db: Session = Depends(get_db)):
     return services.get_alerta(db, alerta_id)
 
 @router.get('/alertas', response_model=List[Alerta], tags=["Alertas"])
-def get_all_alertas(db: Session = Depends(get_db)):
+def get_all_alertas(request: Request, response: Response, db: Session = Depends(get_db)):
+    verificar_etag(request, response, etag(db, "alertas", version_catalogo(db)))
     return services.get_all_alertas(db)
 
 
@@ -3,6 +3,7 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from datetime import datetime
 
+from ..depends.versiones import incrementar_catalogo
 from .schemas import PushEndpointReceive, AlertaCreate
 from .models import Alerta, PushEndpoint, Suscripcion, Notificacion, UsuarioNotificacion
 
@@ -49,6 +50,7 @@ def vincular_alerta(db: Session, alerta_id: int, user_id: int):
 
 
 def crear_alerta(db: Session, alerta: AlertaCreate):
+    incrementar_catalogo(db)
     return Alerta.create(db, alerta)
 
 def get_all_alertas(db: Session):
@@ -0,0 +1,265 @@
+"""
+    GENERADOR DE CARGA MQTT CON LATENCIA DE PUNTA A PUNTA
+
+    python -m back.benchmarks.carga_mqtt --help
+
+    python -m back.benchmarks.carga_mqtt --nodos 12 --tasa 500 --duracion 30
+    python -m back.benchmarks.carga_mqtt --local --tasa 2000
+
+    Simula N nodos publicando a la vez, con una tasa total objetivo de
+    lecturas por segundo, usando los simuladores de `simuladores.py`. Cada
+    lectura publicada se anota con su hora de publicación y un hilo consulta
+    la base cada --sondeo-ms buscando los paquetes nuevos: la latencia es
+    publicación → commit (con la resolución del sondeo). Al final imprime
+    throughput y percentiles de latencia.
+
+    Usa los nodos activos de la base y los tipos que tienen vinculados (con
+    --crear-nodos crea los que falten y, si la ingesta corre en otro proceso,
+    espera INGESTA_REGISTRO_TTL_S segundos a que recargue su registro). Por defecto publica en el broker de
+    MQTT_HOST/MQTT_PORT, contra la ingesta que esté corriendo (API o
+    `python -m back.ingesta`); con --local levanta la ingesta en este mismo
+    proceso con el broker en memoria.
+
+    El campo `time` de cada lectura es la hora de inicio (posterior a la
+    última lectura guardada) más el número de lectura de ese nodo y tipo,
+    para que no se repitan (la ingesta descarta lecturas repetidas) aunque
+    un nodo publique más de una por segundo.
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, select
+
+from ..database import SessionLocal
+from ..depends.config import config
+from ..depends.registro import registro
+from ..nodos.models import Nodo
+from ..nodos.schemas import NodoCreate
+from ..nodos.services import crear_nodo
+from ..paquete.models import Paquete, Tipo
+from ..simuladores import Simulador, cargar_limites
+
+Clave = Tuple[int, int, int]
+
+
+def elegir_nodos(cantidad: int, crear: bool, limites: dict, esperar_registro: bool) -> List[Tuple[int, List[int]]]:
+    """Nodos activos con los tipos simulables que tienen vinculados."""
+    db = SessionLocal()
+    try:
+        creados = crear_nodos_de_carga(db, cantidad, limites) if crear else 0
+        registro.refrescar(db)
+    finally:
+        db.close()
+    if creados and esperar_registro:
+        # La ingesta de otro proceso ve los nodos nuevos recién al recargar su registro
+        print(f"{creados} nodos creados; esperando {registro.ttl_s} s a que la ingesta recargue su registro...")
+        time.sleep(registro.ttl_s)
+
+    nodos = []
+    for nodo_id in sorted(registro.nodos_activos):
+        tipos = sorted(t for t in registro.tipos_por_nodo.get(nodo_id, ()) if t in limites)
+        if tipos:
+            nodos.append((nodo_id, tipos))
+    if len(nodos) < cantidad:
+        raise SystemExit(
+            f"Solo hay {len(nodos)} nodos activos con tipos simulables; usar --crear-nodos"
+        )
+    return nodos[:cantidad]
+
+
+def crear_nodos_de_carga(db, cantidad: int, limites: dict) -> int:
+    """Crea los nodos 'carga-NNN' que falten con el servicio de nodos (sube
+    la versión del catálogo). Retorna cuántos creó."""
+    tipos_ids = list(db.scalars(select(Tipo.id).where(Tipo.data_type.in_(list(limites)))))
+    existentes = db.query(Nodo).filter(Nodo.is_active.is_(True)).count()
+    for i in range(existentes, cantidad):
+        nodo = NodoCreate(
+            identificador=f"carga-{i + 1:03d}",
+            descripcion="Nodo simulado por el generador de carga",
+            porcentajeBateria=100,
+            latitud=None,
+            longitud=None,
+        )
+        crear_nodo(db, nodo, tipos_ids)
+    return max(cantidad - existentes, 0)
+
+
+class Generador:
+    """Recorre los nodos y sus tipos en ronda, generando una lectura por llamada."""
+
+    def __init__(self, nodos: List[Tuple[int, List[int]]], limites: dict, inicio: int) -> None:
+        self.inicio = inicio
+        self.series = [
+            (nodo_id, tipo, Simulador(tipo, *limites[tipo]), itertools.count())
+            for nodo_id, tipos in nodos
+            for tipo in tipos
+        ]
+        self._ronda = itertools.cycle(self.series)
+
+    def siguiente(self) -> Tuple[Clave, bytes]:
+        nodo_id, tipo, simulador, secuencia = next(self._ronda)
+        instante = self.inicio + next(secuencia)
+        valor = simulador.siguiente(datetime.fromtimestamp(instante))
+        mensaje = {"id": nodo_id, "type": tipo, "data": round(valor, 3), "time": instante}
+        return (nodo_id, tipo, instante), json.dumps(mensaje).encode()
+
+
+class Observador(threading.Thread):
+    """Consulta la base buscando los paquetes publicados y anota cuándo aparecen."""
+
+    def __init__(self, enviados: Dict[Clave, float], sondeo_s: float) -> None:
+        super().__init__(name="observador", daemon=True)
+        self.enviados = enviados
+        self.sondeo_s = sondeo_s
+        self.latencias: List[float] = []
+        self.primera = None
+        self.ultima = None
+        self.detener = threading.Event()
+        db = SessionLocal()
+        try:
+            self.ultimo_id = db.execute(select(func.max(Paquete.id))).scalar() or 0
+        finally:
+            db.close()
+
+    def run(self) -> None:
+        while not self.detener.wait(self.sondeo_s):
+            self.sondear()
+
+    def sondear(self) -> None:
+        db = SessionLocal()
+        try:
+            filas = db.execute(
+                select(Paquete.id, Paquete.nodo_id, Paquete.type_id, Paquete.timestamp)
+                .where(Paquete.id > self.ultimo_id)
+                .order_by(Paquete.id)
+            ).all()
+        finally:
+            db.close()
+        ahora = time.time()
+        for id_, nodo_id, type_id, timestamp in filas:
+            self.ultimo_id = id_
+            publicado = self.enviados.get((nodo_id, type_id, int(timestamp.timestamp())))
+            if publicado is not None:
+                self.latencias.append(ahora - publicado)
+                self.primera = self.primera or ahora
+                self.ultima = ahora
+
+
+def publicar(cliente, topico: str, qos: int, tasa: float, duracion: float,
+             generador: Generador, enviados: Dict[Clave, float]) -> float:
+    """Publica a `tasa` lecturas/s durante `duracion` segundos. Retorna los segundos reales."""
+    intervalo = 1 / tasa
+    inicio = time.perf_counter()
+    for k in itertools.count():
+        objetivo = inicio + k * intervalo
+        if objetivo - inicio >= duracion:
+            break
+        espera = objetivo - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        clave, payload = generador.siguiente()
+        enviados[clave] = time.time()
+        cliente.publish(topico, payload, qos=qos)
+    return time.perf_counter() - inicio
+
+
+def primer_instante_libre() -> int:
+    """Hora de inicio posterior a toda lectura existente, para no repetir
+    lecturas de corridas anteriores (se descartarían como duplicadas)."""
+    db = SessionLocal()
+    try:
+        ultimo = db.execute(select(func.max(Paquete.timestamp))).scalar()
+    finally:
+        db.close()
+    ahora = int(time.time())
+    return max(ahora, int(ultimo.timestamp()) + 1) if ultimo else ahora
+
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generador de carga MQTT multi-nodo.")
+    parser.add_argument("--nodos", type=int, default=12, help="Cantidad de nodos simulados")
+    parser.add_argument("--tasa", type=float, default=500, help="Lecturas por segundo en total")
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--qos", type=int, default=1, choices=[0, 1, 2])
+    parser.add_argument("--sondeo-ms", type=int, default=100, help="Cada cuánto se consulta la base")
+    parser.add_argument("--espera", type=float, default=30,
+                        help="Segundos máximos para esperar los commits al terminar de publicar")
+    parser.add_argument("--crear-nodos", action="store_true",
+                        help="Crear nodos 'carga-NNN' si no hay suficientes")
+    parser.add_argument("--local", action="store_true",
+                        help="Ingesta en este proceso con el broker en memoria")
+    args = parser.parse_args()
+
+    limites = cargar_limites()
+    nodos = elegir_nodos(args.nodos, args.crear_nodos, limites, esperar_registro=not args.local)
+    generador = Generador(nodos, limites, primer_instante_libre())
+    enviados: Dict[Clave, float] = {}
+
+    if args.local:
+        from ..depends.broker_local import BrokerLocal, ClienteLocal
+        from ..depends.paquetes import detener_ingesta, iniciar_ingesta, mi_callback
+        from ..depends.sub import Subscriptor
+
+        broker = BrokerLocal()
+        iniciar_ingesta()
+        sub = Subscriptor(ClienteLocal(broker), on_message_callback=mi_callback)
+        sub.connect("local", 0, 60)
+        while not sub.subscribed:
+            time.sleep(0.01)
+        cliente = ClienteLocal(broker)
+    else:
+        import paho.mqtt.client as paho
+
+        cliente = paho.Client()
+        cliente.connect(config.host, config.port, config.keepalive)
+        cliente.loop_start()
+
+    observador = Observador(enviados, args.sondeo_ms / 1000)
+    observador.start()
+    print(f"Publicando {args.tasa:.0f} lecturas/s de {len(nodos)} nodos durante {args.duracion:.0f} s...")
+    segundos = publicar(cliente, sub.topic if args.local else config.topic, args.qos,
+                        args.tasa, args.duracion, generador, enviados)
+    fin_publicacion = time.time()
+
+    while len(observador.latencias) < len(enviados) and time.time() - fin_publicacion < args.espera:
+        time.sleep(args.sondeo_ms / 1000)
+    observador.detener.set()
+    observador.join()
+    if args.local:
+        sub.disconnect()
+        detener_ingesta()
+    else:
+        cliente.loop_stop()
+        cliente.disconnect()
+
+    latencias = observador.latencias
+    confirmadas = len(latencias)
+    print(f"Publicadas: {len(enviados)} en {segundos:.1f} s ({len(enviados) / segundos:.0f} lecturas/s)")
+    if confirmadas:
+        ventana = max(observador.ultima - (fin_publicacion - segundos), 1e-9)
+        print(f"Escritas en la base: {confirmadas} ({confirmadas / ventana:.0f} lecturas/s)")
+    print(f"Sin confirmar: {len(enviados) - confirmadas}")
+    print(
+        "Latencia publicación→commit (ms): "
+        + " ".join(
+            f"p{p}={percentil(latencias, p) * 1000:.0f}" for p in (50, 90, 99)
+        )
+        + f" max={max(latencias, default=float('nan')) * 1000:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
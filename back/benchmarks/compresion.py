@@ -0,0 +1,124 @@
+"""
+    BENCHMARK DE COMPRESIÓN DE RESPUESTAS
+
+    python -m back.benchmarks.compresion --db /tmp/paginacion.db
+
+    Sobre una base creada por `back.benchmarks.paginacion` (se crea si no
+    existe) arma las respuestas típicas ya serializadas (una página de
+    /paquetes en JSON y en columnar, /series de 9 nodos por hora durante una
+    semana y la exportación CSV/NDJSON de un nodo) y mide, para cada nivel
+    de gzip y de brotli (si está instalado), los ms de CPU que cuesta
+    comprimirlas y los bytes que se ahorran. Las exportaciones se comprimen
+    de las dos formas: trozo a trozo como hace `CompresionMiddleware`
+    ("por_partes", con un flush por trozo) y de una vez.
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from ..depends.compresion import CompresorBrotli, CompresorGzip, brotli
+from ..depends.respuestas import RespuestaJSON
+from ..paquete.models import Paquete
+from ..paquete.services import exportar_paquetes, listar_paquetes, series_multiples
+from .consultas import preparar_archivo
+from .paginacion import INICIO, crear_base
+
+
+def tiempo_cpu(funcion, repeticiones: int) -> float:
+    """Mediana en ms de CPU de `repeticiones` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        funcion()
+        tiempos.append((time.process_time() - inicio) * 1000)
+    return sorted(tiempos)[len(tiempos) // 2]
+
+
+def comprimir_trozos(crear_compresor, trozos: list) -> int:
+    """Bytes comprimidos enviando cada trozo como lo hace el middleware."""
+    compresor = crear_compresor()
+    return sum(len(compresor.comprimir(trozo, final=i == len(trozos) - 1)) for i, trozo in enumerate(trozos))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mide el costo y el ahorro de comprimir las respuestas.")
+    parser.add_argument("--db", default="paginacion.db", help="Archivo SQLite (se crea si no existe)")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--nodos", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="Filas de la página de /paquetes")
+    parser.add_argument("--exportar", type=int, default=50_000, help="Filas de la exportación")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Creando {args.db} con {args.filas} filas...")
+        crear_base(args.db, args.filas, args.nodos)
+    engine = create_engine(f"sqlite:///{args.db}")
+    db = sessionmaker(bind=engine)()
+    preparar_archivo(db, 1_000_000)
+
+    # Una semana a mitad del período cargado
+    ultimo = db.execute(text("SELECT MAX(timestamp) FROM paquetes")).scalar()
+    dia = INICIO + timedelta(days=(datetime.fromisoformat(ultimo) - INICIO).days // 2)
+    filtros = dict(nodo_id=7, order_by="timestamp", order="desc")
+
+    def json(contenido) -> list:
+        return [RespuestaJSON(contenido).body]
+
+    def exportacion(formato: str) -> list:
+        trozos = exportar_paquetes(
+            db, Paquete, formato, nodo_id=7, start_date=dia, order_by="timestamp", tamanio_lote=5000
+        )
+        partes, filas = [], 0
+        for trozo in trozos:
+            partes.append(trozo.encode())
+            filas += trozo.count("\n")
+            if filas >= args.exportar:
+                break
+        return partes
+
+    respuestas = {
+        "paquetes": json(listar_paquetes(db, limit=args.limit, conteo="ninguno", **filtros)),
+        "paquetes_columnar": json(
+            listar_paquetes(db, limit=args.limit, conteo="ninguno", formato="columnar", **filtros)
+        ),
+        "series_semana_hora": json(
+            series_multiples(db, list(range(1, 10)), [25], "hora", start=dia, end=dia + timedelta(days=7))
+        ),
+        "export_csv": exportacion("csv"),
+        "export_ndjson": exportacion("ndjson"),
+    }
+
+    compresores = {
+        "gzip-1": lambda: CompresorGzip(1),
+        "gzip-6": lambda: CompresorGzip(6),
+        "gzip-9": lambda: CompresorGzip(9),
+    }
+    if brotli is not None:
+        compresores.update({"br-4": lambda: CompresorBrotli(4), "br-11": lambda: CompresorBrotli(11)})
+    else:
+        print("brotli no está instalado: solo se mide gzip (pip install brotli)")
+
+    print(f"{'respuesta':>20} {'compresor':>10} {'modo':>10} {'bytes':>10} {'comprimido':>11} {'ahorro':>7} {'ms CPU':>8} {'MB/s':>7}")
+    for nombre, trozos in respuestas.items():
+        original = sum(len(trozo) for trozo in trozos)
+        modos = {"de_una_vez": [b"".join(trozos)]}
+        if len(trozos) > 1:
+            modos["por_partes"] = trozos
+        for compresor, crear in compresores.items():
+            for modo, partes in modos.items():
+                comprimido = comprimir_trozos(crear, partes)
+                ms = tiempo_cpu(lambda: comprimir_trozos(crear, partes), args.repeticiones)
+                print(
+                    f"{nombre:>20} {compresor:>10} {modo:>10} {original:>10} {comprimido:>11}"
+                    f" {1 - comprimido / original:>7.1%} {ms:>8.2f} {original / 1e3 / max(ms, 1e-3):>7.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
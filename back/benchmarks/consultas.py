@@ -0,0 +1,125 @@
+"""
+    BENCHMARK DE CONSULTAS TÍPICAS DEL DASHBOARD
+
+    python -m back.benchmarks.consultas --db /tmp/paginacion.db
+
+    Sobre una base creada por `back.benchmarks.paginacion` (se crea si no
+    existe) mide, en ms, las consultas que hace el frontend y el costo de
+    insertar lecturas, para comparar índices y filtros antes y después de
+    un cambio:
+
+    - dia_nodo_tipo: gráfico de un día de un nodo y un tipo, completo
+    - semana_nodo: primera página de la tabla de una semana de un nodo
+    - dia_todos: primera página de un día de todos los nodos
+    - archivo_nodo_tipo: primera página de un día del archivo de un nodo y tipo
+    - dashboard_9_llamadas: un día de 9 nodos, un listado completo por nodo
+    - dashboard_series: lo mismo con una sola consulta de `series_multiples`
+    - semana_9_por_hora: una semana de 9 nodos por hora, desde los agregados
+    - insertar_10k: insertar 10.000 lecturas (se deshace al terminar)
+
+    Si `paquetes_archivo` está vacía se copian --archivo filas de `paquetes`.
+    Las consultas pasan por los servicios de /paquetes y /paquetesarchivos,
+    así que reflejan los filtros y el conteo que usa la API.
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from ..paquete.models import PaqueteArchivo, Tipo
+from ..paquete.services import listar_paquetes, listar_paquetes_archivo, series_multiples
+from .paginacion import INICIO, crear_base, medir
+
+
+def preparar_archivo(db, filas: int) -> None:
+    """Carga el tipo de las lecturas generadas (el archivo lo incluye en cada
+    fila) y, si `paquetes_archivo` está vacía, le copia `filas` filas."""
+    if db.get(Tipo, 25) is None:
+        db.add(Tipo(id=25, data_type=25, data_symbol="m", nombre="nivel"))
+        db.commit()
+    if not db.query(PaqueteArchivo.id).first():
+        db.execute(
+            text(
+                "INSERT INTO paquetes_archivo (data, type_id, timestamp, nodo_id)"
+                " SELECT data, type_id, timestamp, nodo_id FROM paquetes ORDER BY id LIMIT :n"
+            ),
+            {"n": filas},
+        )
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mide las consultas típicas del dashboard.")
+    parser.add_argument("--db", default="paginacion.db", help="Archivo SQLite (se crea si no existe)")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--nodos", type=int, default=20)
+    parser.add_argument("--archivo", type=int, default=1_000_000, help="Filas a copiar al archivo")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Creando {args.db} con {args.filas} filas...")
+        crear_base(args.db, args.filas, args.nodos)
+    engine = create_engine(f"sqlite:///{args.db}")
+    db = sessionmaker(bind=engine)()
+
+    preparar_archivo(db, args.archivo)
+
+    # Un día a mitad del período cargado
+    ultimo = db.execute(text("SELECT MAX(timestamp) FROM paquetes")).scalar()
+    dia = INICIO + timedelta(days=(datetime.fromisoformat(ultimo) - INICIO).days // 2)
+    dia_archivo = INICIO + timedelta(days=1)
+
+    consultas = {
+        "dia_nodo_tipo": lambda: listar_paquetes(
+            db, nodo_id=7, type_id=25, start_date=dia, end_date=dia, order_by="timestamp"
+        ),
+        "semana_nodo": lambda: listar_paquetes(
+            db, limit=10, nodo_id=7, start_date=dia, end_date=dia + timedelta(days=6),
+            order_by="timestamp", order="desc",
+        ),
+        "dia_todos": lambda: listar_paquetes(
+            db, limit=10, start_date=dia, end_date=dia, order_by="timestamp", order="desc"
+        ),
+        "archivo_nodo_tipo": lambda: listar_paquetes_archivo(
+            db, limit=10, nodo_id=7, type_id=25, start_date=dia_archivo, end_date=dia_archivo,
+            order_by="timestamp",
+        ),
+        "dashboard_9_llamadas": lambda: [
+            listar_paquetes(db, nodo_id=nodo, type_id=25, start_date=dia, end_date=dia, order_by="timestamp")
+            for nodo in range(1, 10)
+        ],
+        "dashboard_series": lambda: series_multiples(
+            db, list(range(1, 10)), [25], start=dia, end=dia + timedelta(days=1)
+        ),
+        "semana_9_por_hora": lambda: series_multiples(
+            db, list(range(1, 10)), [25], "hora", start=dia, end=dia + timedelta(days=7)
+        ),
+    }
+
+    def insertar() -> None:
+        conexion = engine.raw_connection()
+        try:
+            conexion.cursor().executemany(
+                "INSERT INTO paquetes (nodo_id, type_id, data, timestamp)"
+                " VALUES (?, 25, 1.0, datetime(?, '+' || ? || ' seconds'))",
+                [(i % args.nodos + 1, ultimo, i // args.nodos + 1) for i in range(10_000)],
+            )
+            conexion.rollback()
+        finally:
+            conexion.close()
+
+    consultas["insertar_10k"] = insertar
+
+    print(f"ms (mediana de {args.repeticiones})")
+    for nombre, consulta in consultas.items():
+        consulta()  # calienta la caché de páginas
+        print(f"{nombre:>20} {medir(consulta, args.repeticiones):>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
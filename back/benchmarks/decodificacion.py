@@ -0,0 +1,67 @@
+"""
+    MICRO-BENCHMARK DE DECODIFICACIÓN DE MENSAJES
+
+    python -m back.benchmarks.decodificacion --help
+
+    Compara el costo por lectura del camino original (decode + replace de
+    comillas + json.loads + un PaqueteCreate por lectura) contra el
+    decodificador directo sobre bytes, con un mensaje por lectura y con
+    tramas de varias lecturas (array JSON y trama binaria).
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+from ..depends.decodificador import codificar_trama, decodificar
+from ..paquete.schemas import PaqueteCreate
+
+
+def procesar_mensaje_original(mensaje: str) -> PaqueteCreate:
+    """Copia del camino anterior de `depends/paquetes.procesar_mensaje`."""
+    mensaje = mensaje.replace("'", '"')
+    mensaje_json = json.loads(mensaje)
+    return PaqueteCreate(
+        nodo_id=mensaje_json["id"],
+        type_id=int(mensaje_json["type"]),
+        data=float(mensaje_json["data"]),
+        timestamp=datetime.fromtimestamp(mensaje_json["time"]),
+    )
+
+
+def medir(nombre: str, funcion, mensajes: list, lecturas: int) -> None:
+    inicio = time.perf_counter()
+    for mensaje in mensajes:
+        funcion(mensaje)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<40} {duracion / lecturas * 1e6:>8.2f} µs/lectura")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Costo de decodificación por lectura.")
+    parser.add_argument("--lecturas", type=int, default=100000, help="Lecturas a decodificar")
+    parser.add_argument("--por-trama", type=int, default=50, help="Lecturas por trama")
+    args = parser.parse_args()
+
+    tuplas = [(i % 12 + 1, 25, float(i % 300), 1700000000 + i) for i in range(args.lecturas)]
+    tramas = [tuplas[i:i + args.por_trama] for i in range(0, len(tuplas), args.por_trama)]
+
+    individuales = [
+        json.dumps({"id": n, "type": t, "data": d, "time": ts}).encode() for n, t, d, ts in tuplas
+    ]
+    arrays_json = [json.dumps([list(l) for l in trama]).encode() for trama in tramas]
+    binarias = [codificar_trama(trama) for trama in tramas]
+
+    def lecturas_de(mensaje):
+        for _ in decodificar(mensaje).lecturas():
+            pass
+
+    medir("original (decode+replace+pydantic)", lambda m: procesar_mensaje_original(m.decode()), individuales, args.lecturas)
+    medir("bytes, un mensaje por lectura", lecturas_de, individuales, args.lecturas)
+    medir(f"array JSON, {args.por_trama} por trama", lecturas_de, arrays_json, args.lecturas)
+    medir(f"trama binaria, {args.por_trama} por trama", lecturas_de, binarias, args.lecturas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+    BENCHMARK DE ESCALADO DE LA INGESTA POR PARTICIONES
+
+    python -m back.benchmarks.ingesta_particiones --help
+
+    python -m back.benchmarks.ingesta_particiones --mensajes 20000 --max-procesos 4
+
+    Lanza de 1 a N procesos consumidores, uno por partición, cada uno con su
+    Subscriptor, y mide cuántas lecturas por segundo procesa el conjunto.
+    Por defecto cada proceso tiene su propio broker en memoria, que le
+    entrega solo los mensajes de los tópicos a los que se suscribió (como
+    hace un broker real); con --broker host:port usa un broker real (p.ej.
+    mosquitto local).
+
+    Cada lectura se publica en el tópico de su nodo (`<topic>/<nodo_id>`) y
+    cada proceso se suscribe solo a los de los nodos de su partición, así
+    que ninguno recibe el tráfico de los demás. Con --topico-unico todo va a
+    `<topic>`, que atiende solo la partición 0: no escala.
+
+    El trabajo por lectura es la decodificación real (`decodificar`) más
+    --costo-ms de CPU que representa validación, alertas y persistencia.
+    Además de las lecturas/s medidas con el reloj se muestran las que
+    permite la CPU (lecturas / segundos de CPU del proceso más cargado): es
+    el escalado que se obtiene con un núcleo por proceso, aunque la máquina
+    donde se corre tenga menos.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+TOPICO = "rma/benchmark"
+
+
+def generar_mensajes(cantidad: int, nodos: int, topico_unico: bool) -> list:
+    """Pares (tópico, payload) de una lectura cada uno."""
+    inicio = 1700000000
+    mensajes = []
+    for i in range(cantidad):
+        nodo_id = i % nodos + 1
+        payload = json.dumps({"id": nodo_id, "type": 25, "data": i % 300, "time": inicio + i}).encode()
+        mensajes.append((TOPICO if topico_unico else f"{TOPICO}/{nodo_id}", payload))
+    return mensajes
+
+
+def trabajo_cpu(costo_s: float) -> None:
+    fin = time.perf_counter() + costo_s
+    while time.perf_counter() < fin:
+        pass
+
+
+def consumidor(k: int, particiones: int, args, listo, resultados) -> None:
+    import paho.mqtt.client as paho
+
+    from ..depends.broker_local import BrokerLocal, ClienteLocal, topico_coincide
+    from ..depends.decodificador import decodificar
+    from ..depends.sub import Subscriptor
+
+    costo_s = args.costo_ms / 1000
+    estado = {"procesados": 0, "inicio": None, "fin": None}
+
+    def callback(payload: bytes, nodo_topico) -> None:
+        if estado["inicio"] is None:
+            estado["inicio"] = time.perf_counter()
+        # El broker solo entrega mensajes de esta partición: no se filtra
+        for lectura in decodificar(payload).lecturas():
+            trabajo_cpu(costo_s)
+            estado["procesados"] += 1
+        if estado["procesados"] == esperados:
+            estado["fin"] = time.perf_counter()
+            estado["cpu"] = time.process_time() - cpu_inicio
+
+    if args.broker:
+        host, port = args.broker.split(":")
+        cliente = paho.Client()
+    else:
+        host, port = "local", 0
+        broker = BrokerLocal()
+        cliente = ClienteLocal(broker)
+
+    sub = Subscriptor(
+        cliente,
+        on_message_callback=callback,
+        topic=TOPICO,
+        particiones=particiones,
+        particion=k,
+        nodo_maximo=lambda: args.nodos,
+        reserva_nodos=0,
+    )
+    sub.connect(host, int(port), 60)
+    while not sub.subscribed:
+        time.sleep(0.01)
+    # Cada lectura va en su propio mensaje: se esperan las de los tópicos
+    # a los que se suscribió esta partición
+    filtros = sub.topicos_suscripcion()
+    propios = [
+        (t, m)
+        for t, m in generar_mensajes(args.mensajes, args.nodos, args.topico_unico)
+        if any(topico_coincide(f, t) for f in filtros)
+    ]
+    esperados = len(propios)
+    cpu_inicio = time.process_time()
+    listo.set()
+
+    if not args.broker:
+        # Hace de broker: el ruteo de los demás tópicos ocurre en el broker
+        # real, así que el proceso solo recibe lo suyo
+        for topico, mensaje in propios:
+            broker.publicar(topico, mensaje)
+
+    if esperados == 0:
+        estado.update(inicio=0.0, fin=0.0, cpu=0.0)
+    while estado["fin"] is None:
+        time.sleep(0.01)
+    sub.disconnect()
+    resultados.put((k, estado["procesados"], estado["fin"] - estado["inicio"], estado["cpu"]))
+
+
+def correr(particiones: int, args) -> float:
+    resultados = mp.Queue()
+    listos = [mp.Event() for _ in range(particiones)]
+    procesos = [
+        mp.Process(target=consumidor, args=(k, particiones, args, listos[k], resultados))
+        for k in range(particiones)
+    ]
+    for p in procesos:
+        p.start()
+    for listo in listos:
+        listo.wait()
+
+    if args.broker:
+        import paho.mqtt.client as paho
+
+        host, port = args.broker.split(":")
+        publicador = paho.Client()
+        publicador.connect(host, int(port), 60)
+        publicador.loop_start()
+        for topico, mensaje in generar_mensajes(args.mensajes, args.nodos, args.topico_unico):
+            publicador.publish(topico, mensaje, qos=1).wait_for_publish()
+        publicador.loop_stop()
+
+    datos = [resultados.get() for _ in range(particiones)]
+    for p in procesos:
+        p.join()
+    procesados = sum(d[1] for d in datos)
+    duracion = max(d[2] for d in datos)
+    cpu = max(d[3] for d in datos)
+    return procesados / duracion, procesados / cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escalado de la ingesta con N procesos.")
+    parser.add_argument("--mensajes", type=int, default=20000, help="Lecturas a procesar")
+    parser.add_argument("--nodos", type=int, default=12, help="Cantidad de nodos simulados")
+    parser.add_argument("--max-procesos", type=int, default=4, help="Máximo de procesos consumidores")
+    parser.add_argument("--costo-ms", type=float, default=0.2, help="CPU por lectura (validación, alertas, persistencia)")
+    parser.add_argument("--broker", default=None, help="host:port de un broker MQTT real")
+    parser.add_argument("--topico-unico", action="store_true",
+                        help="Publicar todo en un solo tópico en lugar de uno por nodo")
+    args = parser.parse_args()
+
+    print(f"{'procesos':>8} {'lecturas/s':>12} {'por CPU':>10} {'speedup':>8} {'eficiencia':>10}")
+    base = None
+    for n in range(1, args.max_procesos + 1):
+        tasa, tasa_cpu = correr(n, args)
+        base = base or tasa_cpu
+        print(f"{n:>8} {tasa:>12.0f} {tasa_cpu:>10.0f} {tasa_cpu / base:>8.2f} {tasa_cpu / base / n:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
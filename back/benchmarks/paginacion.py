@@ -0,0 +1,144 @@
+"""
+    BENCHMARK DE PAGINACIÓN: OFFSET VS CURSOR
+
+    python -m back.benchmarks.paginacion --help
+
+    python -m back.benchmarks.paginacion --filas 10000000 --db /tmp/paginacion.db
+
+    Crea (si no existe) una base SQLite con --filas lecturas repartidas entre
+    --nodos nodos y mide cuánto tarda en traer una página de `listar_paquetes`
+    a distintas profundidades, ordenando por timestamp descendente:
+
+    - estimado: el modo por página con conteo=estimado (total de los
+      agregados + OFFSET)
+    - count: el modo por página por defecto (COUNT + OFFSET)
+    - offset: solo la consulta con OFFSET, sin el total
+    - cursor: la página siguiente a partir del cursor de la anterior
+
+    Con --nodo se filtra por un nodo. La base se reutiliza entre corridas.
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..models import ModeloBase
+from ..paquete.models import Paquete
+from ..paquete.services import (
+    aplicar_filtros_y_orden,
+    codificar_cursor,
+    listar_paquetes,
+    reconstruir_agregados,
+)
+
+# Registra el resto de los modelos (claves foráneas de paquetes)
+from .. import main  # noqa: F401
+
+TAMANIO_LOTE = 100_000
+INICIO = datetime(2020, 1, 1)
+
+
+def crear_base(ruta: str, filas: int, nodos: int) -> None:
+    engine = create_engine(f"sqlite:///{ruta}")
+    ModeloBase.metadata.create_all(bind=engine)
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        inicio = time.perf_counter()
+        for desde in range(0, filas, TAMANIO_LOTE):
+            lote = [
+                (
+                    i % nodos + 1,
+                    25,
+                    float(i % 300),
+                    (INICIO + timedelta(seconds=10 * (i // nodos))).isoformat(" ", "microseconds"),
+                )
+                for i in range(desde, min(desde + TAMANIO_LOTE, filas))
+            ]
+            cursor.executemany(
+                "INSERT INTO paquetes (nodo_id, type_id, data, timestamp) VALUES (?, ?, ?, ?)", lote
+            )
+            conexion.commit()
+            print(f"\r{desde + len(lote)} filas ({time.perf_counter() - inicio:.0f} s)", end="")
+        print()
+    finally:
+        conexion.close()
+    # Los totales estimados de /paquetes salen de los agregados
+    db = sessionmaker(bind=engine)()
+    reconstruir_agregados(db)
+    db.commit()
+    db.close()
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Mediana en ms de `repeticiones` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return sorted(tiempos)[len(tiempos) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara paginación por OFFSET y por cursor.")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--nodos", type=int, default=20)
+    parser.add_argument("--db", default="paginacion.db", help="Archivo SQLite (se crea si no existe)")
+    parser.add_argument("--limit", type=int, default=50, help="Filas por página")
+    parser.add_argument("--nodo", type=int, default=None, help="Filtrar por este nodo")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Creando {args.db} con {args.filas} filas...")
+        crear_base(args.db, args.filas, args.nodos)
+    engine = create_engine(f"sqlite:///{args.db}")
+    db = sessionmaker(bind=engine)()
+
+    filtros = {"nodo_id": args.nodo, "order_by": "timestamp", "order": "desc"}
+    total = aplicar_filtros_y_orden(db.query(Paquete), Paquete, **filtros).count()
+    paginas = [2, 10, 100, 1_000, 10_000, 100_000]
+    paginas = [p for p in paginas if p * args.limit < total]
+
+    print(f"{total} filas, {args.limit} por página, ms (mediana de {args.repeticiones})")
+    print(f"{'página':>8} {'estimado':>10} {'count':>10} {'offset':>10} {'cursor':>10}")
+    for pagina in paginas:
+        offset = (pagina - 1) * args.limit
+        # Cursor de la página anterior: la última fila antes de `offset`
+        anterior = (
+            aplicar_filtros_y_orden(db.query(Paquete), Paquete, **filtros)
+            .offset(offset - 1)
+            .first()
+        )
+        cursor = codificar_cursor("timestamp", "desc", anterior.timestamp, anterior.id)
+
+        t_estimado = medir(
+            lambda: listar_paquetes(db, limit=args.limit, offset=offset, conteo="estimado", **filtros),
+            args.repeticiones,
+        )
+        t_offset = medir(
+            lambda: aplicar_filtros_y_orden(db.query(Paquete), Paquete, **filtros)
+            .offset(offset)
+            .limit(args.limit)
+            .all(),
+            args.repeticiones,
+        )
+        t_count = t_offset + medir(
+            lambda: aplicar_filtros_y_orden(db.query(Paquete), Paquete, **filtros).order_by(None).count(),
+            args.repeticiones,
+        )
+        t_cursor = medir(
+            lambda: listar_paquetes(db, limit=args.limit, cursor=cursor, **filtros),
+            args.repeticiones,
+        )
+        print(f"{pagina:>8} {t_estimado:>10.1f} {t_count:>10.1f} {t_offset:>10.1f} {t_cursor:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
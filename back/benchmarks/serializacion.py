@@ -0,0 +1,81 @@
+"""
+    BENCHMARK DE SERIALIZACIÓN DE LOS LISTADOS
+
+    python -m back.benchmarks.serializacion --db /tmp/paginacion.db
+
+    Sobre una base creada por `back.benchmarks.paginacion` (se crea si no
+    existe) pide páginas de /paquetes y /paquetesarchivos de --limit filas a
+    una app con solo el router de paquetes (sin autenticación) y muestra los
+    ms por cada 1000 filas, de punta a punta: consulta, armado de la
+    respuesta y serialización a JSON, y el tamaño de la respuesta. El total
+    se pide con conteo=ninguno para medir solo las filas. `paquetes_columnar`
+    es la misma página de /paquetes con format=columnar.
+"""
+
+import argparse
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..database import get_db
+from ..paquete.router import router
+from .consultas import preparar_archivo
+from .paginacion import crear_base, medir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mide el costo de serializar los listados.")
+    parser.add_argument("--db", default="paginacion.db", help="Archivo SQLite (se crea si no existe)")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--nodos", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="Filas por página")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Creando {args.db} con {args.filas} filas...")
+        crear_base(args.db, args.filas, args.nodos)
+    engine = create_engine(f"sqlite:///{args.db}", connect_args={"check_same_thread": False})
+    sesiones = sessionmaker(bind=engine)
+    preparar_archivo(sesiones(), 1_000_000)
+
+    def db_de_prueba():
+        db = sesiones()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = db_de_prueba
+    # Sin permisos: se reemplazan las dependencias de autorización de cada ruta
+    for ruta in router.routes:
+        for dependencia in getattr(ruta, "dependencies", []):
+            app.dependency_overrides[dependencia.dependency] = lambda: None
+    cliente = TestClient(app)
+
+    consultas = {
+        "paquetes": f"/paquetes?limit={args.limit}&nodo_id=7&order_by=timestamp&order=desc&conteo=ninguno",
+        "paquetesarchivos": f"/paquetesarchivos?limit={args.limit}&nodo_id=7&order_by=timestamp&conteo=ninguno",
+        "paquetes_columnar": f"/paquetes?limit={args.limit}&nodo_id=7&order_by=timestamp&order=desc"
+        "&conteo=ninguno&format=columnar",
+    }
+    print(f"ms por 1000 filas (páginas de {args.limit}, mediana de {args.repeticiones})")
+    for nombre, url in consultas.items():
+        respuesta = cliente.get(url)
+        assert respuesta.status_code == 200, respuesta.text
+        contenido = respuesta.json()
+        if "series" in contenido:
+            filas = sum(len(serie["values"]) for serie in contenido["series"])
+        else:
+            filas = len(contenido["items"])
+        ms = medir(lambda: cliente.get(url), args.repeticiones)
+        print(f"{nombre:>20} {ms * 1000 / max(filas, 1):>10.1f}  ({len(respuesta.content)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from back.models import ModeloBase
+
+# Se registran todos los modelos: hay claves foráneas entre módulos
+# (p.ej. push_endpoint y alertas referencian usuarios)
+from back.alertas import models as _alertas  # noqa: F401
+from back.auth import models as _auth  # noqa: F401
+from back.nodos import models as _nodos  # noqa: F401
+from back.paquete import models as _paquete  # noqa: F401
+from back.permisos import models as _permisos  # noqa: F401
+from back.roles import models as _roles  # noqa: F401
+from back.usuarios import models as _usuarios  # noqa: F401
+
+
+@pytest.fixture
+def engine():
+    """Base SQLite en memoria, nueva para cada test y compartida entre hilos."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    ModeloBase.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sesiones(engine):
+    """Fábrica de sesiones sobre la base del test (para escritores, spool, etc.)."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(sesiones):
+    db = sesiones()
+    yield db
+    db.close()
@@ -0,0 +1,139 @@
+import itertools
+import queue
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+# Mensaje con la misma forma que el que entrega paho a on_message
+MensajeLocal = namedtuple("MensajeLocal", ["topic", "payload", "qos"])
+
+_FIN = object()
+
+
+def topico_coincide(filtro: str, topico: str) -> bool:
+    """Compara un tópico contra un filtro MQTT con comodines `+` y `#`."""
+    partes_filtro = filtro.split("/")
+    partes_topico = topico.split("/")
+    for i, parte in enumerate(partes_filtro):
+        if parte == "#":
+            return True
+        if i >= len(partes_topico):
+            return False
+        if parte != "+" and parte != partes_topico[i]:
+            return False
+    return len(partes_filtro) == len(partes_topico)
+
+
+class BrokerLocal:
+    """Broker MQTT en memoria para pruebas y benchmarks de la ingesta.
+
+    Implementa lo que usa el `Subscriptor`: suscripciones normales, que
+    reciben todos los mensajes, y suscripciones compartidas
+    (`$share/<grupo>/<filtro>`), donde cada mensaje va a un solo miembro
+    del grupo (round-robin), como hace mosquitto. Las suscripciones a un
+    tópico sin comodines se buscan por nombre, para que suscribirse a un
+    tópico por nodo no haga más lenta cada publicación.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._suscripciones: List[Tuple[str, "ClienteLocal"]] = []
+        self._exactas: Dict[str, List["ClienteLocal"]] = {}
+        self._grupos: Dict[Tuple[str, str], List["ClienteLocal"]] = {}
+        self._turnos: Dict[Tuple[str, str], itertools.count] = {}
+
+    def suscribir(self, cliente: "ClienteLocal", topico: str) -> None:
+        with self._lock:
+            if topico.startswith("$share/"):
+                _, grupo, filtro = topico.split("/", 2)
+                miembros = self._grupos.setdefault((grupo, filtro), [])
+                if cliente not in miembros:
+                    miembros.append(cliente)
+                self._turnos.setdefault((grupo, filtro), itertools.count())
+            elif "+" in topico or "#" in topico:
+                self._suscripciones.append((topico, cliente))
+            else:
+                clientes = self._exactas.setdefault(topico, [])
+                if cliente not in clientes:
+                    clientes.append(cliente)
+
+    def desuscribir(self, cliente: "ClienteLocal") -> None:
+        with self._lock:
+            self._suscripciones = [s for s in self._suscripciones if s[1] is not cliente]
+            for clientes in self._exactas.values():
+                if cliente in clientes:
+                    clientes.remove(cliente)
+            for miembros in self._grupos.values():
+                if cliente in miembros:
+                    miembros.remove(cliente)
+
+    def publicar(self, topico: str, payload: bytes, qos: int = 1) -> None:
+        if isinstance(payload, str):
+            payload = payload.encode()
+        mensaje = MensajeLocal(topico, payload, qos)
+        with self._lock:
+            destinos = list(self._exactas.get(topico, ()))
+            destinos += [c for f, c in self._suscripciones if topico_coincide(f, topico) and c not in destinos]
+            for (grupo, filtro), miembros in self._grupos.items():
+                if miembros and topico_coincide(filtro, topico):
+                    turno = next(self._turnos[(grupo, filtro)])
+                    destinos.append(miembros[turno % len(miembros)])
+        for cliente in destinos:
+            cliente._entregar(mensaje)
+
+
+class ClienteLocal:
+    """Cliente con la interfaz de `paho.Client` que usa el `Subscriptor`,
+    conectado a un `BrokerLocal`."""
+
+    def __init__(self, broker: BrokerLocal, capacidad: int = 0) -> None:
+        self.broker = broker
+        self.on_connect = None
+        self.on_subscribe = None
+        self.on_message = None
+        self.on_disconnect = None
+        self._conectado = False
+        # Con capacidad > 0 el broker se bloquea si el cliente no consume
+        self._entrada: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._mid = itertools.count(1)
+
+    def connect(self, host: Optional[str] = None, port: Optional[int] = None, keepalive: int = 60):
+        self._conectado = True
+        return 0
+
+    def is_connected(self) -> bool:
+        return self._conectado
+
+    def subscribe(self, topic, qos: int = 0):
+        # Como paho: un tópico o una lista de (tópico, qos)
+        topicos = [(topic, qos)] if isinstance(topic, str) else topic
+        for topico, _ in topicos:
+            self.broker.suscribir(self, topico)
+        mid = next(self._mid)
+        if self.on_subscribe:
+            self.on_subscribe(self, None, mid, tuple(q for _, q in topicos))
+        return 0, mid
+
+    def publish(self, topic: str, payload, qos: int = 0):
+        self.broker.publicar(topic, payload, qos)
+
+    def _entregar(self, mensaje: MensajeLocal) -> None:
+        self._entrada.put(mensaje)
+
+    def loop_forever(self, timeout: float = 1.0, retry_first_connection: bool = False):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0)
+        while True:
+            mensaje = self._entrada.get()
+            if mensaje is _FIN:
+                break
+            if self.on_message:
+                self.on_message(self, None, mensaje)
+        if self.on_disconnect:
+            self.on_disconnect(self, None, 0)
+
+    def disconnect(self):
+        self._conectado = False
+        self.broker.desuscribir(self)
+        self._entrada.put(_FIN)
+        return 0
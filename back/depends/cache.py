@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheTTL:
+    """Caché acotada (LRU) de valores que vencen a los `ttl_s` segundos.
+
+    Se usa para no repetir consultas caras cuyo resultado puede estar un
+    poco desactualizado, p.ej. el total de un listado paginado. Al superar
+    `capacidad` se descartan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, ttl_s: float, capacidad: int = 1024) -> None:
+        self.ttl_s = ttl_s
+        self.capacidad = max(1, capacidad)
+        self._valores: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """Valor guardado para la clave, o None si no está o ya venció."""
+        with self._lock:
+            entrada = self._valores.get(clave)
+            if entrada is None or time.monotonic() - entrada[1] > self.ttl_s:
+                self._valores.pop(clave, None)
+                self.fallos += 1
+                return None
+            self._valores.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._valores[clave] = (valor, time.monotonic())
+            self._valores.move_to_end(clave)
+            if len(self._valores) > self.capacidad:
+                self._valores.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._valores.clear()
+
+    def __len__(self) -> int:
+        return len(self._valores)
@@ -0,0 +1,150 @@
+"""
+    EXPORTACIÓN COLUMNAR (PARQUET / ARROW IPC)
+
+    Convierte lotes de filas (id, nodo_id, type_id, data, timestamp como
+    texto) en tablas de Arrow y las escribe como Parquet, un row group por
+    lote, o como un stream de Arrow IPC. Se cargan directo con
+    `pandas.read_parquet` / `pyarrow.ipc.open_stream`.
+
+    pyarrow es opcional (`pip install pyarrow`): sin él `disponible()`
+    retorna False y el resto de las funciones lanza RuntimeError.
+"""
+
+import os
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende del entorno
+    pa = pq = None
+
+
+def disponible() -> bool:
+    return pa is not None
+
+
+def _requerir() -> None:
+    if pa is None:
+        raise RuntimeError("La exportación a Parquet/Arrow necesita pyarrow (pip install pyarrow)")
+
+
+def esquema():
+    _requerir()
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("nodo_id", pa.int32()),
+            ("type_id", pa.int32()),
+            ("data", pa.float64()),
+            ("timestamp", pa.timestamp("us")),
+        ]
+    )
+
+
+def lote_a_tabla(filas: Sequence[tuple]):
+    """Tabla de Arrow a partir de tuplas (id, nodo_id, type_id, data, timestamp)."""
+    _requerir()
+    destino = esquema()
+    if not filas:
+        return destino.empty_table()
+    columnas = list(zip(*filas))
+    return pa.Table.from_arrays(
+        [
+            pa.array(columnas[0], pa.int64()),
+            pa.array(columnas[1], pa.int32()),
+            pa.array(columnas[2], pa.int32()),
+            pa.array(columnas[3], pa.float64()),
+            # El texto que devuelve la base ("AAAA-MM-DD HH:MM:SS[.ffffff]")
+            pa.array(columnas[4], pa.string()).cast(pa.timestamp("us")),
+        ],
+        schema=destino,
+    )
+
+
+class _Trozos:
+    """Archivo de solo escritura que acumula lo escrito hasta que se retira."""
+
+    def __init__(self) -> None:
+        self._partes: List[bytes] = []
+        self._posicion = 0
+        self.closed = False
+
+    def write(self, datos) -> int:
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def trozos_parquet(lotes: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+    """Bytes de un archivo Parquet, entregados a medida que se escribe cada
+    row group (uno por lote); el último trozo trae el pie del archivo."""
+    _requerir()
+    sink = _Trozos()
+    escritor = pq.ParquetWriter(sink, esquema(), compression="zstd")
+    try:
+        for filas in lotes:
+            escritor.write_table(lote_a_tabla(filas))
+            trozo = sink.retirar()
+            if trozo:
+                yield trozo
+    finally:
+        escritor.close()
+    yield sink.retirar()
+
+
+def trozos_arrow(lotes: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+    """Bytes de un stream de Arrow IPC, un record batch por lote."""
+    _requerir()
+    sink = _Trozos()
+    with pa.ipc.new_stream(sink, esquema()) as escritor:
+        for filas in lotes:
+            escritor.write_table(lote_a_tabla(filas))
+            yield sink.retirar()
+    yield sink.retirar()
+
+
+def escribir_por_particion(lotes: Iterable[Sequence[tuple]], ruta_de: Callable[[tuple], str]) -> Dict[str, int]:
+    """
+    Escribe cada fila en el archivo Parquet `ruta_de(fila)`, creando los
+    directorios que falten. Las filas de un mismo archivo tienen que venir
+    seguidas (p.ej. ordenadas por nodo y fecha): cada archivo se abre una
+    sola vez y se cierra al pasar al siguiente. Cada lote, o cada tramo de
+    un lote que cae en un archivo, es un row group.
+    Retorna la cantidad de filas escritas en cada archivo.
+    """
+    _requerir()
+    escritas: Dict[str, int] = {}
+    ruta_actual, escritor = None, None
+    try:
+        for filas in lotes:
+            for ruta, tramo in groupby(filas, key=ruta_de):
+                tramo = list(tramo)
+                if ruta != ruta_actual:
+                    if escritor is not None:
+                        escritor.close()
+                    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+                    escritor = pq.ParquetWriter(ruta, esquema(), compression="zstd")
+                    ruta_actual = ruta
+                escritor.write_table(lote_a_tabla(tramo))
+                escritas[ruta] = escritas.get(ruta, 0) + len(tramo)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return escritas
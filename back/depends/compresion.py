@@ -0,0 +1,161 @@
+"""
+    COMPRESIÓN DE RESPUESTAS (gzip / brotli)
+
+    Middleware ASGI que comprime las respuestas según el Accept-Encoding del
+    cliente: brotli si lo acepta y está instalado (`pip install brotli`), si
+    no gzip. No se comprimen las respuestas de menos de `minimo_bytes`, las
+    que ya traen Content-Encoding ni los formatos que ya vienen comprimidos
+    (Parquet, imágenes, zip...).
+
+    Las respuestas por partes (StreamingResponse, p.ej. /paquetes/export) se
+    comprimen trozo a trozo: cada trozo sale comprimido apenas llega, sin
+    juntar la respuesta entera en memoria.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# Formatos ya comprimidos: recomprimirlos gasta CPU sin ahorrar bytes
+TIPOS_COMPRIMIDOS = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/vnd.apache.parquet",
+)
+
+
+class CompresorGzip:
+    codificacion = "gzip"
+
+    def __init__(self, nivel: int) -> None:
+        # wbits=31: formato gzip (encabezado y CRC), no zlib crudo
+        self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos: bytes, final: bool) -> bytes:
+        """Comprime `datos` y vacía el compresor: con Z_SYNC_FLUSH el cliente
+        puede descomprimir todo lo recibido hasta ahora; `final` cierra el flujo."""
+        return self._zlib.compress(datos) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompresorBrotli:
+    codificacion = "br"
+
+    def __init__(self, calidad: int) -> None:
+        self._brotli = brotli.Compressor(quality=calidad)
+
+    def comprimir(self, datos: bytes, final: bool) -> bytes:
+        salida = self._brotli.process(datos)
+        return salida + (self._brotli.finish() if final else self._brotli.flush())
+
+
+def elegir_codificacion(accept_encoding: str, con_brotli: bool = brotli is not None) -> Optional[str]:
+    """"br", "gzip" o None según lo que acepta el cliente (respeta q=0)."""
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.partition(";")
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip()] = calidad
+    comodin = aceptadas.get("*", 0.0)
+    for codificacion in ("br", "gzip") if con_brotli else ("gzip",):
+        if aceptadas.get(codificacion, comodin) > 0:
+            return codificacion
+    return None
+
+
+def es_comprimible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    tipo = headers.get("content-type", "").lower()
+    return not tipo.startswith(TIPOS_COMPRIMIDOS)
+
+
+class CompresionMiddleware:
+    def __init__(self, app: ASGIApp, minimo_bytes: int = 1024, nivel_gzip: int = 6, calidad_brotli: int = 4) -> None:
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+        respuesta = _RespuestaComprimida(self, codificacion, send)
+        await self.app(scope, receive, respuesta.enviar)
+
+    def compresor(self, codificacion: str):
+        if codificacion == "br":
+            return CompresorBrotli(self.calidad_brotli)
+        return CompresorGzip(self.nivel_gzip)
+
+
+class _RespuestaComprimida:
+    """Estado de una respuesta: el encabezado se retiene hasta ver el
+    primer trozo del cuerpo, que decide si se comprime o no."""
+
+    def __init__(self, middleware: CompresionMiddleware, codificacion: str, send: Send) -> None:
+        self.middleware = middleware
+        self.codificacion = codificacion
+        self.send = send
+        self.inicio: Optional[Message] = None
+        self.compresor = None
+        self.decidido = False
+
+    async def enviar(self, mensaje: Message) -> None:
+        if mensaje["type"] == "http.response.start":
+            self.inicio = mensaje
+            return
+        if mensaje["type"] != "http.response.body":
+            await self.send(mensaje)
+            return
+
+        cuerpo = mensaje.get("body", b"")
+        hay_mas = mensaje.get("more_body", False)
+        if not self.decidido:
+            self.decidido = True
+            headers = MutableHeaders(raw=self.inicio["headers"])
+            chica = not hay_mas and len(cuerpo) < self.middleware.minimo_bytes
+            if self.inicio["status"] not in (204, 304) and not chica and es_comprimible(headers):
+                self.compresor = self.middleware.compresor(self.codificacion)
+                headers["Content-Encoding"] = self.codificacion
+                headers.add_vary_header("Accept-Encoding")
+                # Por partes no se conoce el largo final; de una vez se recalcula abajo
+                del headers["Content-Length"]
+            if self.compresor is not None and not hay_mas:
+                cuerpo = self.compresor.comprimir(cuerpo, final=True)
+                headers["Content-Length"] = str(len(cuerpo))
+                await self.send(self.inicio)
+                await self.send({"type": "http.response.body", "body": cuerpo})
+                return
+            await self.send(self.inicio)
+
+        if self.compresor is not None:
+            mensaje = {
+                "type": "http.response.body",
+                "body": self.compresor.comprimir(cuerpo, final=not hay_mas),
+                "more_body": hay_mas,
+            }
+        await self.send(mensaje)
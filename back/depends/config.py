@@ -5,14 +5,133 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-Config = namedtuple("Config", ["topic", "host", "port", "keepalive"])
+Config = namedtuple("Config", ["topic", "host", "port", "keepalive", "share_group"])
 config = Config(
     topic=os.getenv("MQTT_TOPIC"),
     host=os.getenv("MQTT_HOST"),
     port=int(os.getenv("MQTT_PORT")),
     keepalive=int(os.getenv("MQTT_KEEPALIVE")),
+    # Grupo de suscripción compartida MQTT v5 ($share/<grupo>/<topic>); vacío = suscripción normal
+    share_group=os.getenv("MQTT_SHARE_GROUP") or None,
 )
 
+# Parámetros del pipeline de ingesta
+Ingesta = namedtuple(
+    "Ingesta",
+    [
+        "lote_max",
+        "lote_intervalo_ms",
+        "registro_ttl_s",
+        "cola_capacidad",
+        "trabajadores_validacion",
+        "trabajadores_alertas",
+        "trabajadores_persistencia",
+        "reporte_s",
+        "en_api",
+        "particiones",
+        "particion",
+        "nodos_reserva",
+        "dedup_capacidad",
+        "retraso_max_s",
+        "metricas_puerto",
+        "spool_dir",
+        "spool_segmento_mb",
+        "spool_reintento_s",
+        "max_pendientes",
+    ],
+)
+ingesta = Ingesta(
+    # Cantidad de lecturas que dispara la escritura de un lote
+    lote_max=int(os.getenv("INGESTA_LOTE_MAX", "200")),
+    # Tiempo máximo (ms) que una lectura espera en el buffer antes de escribirse
+    lote_intervalo_ms=int(os.getenv("INGESTA_LOTE_INTERVALO_MS", "500")),
+    # Cada cuántos segundos se recarga el registro de nodos/tipos aunque no haya cambios
+    registro_ttl_s=int(os.getenv("INGESTA_REGISTRO_TTL_S", "60")),
+    # Capacidad de la cola de cada etapa; al llenarse se frena al cliente MQTT
+    cola_capacidad=int(os.getenv("INGESTA_COLA_CAPACIDAD", "1000")),
+    # Hilos trabajadores por etapa. La validación tiene que tener uno solo
+    # para conservar el orden de las lecturas de cada nodo (ver verificar_ingesta)
+    trabajadores_validacion=int(os.getenv("INGESTA_TRABAJADORES_VALIDACION", "1")),
+    trabajadores_alertas=int(os.getenv("INGESTA_TRABAJADORES_ALERTAS", "2")),
+    trabajadores_persistencia=int(os.getenv("INGESTA_TRABAJADORES_PERSISTENCIA", "1")),
+    # Cada cuántos segundos se imprime la profundidad de las colas (0 = nunca)
+    reporte_s=int(os.getenv("INGESTA_REPORTE_S", "0")),
+    # Si la API levanta su propio subscriptor MQTT. Con 0 la ingesta corre
+    # aparte con `python -m back.ingesta`
+    en_api=os.getenv("INGESTA_EN_API", "1").lower() in ("1", "true", "si", "yes"),
+    # Cantidad de procesos de ingesta y cuál es este (0..particiones-1).
+    # Cada proceso se suscribe a los tópicos `<topic>/<nodo_id>` de los nodos
+    # con nodo_id % particiones == particion, así el broker le entrega solo
+    # esos. Tiene que haber un solo proceso por partición
+    particiones=int(os.getenv("INGESTA_PARTICIONES", "1")),
+    particion=int(os.getenv("INGESTA_PARTICION", "0")),
+    # Ids de nodo por encima del mayor registrado a los que ya se suscribe cada
+    # partición, para recibir los nodos que se creen antes de recargar el registro
+    nodos_reserva=int(os.getenv("INGESTA_NODOS_RESERVA", "1000")),
+    # Cantidad de claves (nodo, tipo, time) recientes que se recuerdan para descartar reenvíos
+    dedup_capacidad=int(os.getenv("INGESTA_DEDUP_CAPACIDAD", "100000")),
+    # Segundos que puede esperar una lectura en el buffer antes de considerar
+    # la ingesta trabada (/health/ready responde 503)
+    retraso_max_s=float(os.getenv("INGESTA_RETRASO_MAX_S", "30")),
+    # Puerto HTTP de /metrics y /health/ready del proceso `python -m back.ingesta` (0 = no se sirve)
+    metricas_puerto=int(os.getenv("INGESTA_METRICAS_PUERTO", "0")),
+    # Directorio del respaldo en disco para cuando la base no acepta escrituras
+    # (vacío = back/spool). Cada partición usa su propio subdirectorio
+    spool_dir=os.getenv("INGESTA_SPOOL_DIR")
+    or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "spool"),
+    # Tamaño (MB) a partir del cual se rota el segmento del respaldo
+    spool_segmento_mb=float(os.getenv("INGESTA_SPOOL_SEGMENTO_MB", "16")),
+    # Segundos entre reintentos de reproducir el respaldo mientras la base siga caída
+    spool_reintento_s=float(os.getenv("INGESTA_SPOOL_REINTENTO_S", "5")),
+    # Lecturas en el buffer de escritura a partir de las cuales se mandan al
+    # respaldo en disco (0 = nunca)
+    max_pendientes=int(os.getenv("INGESTA_MAX_PENDIENTES", "10000")),
+)
+
+
+# Horas a sumar al timestamp guardado para obtener la hora local (UTC-3) al
+# agrupar lecturas por hora y día. 0 si el servidor ya corre en hora local,
+# que es como se guardan las lecturas (datetime.fromtimestamp)
+desfase_local_h = float(os.getenv("DESFASE_LOCAL_H", "0"))
+
+# Segundos que se reutiliza el total de un listado paginado (conteo=cache|estimado)
+conteo_ttl_s = float(os.getenv("CONTEO_TTL_S", "60"))
+
+# Máximo de lecturas que devuelve GET /series con resolucion=lectura; por
+# encima hay que pedir un rango más corto o una resolución más gruesa
+series_max_lecturas = int(os.getenv("SERIES_MAX_LECTURAS", "500000"))
+
+# Segundos que el navegador reutiliza los catálogos que casi no cambian
+# (GET /tipos) sin revalidarlos; el resto se revalida con ETag en cada pedido
+catalogo_max_age_s = int(os.getenv("CATALOGO_MAX_AGE_S", "60"))
+
+# Compresión de respuestas (ver depends/compresion.py)
+Compresion = namedtuple("Compresion", ["minimo_bytes", "nivel_gzip", "calidad_brotli"])
+compresion = Compresion(
+    # Las respuestas más chicas salen sin comprimir: el ahorro no paga el CPU
+    minimo_bytes=int(os.getenv("COMPRESION_MINIMO_BYTES", "1024")),
+    # Nivel de gzip (1-9) y calidad de brotli (0-11)
+    nivel_gzip=int(os.getenv("COMPRESION_NIVEL_GZIP", "6")),
+    calidad_brotli=int(os.getenv("COMPRESION_CALIDAD_BROTLI", "4")),
+)
+
+
+def verificar_ingesta(ingesta: Ingesta) -> None:
+    """Lanza ValueError si la configuración no conserva el orden por nodo."""
+    if ingesta.trabajadores_validacion != 1:
+        raise ValueError(
+            "INGESTA_TRABAJADORES_VALIDACION tiene que ser 1: con más hilos los "
+            "mensajes de un nodo se pueden validar fuera de orden"
+        )
+    if not 0 <= ingesta.particion < ingesta.particiones:
+        raise ValueError(
+            f"INGESTA_PARTICION tiene que estar entre 0 y {ingesta.particiones - 1}"
+        )
+
+
+def particion_de(nodo_id: int, particiones: int) -> int:
+    """Partición (proceso de ingesta) a la que pertenece un nodo."""
+    return nodo_id % particiones
 
 
 # Umbrales de alerta y validez
@@ -0,0 +1,167 @@
+import json
+import math
+import struct
+from datetime import datetime
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+try:
+    # orjson parsea bytes directamente y bastante más rápido que json
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+
+    def _loads(payload: bytes):
+        return json.loads(payload.decode("utf-8"))
+
+
+class Lectura(NamedTuple):
+    """Lectura ya decodificada. Tiene los mismos atributos que `PaqueteCreate`
+    pero sin el costo de construir un modelo pydantic por mensaje."""
+
+    nodo_id: int
+    type_id: int
+    data: float
+    timestamp: datetime
+
+
+# -----------------------------
+# Trama binaria
+# -----------------------------
+# Encabezado: "RM", versión (uint8), cantidad de lecturas (uint16)
+# Cada lectura: id (uint32), type (uint16), data (float64), time (uint32, epoch)
+MAGIA = b"RM"
+VERSION_TRAMA = 1
+ENCABEZADO = struct.Struct("<2sBH")
+REGISTRO = struct.Struct("<IHdI")
+
+
+def codificar_trama(lecturas: Iterable[Tuple[int, int, float, int]]) -> bytes:
+    """Arma una trama binaria a partir de tuplas (id, type, data, time)."""
+    lecturas = list(lecturas)
+    partes = [ENCABEZADO.pack(MAGIA, VERSION_TRAMA, len(lecturas))]
+    partes.extend(REGISTRO.pack(*lectura) for lectura in lecturas)
+    return b"".join(partes)
+
+
+class LoteLecturas:
+    """Lecturas de un mensaje en formato columnar (una lista por campo).
+
+    `errores` guarda las lecturas que no se pudieron interpretar, como
+    pares (lectura original, motivo): tipos inválidos, `time` fuera del
+    rango de fechas o `data` que no es un número finito. Una lectura
+    inválida no afecta a las demás del mismo mensaje.
+    """
+
+    __slots__ = ("nodo_ids", "tipos", "datos", "tiempos", "errores")
+
+    def __init__(self) -> None:
+        self.nodo_ids: List[int] = []
+        self.tipos: List[int] = []
+        self.datos: List[float] = []
+        self.tiempos: List[datetime] = []
+        self.errores: List[Tuple[object, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.nodo_ids)
+
+    def agregar(self, nodo_id, type_id, data, time) -> None:
+        """Agrega una lectura convirtiendo los tipos; si falla la registra como error."""
+        try:
+            valores = int(nodo_id), int(type_id), float(data), datetime.fromtimestamp(int(time))
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            self.errores.append(((nodo_id, type_id, data, time), f"formato: {e}"))
+            return
+        if not math.isfinite(valores[2]):
+            self.errores.append(((nodo_id, type_id, data, time), "formato: data no es un número finito"))
+            return
+        self.nodo_ids.append(valores[0])
+        self.tipos.append(valores[1])
+        self.datos.append(valores[2])
+        self.tiempos.append(valores[3])
+
+    def lecturas(self) -> Iterator[Lectura]:
+        return map(Lectura, self.nodo_ids, self.tipos, self.datos, self.tiempos)
+
+
+def _agregar_objeto(lote: LoteLecturas, objeto) -> None:
+    if isinstance(objeto, dict):
+        try:
+            lote.agregar(objeto["id"], objeto["type"], objeto["data"], objeto["time"])
+        except KeyError as e:
+            lote.errores.append((objeto, f"falta el campo {e}"))
+    elif isinstance(objeto, (list, tuple)) and len(objeto) == 4:
+        lote.agregar(*objeto)
+    else:
+        lote.errores.append((objeto, "lectura con formato desconocido"))
+
+
+def _decodificar_json(payload: bytes) -> object:
+    try:
+        return _loads(payload)
+    except ValueError:
+        # Compatibilidad con nodos que envían el dict de Python (comillas simples)
+        if b"'" not in payload:
+            raise
+        return _loads(payload.replace(b"'", b'"'))
+
+
+def agregar_json(lote: LoteLecturas, payload) -> None:
+    """Agrega al lote una lectura en JSON, como objeto `{"id", "type",
+    "data", "time"}` o array `[id, type, data, time]` (p.ej. una línea
+    NDJSON). Lanza ValueError si no es JSON válido."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    _agregar_objeto(lote, _decodificar_json(payload))
+
+
+def _decodificar_binario(payload: bytes, lote: LoteLecturas) -> None:
+    if len(payload) < ENCABEZADO.size:
+        raise ValueError("trama binaria truncada")
+    _, version, cantidad = ENCABEZADO.unpack_from(payload)
+    if version != VERSION_TRAMA:
+        raise ValueError(f"versión de trama desconocida: {version}")
+    if len(payload) != ENCABEZADO.size + cantidad * REGISTRO.size:
+        raise ValueError("tamaño de trama binaria inválido")
+    registros = list(REGISTRO.iter_unpack(memoryview(payload)[ENCABEZADO.size:]))
+    if not registros:
+        return
+    nodo_ids, tipos, datos, tiempos = zip(*registros)
+    if not all(map(math.isfinite, datos)):
+        # Camino lento solo si hay algún NaN/infinito: se registra cada uno como error
+        for registro in registros:
+            lote.agregar(*registro)
+        return
+    # time es uint32: siempre es una fecha válida
+    fromtimestamp = datetime.fromtimestamp
+    lote.nodo_ids.extend(nodo_ids)
+    lote.tipos.extend(tipos)
+    lote.datos.extend(datos)
+    lote.tiempos.extend([fromtimestamp(tiempo) for tiempo in tiempos])
+
+
+def decodificar(payload) -> LoteLecturas:
+    """Decodifica el payload crudo de un mensaje MQTT en un lote columnar.
+
+    Acepta:
+    - un objeto JSON `{"id", "type", "data", "time"}` (formato original),
+    - un array JSON de esos objetos o de arrays `[id, type, data, time]`,
+    - una trama binaria (ver `codificar_trama`).
+
+    Lanza ValueError si el mensaje completo no se puede interpretar.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    lote = LoteLecturas()
+    if payload[:2] == MAGIA:
+        _decodificar_binario(payload, lote)
+        return lote
+
+    contenido = _decodificar_json(payload)
+    if isinstance(contenido, list):
+        for objeto in contenido:
+            _agregar_objeto(lote, objeto)
+    else:
+        _agregar_objeto(lote, contenido)
+    return lote
@@ -0,0 +1,40 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class CacheRecientes:
+    """Conjunto acotado (LRU) de claves vistas recientemente.
+
+    Se usa para descartar las relecturas que el broker reenvía con QoS 1
+    (p.ej. después de una reconexión) antes de mandarlas a alertas y a la
+    base. Solo se registran las lecturas válidas.
+    Al superar `capacidad` se olvidan las claves más viejas; los duplicados
+    que escapen de la caché los frena el índice único de `paquetes`.
+    """
+
+    def __init__(self, capacidad: int) -> None:
+        self.capacidad = max(1, capacidad)
+        self._claves: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.suprimidos = 0
+
+    def ya_visto(self, clave: Hashable) -> bool:
+        """Registra la clave y devuelve True si ya estaba en la caché."""
+        with self._lock:
+            if clave in self._claves:
+                self._claves.move_to_end(clave)
+                self.suprimidos += 1
+                return True
+            self._claves[clave] = None
+            if len(self._claves) > self.capacidad:
+                self._claves.popitem(last=False)
+            return False
+
+    def olvidar(self, clave: Hashable) -> None:
+        """Saca la clave de la caché (p.ej. si su lectura no se pudo guardar)."""
+        with self._lock:
+            self._claves.pop(clave, None)
+
+    def __len__(self) -> int:
+        return len(self._claves)
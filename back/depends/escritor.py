@@ -0,0 +1,298 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.exc import DisconnectionError, OperationalError
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+
+# Errores de conexión, de bloqueo o de pool agotado: el mismo lote puede
+# escribirse más tarde. Cualquier otro error (p.ej. IntegrityError) se
+# repetiría igual en cada reintento. No todo OperationalError es
+# transitorio: ver `es_transitorio`.
+ERRORES_TRANSITORIOS = (OperationalError, DisconnectionError, TimeoutPool)
+
+# Códigos de SQLite (y sus extendidos, p.ej. SQLITE_IOERR_WRITE) que se
+# resuelven solos: base bloqueada u ocupada, disco lleno o no disponible
+SQLITE_TRANSITORIOS = ("SQLITE_BUSY", "SQLITE_LOCKED", "SQLITE_IOERR", "SQLITE_FULL", "SQLITE_CANTOPEN")
+# Clases de SQLSTATE de PostgreSQL: conexión, conflicto de transacción,
+# recursos insuficientes, intervención del operador y error del sistema
+PG_TRANSITORIOS = ("08", "40", "53", "57", "58")
+# Mensajes de SQLite sin código (Python < 3.11) que indican un error de esquema
+SQLITE_PERMANENTES = ("no such table", "no such column", "has no column", "syntax error")
+
+
+def es_transitorio(error: Exception) -> bool:
+    """Indica si vale la pena reintentar más tarde la escritura que falló.
+
+    En SQLite un esquema desactualizado ("no such table") también es un
+    OperationalError: se distingue por el código de error del driver.
+    """
+    if isinstance(error, (DisconnectionError, TimeoutPool)):
+        return True
+    if not isinstance(error, OperationalError):
+        return False
+    if error.connection_invalidated:
+        return True
+    original = error.orig
+    nombre = getattr(original, "sqlite_errorname", None)
+    if nombre is not None:
+        return nombre.startswith(SQLITE_TRANSITORIOS)
+    codigo = getattr(original, "pgcode", None)
+    if codigo is not None:
+        return codigo[:2] in PG_TRANSITORIOS
+    return not any(mensaje in str(original).lower() for mensaje in SQLITE_PERMANENTES)
+
+
+def escribir_partiendo(
+    sesiones: Callable[[], Session],
+    persistir: Callable[[Session, list], int],
+    lote: list,
+    descartar: Callable[[object, Exception], None],
+) -> int:
+    """Escribe `lote` en una transacción y retorna cuántos elementos escribió.
+
+    Si falla por un error que no es transitorio, parte el lote en mitades
+    y escribe cada una por separado hasta aislar los elementos que lo
+    causan, que se pasan a `descartar(elemento, error)`. Los errores
+    transitorios (`es_transitorio`) se propagan: quien llama decide si
+    reintentar.
+    """
+    db = sesiones()
+    try:
+        escritos = persistir(db, lote)
+        db.commit()
+        return len(lote) if escritos is None else escritos
+    except Exception as e:
+        db.rollback()
+        if es_transitorio(e):
+            raise
+        error = e
+    finally:
+        db.close()
+
+    if len(lote) == 1:
+        descartar(lote[0], error)
+        return 0
+    mitad = len(lote) // 2
+    return escribir_partiendo(sesiones, persistir, lote[:mitad], descartar) + escribir_partiendo(
+        sesiones, persistir, lote[mitad:], descartar
+    )
+
+
+class EscritorLotes:
+    """Buffer write-behind entre el pipeline de ingesta y la base de datos.
+
+    Acumula elementos en memoria y los persiste en una única transacción
+    cuando se alcanza `lote_max` elementos o cuando el elemento más antiguo
+    lleva `intervalo_ms` esperando. `persistir` recibe la sesión y el lote,
+    y no debe hacer commit: el escritor se encarga de la transacción.
+    Si `persistir` retorna cuántos elementos escribió, la diferencia con el
+    tamaño del lote se cuenta en `omitidos` (p.ej. duplicados ignorados).
+    `al_escribir(lote, segundos)` se llama después de cada commit.
+
+    Si un lote falla por un error permanente (p.ej. una clave foránea) se
+    parte hasta aislar los elementos que lo causan, que van a
+    `descartar(elemento, error)` (por defecto solo se informan), y el resto
+    se escribe igual.
+
+    Con `respaldo` (un `Spool`) los lotes que no se pueden escribir por un
+    error de conexión o de bloqueo se guardan en disco en lugar de
+    descartarse, igual que los que llegan con `max_pendientes` elementos ya
+    en el buffer (la base no da abasto). Mientras el respaldo tenga datos,
+    los lotes nuevos van detrás de ellos.
+    """
+
+    def __init__(
+        self,
+        persistir: Callable[[Session, list], int],
+        lote_max: int,
+        intervalo_ms: int,
+        nombre: str = "lotes",
+        sesiones: Callable[[], Session] = SessionLocal,
+        al_escribir: Optional[Callable[[list, float], None]] = None,
+        respaldo=None,
+        max_pendientes: int = 0,
+        descartar: Optional[Callable[[object, Exception], None]] = None,
+    ) -> None:
+        self.persistir = persistir
+        self.al_escribir = al_escribir
+        self.descartar = descartar
+        self.respaldo = respaldo
+        self.max_pendientes = max_pendientes
+        self.sesiones = sesiones
+        self.lote_max = max(1, lote_max)
+        self.intervalo = max(0, intervalo_ms) / 1000
+        self.nombre = nombre
+
+        self._pendientes: list = []
+        self._primer_pendiente: Optional[float] = None
+        self._condicion = threading.Condition()
+        # Serializa las escrituras para conservar el orden de llegada
+        self._escritura = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._detenido = False
+
+        # Contadores
+        self.lotes_escritos = 0
+        self.elementos_escritos = 0
+        self.omitidos = 0
+        self.ultimo_lote = 0
+        self.mayor_lote = 0
+        self.ultima_latencia_ms = 0.0
+        self.latencia_total_ms = 0.0
+        self.errores = 0
+        self.desviados = 0
+        self.descartados = 0
+        self.ultima_escritura: Optional[float] = None
+
+    def agregar(self, elemento) -> None:
+        desbordado = None
+        with self._condicion:
+            if self._thread is None and not self._detenido:
+                self._iniciar()
+            if not self._pendientes:
+                self._primer_pendiente = time.monotonic()
+            self._pendientes.append(elemento)
+            if len(self._pendientes) >= self.lote_max:
+                self._condicion.notify()
+            if (
+                self.respaldo is not None
+                and self.max_pendientes
+                and len(self._pendientes) >= self.max_pendientes
+            ):
+                desbordado = self._tomar_lote()
+        if desbordado:
+            # Buffer saturado: al disco, en orden con las escrituras en curso
+            with self._escritura:
+                self._desviar(desbordado)
+
+    def _iniciar(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name=f"escritor-{self.nombre}", daemon=True
+        )
+        self._thread.start()
+
+    def _tomar_lote(self) -> List:
+        lote = self._pendientes
+        self._pendientes = []
+        self._primer_pendiente = None
+        return lote
+
+    def _run(self) -> None:
+        while True:
+            with self._condicion:
+                while not self._detenido:
+                    if len(self._pendientes) >= self.lote_max:
+                        break
+                    if self._pendientes:
+                        restante = self._primer_pendiente + self.intervalo - time.monotonic()
+                        if restante <= 0:
+                            break
+                        self._condicion.wait(restante)
+                    else:
+                        self._condicion.wait()
+                if self._detenido:
+                    return
+                lote = self._tomar_lote()
+            self._escribir(lote)
+
+    def _escribir(self, lote: List) -> None:
+        if not lote:
+            return
+        with self._escritura:
+            if self.respaldo is not None and self.respaldo.desviar(lote):
+                self.desviados += len(lote)
+                return
+            inicio = time.perf_counter()
+            descartados = self.descartados
+            try:
+                escritos = escribir_partiendo(self.sesiones, self.persistir, lote, self._descartar)
+            except ERRORES_TRANSITORIOS as e:
+                self.errores += 1
+                if self.respaldo is None:
+                    print(f"Error al escribir lote de {len(lote)} {self.nombre}: {e}")
+                    return
+                print(f"Error al escribir lote de {len(lote)} {self.nombre}, se guarda en disco: {e}")
+                self._desviar(lote)
+                return
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            descartados = self.descartados - descartados
+            if descartados:
+                self.errores += 1
+
+            self.lotes_escritos += 1
+            self.elementos_escritos += escritos
+            # Los descartados no cuentan como omitidos (duplicados)
+            self.omitidos += len(lote) - escritos - descartados
+            self.ultimo_lote = len(lote)
+            self.mayor_lote = max(self.mayor_lote, len(lote))
+            self.ultima_latencia_ms = latencia_ms
+            self.latencia_total_ms += latencia_ms
+            self.ultima_escritura = time.monotonic()
+            if self.al_escribir is not None:
+                self.al_escribir(lote, latencia_ms / 1000)
+
+    def _descartar(self, elemento, error: Exception) -> None:
+        self.descartados += 1
+        if self.descartar is not None:
+            self.descartar(elemento, error)
+        else:
+            print(f"Error al escribir {elemento} en {self.nombre}, se descarta: {error}")
+
+    def _desviar(self, lote: List) -> None:
+        try:
+            self.respaldo.agregar(lote)
+        except OSError as e:
+            print(f"No se pudo guardar en disco el lote de {len(lote)} {self.nombre}: {e}")
+            return
+        self.desviados += len(lote)
+
+    def flush(self) -> None:
+        """Escribe inmediatamente todo lo pendiente."""
+        with self._condicion:
+            lote = self._tomar_lote()
+        self._escribir(lote)
+
+    def detener(self) -> None:
+        """Detiene el hilo de fondo y escribe lo que quedó en el buffer."""
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def pendientes(self) -> int:
+        return len(self._pendientes)
+
+    def espera_s(self) -> float:
+        """Segundos que lleva esperando el elemento más antiguo del buffer."""
+        primer_pendiente = self._primer_pendiente
+        if primer_pendiente is None:
+            return 0.0
+        return time.monotonic() - primer_pendiente
+
+    def estadisticas(self) -> dict:
+        return {
+            "lotes_escritos": self.lotes_escritos,
+            "elementos_escritos": self.elementos_escritos,
+            "omitidos": self.omitidos,
+            "pendientes": len(self._pendientes),
+            "ultimo_lote": self.ultimo_lote,
+            "mayor_lote": self.mayor_lote,
+            "lote_promedio": (
+                (self.elementos_escritos + self.omitidos) / self.lotes_escritos
+                if self.lotes_escritos
+                else 0
+            ),
+            "ultima_latencia_ms": self.ultima_latencia_ms,
+            "latencia_promedio_ms": (
+                self.latencia_total_ms / self.lotes_escritos if self.lotes_escritos else 0
+            ),
+            "errores": self.errores,
+            "desviados": self.desviados,
+            "descartados": self.descartados,
+        }
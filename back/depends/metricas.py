@@ -0,0 +1,249 @@
+"""
+    MÉTRICAS DE LA INGESTA EN FORMATO DE TEXTO DE PROMETHEUS
+
+    Implementación mínima (contadores, medidores e histogramas con etiquetas)
+    para no sumar una dependencia. Las métricas viven en memoria del proceso:
+    la API y cada proceso de ingesta exponen las suyas.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Cubetas por defecto de los clientes de Prometheus (segundos)
+CUBETAS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Retraso entre el `time` del nodo y la escritura en la base
+CUBETAS_RETRASO = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(nombres: Iterable[str], valores: Iterable) -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatear_valor(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> None:
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas: dict) -> tuple:
+        return tuple(etiquetas.get(nombre, "") for nombre in self.etiquetas)
+
+    def _inicial(self) -> list:
+        # Sin etiquetas la serie existe desde el arranque, con valor 0
+        return [((), 0)] if not self.etiquetas else []
+
+    def muestras(self) -> List[str]:
+        raise NotImplementedError
+
+    def exponer(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas.extend(self.muestras())
+        return "\n".join(lineas)
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> None:
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[tuple, float] = {}
+
+    def inc(self, valor: float = 1, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def total(self) -> float:
+        return sum(self._valores.values())
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items()) or self._inicial()
+        return [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_valor(v)}"
+            for clave, v in valores
+        ]
+
+
+class Medidor(Metrica):
+    """Valor que sube y baja. Con `funcion` se calcula al exponer; la función
+    devuelve un número o un dict {tupla de etiquetas: valor}."""
+
+    tipo = "gauge"
+
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Tuple[str, ...] = (),
+        funcion: Optional[Callable[[], object]] = None,
+    ) -> None:
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[tuple, float] = {}
+        self.funcion = funcion
+
+    def set(self, valor: float, **etiquetas) -> None:
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def muestras(self) -> List[str]:
+        if self.funcion is not None:
+            resultado = self.funcion()
+            valores = resultado.items() if isinstance(resultado, dict) else [((), resultado)]
+        else:
+            with self._lock:
+                valores = list(self._valores.items()) or self._inicial()
+        return [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_valor(v)}"
+            for clave, v in valores
+        ]
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Tuple[str, ...] = (),
+        cubetas: Tuple[float, ...] = CUBETAS_DURACION,
+    ) -> None:
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(sorted(cubetas)) + (float("inf"),)
+        # clave -> [conteos por cubeta (no acumulados), suma, cantidad]
+        self._series: Dict[tuple, list] = {}
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * len(self.cubetas), 0.0, 0]
+            for i, limite in enumerate(self.cubetas):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def medir(self, **etiquetas):
+        """Observa la duración (segundos) del bloque `with`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def cantidad(self, **etiquetas) -> int:
+        serie = self._series.get(self._clave(etiquetas))
+        return serie[2] if serie else 0
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            series = [(clave, (list(s[0]), s[1], s[2])) for clave, s in self._series.items()]
+        lineas = []
+        for clave, (conteos, suma, cantidad) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.cubetas, conteos):
+                acumulado += conteo
+                etiquetas = _formatear_etiquetas(
+                    self.etiquetas + ("le",), clave + (_formatear_valor(limite),)
+                )
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_formatear_valor(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {cantidad}")
+        return lineas
+
+
+class RegistroMetricas:
+    def __init__(self) -> None:
+        self._metricas: Dict[str, Metrica] = {}
+
+    def registrar(self, metrica: Metrica) -> Metrica:
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def exponer(self) -> str:
+        return "\n".join(m.exponer() for m in self._metricas.values()) + "\n"
+
+
+metricas = RegistroMetricas()
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -----------------------------
+# Métricas de la ingesta
+# -----------------------------
+mensajes_recibidos = metricas.registrar(
+    Contador("rma_mqtt_mensajes_recibidos_total", "Mensajes MQTT recibidos")
+)
+mqtt_conectado = metricas.registrar(
+    Medidor("rma_mqtt_conectado", "1 si el subscriptor MQTT está conectado")
+)
+lecturas_recibidas = metricas.registrar(
+    Contador(
+        "rma_ingesta_lecturas_recibidas_total",
+        "Lecturas decodificadas, por nodo y tipo (los no registrados como \"desconocido\")",
+        ("nodo_id", "type_id"),
+    )
+)
+lecturas_aceptadas = metricas.registrar(
+    Contador(
+        "rma_ingesta_lecturas_aceptadas_total",
+        "Lecturas que pasaron la validación, por nodo y tipo",
+        ("nodo_id", "type_id"),
+    )
+)
+lecturas_rechazadas = metricas.registrar(
+    Contador(
+        "rma_ingesta_lecturas_rechazadas_total",
+        "Lecturas enviadas a la cuarentena, por nodo, tipo y motivo",
+        ("nodo_id", "type_id", "motivo"),
+    )
+)
+lecturas_duplicadas = metricas.registrar(
+    Contador("rma_ingesta_lecturas_duplicadas_total", "Reenvíos descartados por la caché")
+)
+duracion_etapa = metricas.registrar(
+    Histograma(
+        "rma_ingesta_etapa_segundos",
+        "Duración de cada etapa de la ingesta (decodificacion, validacion, alertas, persistencia)",
+        ("etapa",),
+    )
+)
+retraso_ingesta = metricas.registrar(
+    Histograma(
+        "rma_ingesta_retraso_segundos",
+        "Tiempo entre el `time` de la lectura y el commit en la base",
+        cubetas=CUBETAS_RETRASO,
+    )
+)
+duracion_push = metricas.registrar(
+    Histograma("rma_push_envio_segundos", "Duración del envío de cada notificación push")
+)
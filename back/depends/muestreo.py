@@ -0,0 +1,77 @@
+"""
+    REDUCCIÓN DE SERIES PARA GRÁFICOS
+
+    Algoritmos que reducen una serie (x, y) a unos pocos puntos conservando
+    su forma visual, sobre arrays de NumPy:
+
+    - `lttb`: Largest-Triangle-Three-Buckets. Divide la serie en cubetas y
+      de cada una elige el punto que forma el triángulo más grande con el
+      elegido en la cubeta anterior y el promedio de la siguiente.
+    - `minmax`: de cada cubeta se queda con el mínimo y el máximo, así que
+      ningún pico (p.ej. de nivel hidrométrico) se pierde.
+
+    Ambos retornan los índices elegidos, en orden, para poder tomar de la
+    serie original cualquier otra columna.
+"""
+
+import numpy as np
+
+
+def _limites(cantidad: int, cubetas: int) -> np.ndarray:
+    """Bordes de `cubetas` cubetas de igual cantidad de puntos sobre [0, cantidad)."""
+    return np.linspace(0, cantidad, cubetas + 1).astype(np.int64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, puntos: int) -> np.ndarray:
+    """Índices de los `puntos` puntos elegidos por LTTB (incluye el primero y el último)."""
+    cantidad = len(x)
+    if puntos >= cantidad:
+        return np.arange(cantidad)
+    if puntos < 3:
+        return np.array([0, cantidad - 1][:puntos], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # El primero y el último van fijos; el resto en puntos - 2 cubetas
+    bordes = _limites(cantidad - 2, puntos - 2) + 1
+    # Promedio de cada cubeta, vectorizado con sumas acumuladas
+    sx = np.concatenate(([0.0], np.cumsum(x)))
+    sy = np.concatenate(([0.0], np.cumsum(y)))
+    largos = bordes[1:] - bordes[:-1]
+    promedios_x = np.append((sx[bordes[1:]] - sx[bordes[:-1]]) / largos, x[-1])
+    promedios_y = np.append((sy[bordes[1:]] - sy[bordes[:-1]]) / largos, y[-1])
+
+    elegidos = np.empty(puntos, dtype=np.int64)
+    elegidos[0] = 0
+    elegidos[-1] = cantidad - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        desde, hasta = bordes[i], bordes[i + 1]
+        ax, ay = x[anterior], y[anterior]
+        cx, cy = promedios_x[i + 1], promedios_y[i + 1]
+        # Doble del área del triángulo (sin valor absoluto ni 1/2: basta el máximo)
+        areas = np.abs((ax - cx) * (y[desde:hasta] - ay) - (ax - x[desde:hasta]) * (cy - ay))
+        anterior = desde + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def minmax(y: np.ndarray, puntos: int) -> np.ndarray:
+    """Índices del mínimo y el máximo de cada una de `puntos // 2` cubetas, en orden."""
+    cantidad = len(y)
+    if puntos >= cantidad:
+        return np.arange(cantidad)
+    y = np.asarray(y, dtype=np.float64)
+    cubetas = max(1, puntos // 2)
+    bordes = _limites(cantidad, cubetas)[:-1]
+    cubeta = np.repeat(np.arange(cubetas), np.diff(np.append(bordes, cantidad)))
+
+    minimos = np.minimum.reduceat(y, bordes)
+    maximos = np.maximum.reduceat(y, bordes)
+    # Primer índice de cada cubeta donde se alcanza el mínimo / el máximo
+    en_minimo = np.flatnonzero(y == minimos[cubeta])
+    en_maximo = np.flatnonzero(y == maximos[cubeta])
+    _, primero_minimo = np.unique(cubeta[en_minimo], return_index=True)
+    _, primero_maximo = np.unique(cubeta[en_maximo], return_index=True)
+    indices = np.concatenate((en_minimo[primero_minimo], en_maximo[primero_maximo]))
+    return np.unique(indices)
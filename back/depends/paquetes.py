@@ -1,45 +1,288 @@
-import json
+import os
 from datetime import datetime
 from typing import Optional
 
-from ..database import get_db
-from ..depends.validaciones import es_valido, nodo_es_valido
-from ..paquete.schemas import PaqueteCreate
-from ..paquete.services import crear_paquete
+from ..database import SessionLocal
+from ..depends.config import ingesta
+from ..depends.decodificador import Lectura, decodificar
+from ..depends.dedup import CacheRecientes
+from ..depends.escritor import EscritorLotes
+from ..depends.metricas import (
+    Medidor,
+    duracion_etapa,
+    lecturas_aceptadas,
+    lecturas_duplicadas,
+    lecturas_rechazadas,
+    lecturas_recibidas,
+    metricas,
+    mqtt_conectado,
+    retraso_ingesta,
+)
+from ..depends.pipeline import Etapa, Pipeline
+from ..depends.registro import registro
+from ..depends.spool import Spool
+from ..depends.validaciones import ERROR_ESCRITURA, FORMATO, motivo_rechazo
+from ..paquete.services import crear_paquetes_lote, crear_rechazados_lote
 from ..alertas.push_notifications import NotificationHandler
 
 
-def guardar_paquete_en_db(paquete: PaqueteCreate):
-    db = next(get_db())
-    nuevo = crear_paquete(db, paquete)
-    print(f"Paquete guardado en DB: {nuevo.id}")
+notifications = NotificationHandler()
 
+retraso_ultimo_lote = metricas.registrar(
+    Medidor(
+        "rma_ingesta_retraso_ultimo_lote_segundos",
+        "Mayor retraso entre el `time` de la lectura y el commit en el último lote",
+    )
+)
 
-def procesar_mensaje(mensaje) -> Optional[PaqueteCreate]:
-    mensaje = mensaje.replace("'", '"')
-    mensaje_json = json.loads(mensaje)
-    try:
-        mensaje_paquete = {
-            "nodo_id": mensaje_json["id"],
-            "type_id": int(mensaje_json["type"]),
-            "data": float(mensaje_json["data"]),
-            "date": datetime.fromtimestamp(mensaje_json["time"]),
+
+def registrar_escritura(lote: list, segundos: float) -> None:
+    """Métricas de cada lote de paquetes confirmado en la base."""
+    duracion_etapa.observar(segundos, etapa="persistencia")
+    ahora = datetime.now()
+    retrasos = [(ahora - paquete.timestamp).total_seconds() for paquete in lote]
+    for retraso in retrasos:
+        retraso_ingesta.observar(retraso)
+    retraso_ultimo_lote.set(max(retrasos))
+
+
+def descartar_paquete(lectura: Lectura, error: Exception) -> None:
+    """Lectura que la base rechazó al escribirla: va a la cuarentena en
+    lugar de trabar el lote (o el spool) en el que venía."""
+    print(f"Error al escribir la lectura {lectura}, se pasa a cuarentena: {error}")
+    # No quedó guardada: un reenvío o una corrección con la misma clave tiene que entrar
+    recientes.olvidar((lectura.nodo_id, lectura.type_id, lectura.timestamp))
+    lecturas_rechazadas.inc(motivo=ERROR_ESCRITURA, **registro.etiquetas(lectura.nodo_id, lectura.type_id))
+    rechazar(ERROR_ESCRITURA, lectura, contenido=str(error))
+
+
+# Respaldo en disco de los paquetes válidos si la base se cae o no da abasto.
+# crear_paquetes_lote ignora duplicados, así que reproducirlo dos veces no repite filas
+spool_paquetes = Spool(
+    os.path.join(ingesta.spool_dir, f"particion-{ingesta.particion}"),
+    crear_paquetes_lote,
+    tamanio_segmento=int(ingesta.spool_segmento_mb * 1024 * 1024),
+    reintento_s=ingesta.spool_reintento_s,
+    nombre="paquetes",
+    descartar=descartar_paquete,
+)
+
+# Buffer write-behind: los paquetes válidos se escriben en lotes
+escritor_paquetes = EscritorLotes(
+    crear_paquetes_lote,
+    lote_max=ingesta.lote_max,
+    intervalo_ms=ingesta.lote_intervalo_ms,
+    nombre="paquetes",
+    al_escribir=registrar_escritura,
+    respaldo=spool_paquetes,
+    max_pendientes=ingesta.max_pendientes,
+    descartar=descartar_paquete,
+)
+
+# Cuarentena: los rechazados van por su propio buffer, sin frenar a los válidos
+escritor_rechazados = EscritorLotes(
+    crear_rechazados_lote,
+    lote_max=ingesta.lote_max,
+    intervalo_ms=ingesta.lote_intervalo_ms,
+    nombre="rechazados",
+)
+
+# Largo máximo del contenido crudo que se guarda de un mensaje mal formado
+LARGO_CONTENIDO = 2000
+
+# Claves (nodo, tipo, timestamp) recientes, para descartar reenvíos QoS 1
+recientes = CacheRecientes(ingesta.dedup_capacidad)
+
+
+# -----------------------------
+# Etapas del pipeline de ingesta
+# -----------------------------
+def rechazar(motivo: str, lectura: Optional[Lectura] = None, contenido=None) -> None:
+    """Manda una lectura (o el contenido crudo de un mensaje) a la cuarentena."""
+    if isinstance(contenido, (bytes, bytearray)):
+        contenido = bytes(contenido[:LARGO_CONTENIDO]).decode("utf-8", "backslashreplace")
+    elif contenido is not None:
+        contenido = repr(contenido)[:LARGO_CONTENIDO]
+    escritor_rechazados.agregar(
+        {
+            "nodo_id": lectura.nodo_id if lectura else None,
+            "type_id": lectura.type_id if lectura else None,
+            "data": lectura.data if lectura else None,
+            "timestamp": lectura.timestamp if lectura else None,
+            "motivo": motivo,
+            "contenido": contenido,
+            "recibido": datetime.now(),
         }
-        paquete = PaqueteCreate(**mensaje_paquete)
-        return paquete
-    except Exception as e:
+    )
+
+
+def validar_mensaje(mensaje: bytes, nodo_topico: Optional[int] = None) -> None:
+    """Etapa 1: decodifica el mensaje (una o varias lecturas) y valida cada
+    lectura; las válidas pasan a alertas y persistencia y las inválidas a
+    la cuarentena (`paquetes_rechazados`). `nodo_topico` es el nodo del
+    tópico por el que llegó (`<topic>/<nodo_id>`), o None.
+
+    Cada mensaje le llega a un solo proceso de ingesta (con particiones, el
+    del nodo del tópico; ver `depends.sub.Subscriptor`), así que se
+    procesan todas sus lecturas."""
+    try:
+        with duracion_etapa.medir(etapa="decodificacion"):
+            lote = decodificar(mensaje)
+    except ValueError as e:
         print(f"Error de validación: {e}")
+        lecturas_rechazadas.inc(motivo=FORMATO)
+        rechazar(FORMATO, contenido=mensaje)
+        return
 
+    for original, motivo in lote.errores:
+        print(f"Error de validación: {motivo} en {original}")
+        lecturas_rechazadas.inc(motivo=FORMATO)
+        rechazar(FORMATO, contenido=original)
+
+    aceptadas = []
+    with duracion_etapa.medir(etapa="validacion"):
+        for lectura in lote.lecturas():
+            etiquetas = registro.etiquetas(lectura.nodo_id, lectura.type_id)
+            lecturas_recibidas.inc(**etiquetas)
+            motivo = motivo_rechazo(lectura)
+            if motivo is not None:
+                # Las rechazadas no se recuerdan: si se reenvían corregidas, entran
+                lecturas_rechazadas.inc(motivo=motivo, **etiquetas)
+                rechazar(motivo, lectura)
+            elif recientes.ya_visto((lectura.nodo_id, lectura.type_id, lectura.timestamp)):
+                lecturas_duplicadas.inc()
+            else:
+                lecturas_aceptadas.inc(**etiquetas)
+                aceptadas.append(lectura)
+
+    # Fuera de la medición: `poner` bloquea si las etapas siguientes están llenas
+    for lectura in aceptadas:
+        etapa_alertas.poner(lectura)
+        etapa_persistencia.poner(lectura)
+
+
+def evaluar_alertas(paquete: Lectura) -> None:
+    """Etapa 2: evalúa umbrales y envía las notificaciones push."""
+    db = SessionLocal()
+    try:
+        with duracion_etapa.medir(etapa="alertas"):
+            notifications.if_alert_notificate(paquete, db=db)
+    finally:
+        db.close()
+
+
+def persistir_paquete(paquete: Lectura) -> None:
+    """Etapa 3: entrega el paquete al escritor por lotes."""
+    escritor_paquetes.agregar(paquete)
+
+
+# Un solo trabajador (ver `verificar_ingesta`): los mensajes se validan en
+# orden de llegada, así que se conserva el orden de las lecturas de cada nodo
+etapa_validacion = Etapa(
+    "validacion",
+    lambda entrada: validar_mensaje(*entrada),
+    trabajadores=ingesta.trabajadores_validacion,
+    capacidad=ingesta.cola_capacidad,
+)
+# Las alertas de un mismo nodo las atiende siempre el mismo trabajador
+etapa_alertas = Etapa(
+    "alertas",
+    evaluar_alertas,
+    trabajadores=ingesta.trabajadores_alertas,
+    capacidad=ingesta.cola_capacidad,
+    clave=lambda paquete: paquete.nodo_id,
+)
+etapa_persistencia = Etapa(
+    "persistencia",
+    persistir_paquete,
+    trabajadores=ingesta.trabajadores_persistencia,
+    capacidad=ingesta.cola_capacidad,
+    clave=lambda paquete: paquete.nodo_id,
+)
+pipeline_ingesta = Pipeline(
+    [etapa_validacion, etapa_alertas, etapa_persistencia], reporte_s=ingesta.reporte_s
+)
+
+
+def profundidades() -> dict:
+    """Elementos encolados en cada etapa y en los buffers de escritura."""
+    colas = pipeline_ingesta.profundidades()
+    colas["escritor_paquetes"] = escritor_paquetes.pendientes()
+    colas["escritor_rechazados"] = escritor_rechazados.pendientes()
+    return colas
+
+
+metricas.registrar(
+    Medidor(
+        "rma_ingesta_spool_bytes",
+        "Bytes del respaldo en disco pendientes de reproducir en la base",
+        funcion=spool_paquetes.bytes_pendientes,
+    )
+)
+
+
+metricas.registrar(
+    Medidor(
+        "rma_ingesta_cola_profundidad",
+        "Elementos encolados por etapa del pipeline y buffer de escritura",
+        ("etapa",),
+        funcion=lambda: {(etapa,): n for etapa, n in profundidades().items()},
+    )
+)
+
+
+def mi_callback(mensaje: bytes, nodo_topico: Optional[int] = None) -> None:
+    """Encola el mensaje crudo recibido por MQTT (y el nodo de su tópico).
+
+    Se ejecuta en el hilo de red del cliente MQTT, por lo que no hace más
+    que encolar: si la etapa de validación está llena, bloquea y frena la
+    lectura de nuevos mensajes (backpressure). El pipeline se levanta una
+    vez con `iniciar_ingesta`, antes de suscribirse.
+    """
+    etapa_validacion.poner((mensaje, nodo_topico))
+
+
+def estadisticas_ingesta() -> dict:
+    return {
+        "colas": profundidades(),
+        "escritor": escritor_paquetes.estadisticas(),
+        "rechazados": escritor_rechazados.estadisticas(),
+        "spool": spool_paquetes.estadisticas(),
+        # Reenvíos frenados por la caché más los que ignoró el índice único
+        "duplicados_suprimidos": recientes.suprimidos + escritor_paquetes.omitidos,
+    }
+
+
+def salud_ingesta() -> dict:
+    """Estado para /health/ready: conexión MQTT y retraso de la ingesta.
+
+    La ingesta se considera trabada si alguna lectura lleva más de
+    `INGESTA_RETRASO_MAX_S` esperando en un buffer sin escribirse.
+    """
+    conectado = bool(mqtt_conectado.valor())
+    estancado_s = max(escritor_paquetes.espera_s(), escritor_rechazados.espera_s())
+    return {
+        "listo": conectado and estancado_s <= ingesta.retraso_max_s,
+        "mqtt_conectado": conectado,
+        "retraso_s": retraso_ultimo_lote.valor(),
+        "espera_buffer_s": estancado_s,
+        "errores_escritura": escritor_paquetes.errores + escritor_rechazados.errores,
+        "spool_bytes": spool_paquetes.bytes_pendientes(),
+        "colas": profundidades(),
+    }
 
-notifications = NotificationHandler()
 
+def iniciar_ingesta() -> None:
+    """Levanta los hilos del pipeline y reproduce lo que haya quedado en el
+    respaldo en disco de una corrida anterior."""
+    pipeline_ingesta.iniciar()
+    spool_paquetes.reanudar()
 
-def mi_callback(mensaje: str) -> None:
-    # Mostrar el mensaje tal como llega y luego el paquete procesado
-    print("Mensaje recibido desde MQTT:", mensaje)
-    paquete = procesar_mensaje(mensaje)
-    print("Paquete procesado:", paquete)
 
-    if paquete is not None and nodo_es_valido(paquete) and es_valido(paquete):
-        notifications.if_alert_notificate(paquete, db=next(get_db()))
-        guardar_paquete_en_db(paquete)
+def detener_ingesta() -> None:
+    """Vacía el pipeline y escribe los paquetes que quedaron en el buffer."""
+    pipeline_ingesta.detener()
+    escritor_paquetes.detener()
+    escritor_rechazados.detener()
+    # Lo que quede en el respaldo se reproduce al volver a arrancar
+    spool_paquetes.detener()
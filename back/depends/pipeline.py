@@ -0,0 +1,121 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Marca que le indica a un trabajador que debe terminar
+_FIN = object()
+
+
+class Etapa:
+    """Etapa del pipeline de ingesta: colas acotadas atendidas por N hilos.
+
+    `poner` bloquea cuando la cola está llena, de modo que una etapa lenta
+    frena a las anteriores (y finalmente al cliente MQTT) en lugar de
+    acumular mensajes sin límite.
+
+    Si se indica `clave`, cada trabajador tiene su propia cola y los
+    elementos con la misma clave (p.ej. el `nodo_id`) van siempre al mismo
+    trabajador, conservando su orden de llegada.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        procesar: Callable[[Any], None],
+        trabajadores: int = 1,
+        capacidad: int = 1000,
+        clave: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.nombre = nombre
+        self.procesar = procesar
+        self.trabajadores = max(1, trabajadores)
+        self.clave = clave
+
+        cantidad_colas = self.trabajadores if clave is not None else 1
+        capacidad_cola = max(1, capacidad // cantidad_colas)
+        self.colas: List[queue.Queue] = [
+            queue.Queue(maxsize=capacidad_cola) for _ in range(cantidad_colas)
+        ]
+        self.hilos: List[threading.Thread] = []
+        self.procesados = 0
+        self.errores = 0
+        self._lock = threading.Lock()
+
+    def iniciar(self) -> None:
+        if self.hilos:
+            return
+        for i in range(self.trabajadores):
+            cola = self.colas[i % len(self.colas)]
+            hilo = threading.Thread(
+                target=self._run, args=(cola,), name=f"{self.nombre}-{i}", daemon=True
+            )
+            hilo.start()
+            self.hilos.append(hilo)
+
+    def poner(self, elemento) -> None:
+        if self.clave is None:
+            cola = self.colas[0]
+        else:
+            cola = self.colas[hash(self.clave(elemento)) % len(self.colas)]
+        cola.put(elemento)
+
+    def _run(self, cola: queue.Queue) -> None:
+        while True:
+            elemento = cola.get()
+            try:
+                if elemento is _FIN:
+                    return
+                self.procesar(elemento)
+                with self._lock:
+                    self.procesados += 1
+            except Exception as e:
+                with self._lock:
+                    self.errores += 1
+                print(f"Error en la etapa '{self.nombre}': {e}")
+            finally:
+                cola.task_done()
+
+    def profundidad(self) -> int:
+        return sum(cola.qsize() for cola in self.colas)
+
+    def detener(self) -> None:
+        """Procesa lo que quedó encolado y termina los trabajadores."""
+        if not self.hilos:
+            return
+        for i in range(self.trabajadores):
+            self.colas[i % len(self.colas)].put(_FIN)
+        for hilo in self.hilos:
+            hilo.join()
+        self.hilos = []
+
+
+class Pipeline:
+    """Conjunto de etapas que se inician y se detienen en orden."""
+
+    def __init__(self, etapas: List[Etapa], reporte_s: int = 0) -> None:
+        self.etapas = etapas
+        self.reporte_s = reporte_s
+        self._reporte: Optional[threading.Thread] = None
+        self._detenido = threading.Event()
+
+    def iniciar(self) -> None:
+        for etapa in self.etapas:
+            etapa.iniciar()
+        if self.reporte_s > 0 and self._reporte is None:
+            self._reporte = threading.Thread(
+                target=self._reportar, name="pipeline-reporte", daemon=True
+            )
+            self._reporte.start()
+
+    def _reportar(self) -> None:
+        while not self._detenido.wait(self.reporte_s):
+            print(f"Colas del pipeline de ingesta: {self.profundidades()}")
+
+    def detener(self) -> None:
+        self._detenido.set()
+        # Primero las etapas de entrada, para que las siguientes reciban todo
+        for etapa in self.etapas:
+            etapa.detener()
+
+    def profundidades(self) -> Dict[str, int]:
+        return {etapa.nombre: etapa.profundidad() for etapa in self.etapas}
@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..nodos.models import Nodo, nodo_tipo
+from ..paquete.models import Tipo
+from .config import get_config_alertas, ingesta
+
+
+# Etiqueta de métricas para nodos y tipos que no están en el catálogo
+DESCONOCIDO = "desconocido"
+
+
+def rangos_de_config(config: Optional[dict]) -> Dict[int, Tuple[float, float]]:
+    """Rangos válidos [mín, máx] por código `data_type`, según `umbral` de config.json."""
+    if not config:
+        return {}
+    codigos = config.get("type", {})
+    rangos = {}
+    for nombre, rango in config.get("umbral", {}).items():
+        if nombre in codigos and len(rango) == 2:
+            rangos[int(codigos[nombre])] = (float(rango[0]), float(rango[1]))
+    return rangos
+
+
+class RegistroNodos:
+    """Catálogo en memoria de nodos y tipos usado para validar la ingesta.
+
+    Mantiene los ids de nodos activos/inactivos, los códigos `Tipo.data_type`
+    válidos, los códigos habilitados para cada nodo (tabla `nodo_tipo`) y
+    los rangos de valores válidos de config.json.
+    Las consultas son búsquedas en sets, sin ir a la base de datos.
+    Se recarga explícitamente con `refrescar` cuando cambian nodos o tipos,
+    y además cada `ttl_s` segundos por si el cambio ocurrió en otro proceso.
+    Si la recarga por vencimiento falla (base caída) se sigue usando el
+    último estado cargado y se reintenta recién dentro de otros `ttl_s`
+    segundos: la validación no depende de que la base esté disponible.
+    """
+
+    def __init__(
+        self,
+        ttl_s: int = ingesta.registro_ttl_s,
+        sesiones: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.sesiones = sesiones
+        self._lock = threading.Lock()
+        # Un solo hilo recarga por vencimiento; los demás siguen con el estado anterior
+        self._lock_recarga = threading.Lock()
+        self._cargado_en: Optional[float] = None
+
+        self.nodos_activos: FrozenSet[int] = frozenset()
+        self.nodos_inactivos: FrozenSet[int] = frozenset()
+        self.tipos_validos: FrozenSet[int] = frozenset()
+        self.tipos_por_nodo: Dict[int, FrozenSet[int]] = {}
+        self.rangos: Dict[int, Tuple[float, float]] = {}
+
+    def refrescar(self, db: Optional[Session] = None) -> None:
+        """Recarga el registro desde la base de datos."""
+        propia = db is None
+        if propia:
+            db = self.sesiones()
+        try:
+            nodos = db.execute(select(Nodo.id, Nodo.is_active)).all()
+            tipos = db.execute(select(Tipo.data_type)).scalars().all()
+            enlaces = db.execute(
+                select(nodo_tipo.c.nodo_id, Tipo.data_type).join(
+                    Tipo, Tipo.id == nodo_tipo.c.tipo_id
+                )
+            ).all()
+        finally:
+            if propia:
+                db.close()
+
+        rangos = rangos_de_config(get_config_alertas())
+
+        tipos_por_nodo: Dict[int, set] = {}
+        for nodo_id, data_type in enlaces:
+            tipos_por_nodo.setdefault(nodo_id, set()).add(data_type)
+
+        # Se reemplazan las referencias completas: los lectores nunca ven un estado a medias
+        with self._lock:
+            self.nodos_activos = frozenset(n for n, activo in nodos if activo)
+            self.nodos_inactivos = frozenset(n for n, activo in nodos if not activo)
+            self.tipos_validos = frozenset(tipos)
+            self.tipos_por_nodo = {n: frozenset(t) for n, t in tipos_por_nodo.items()}
+            self.rangos = rangos
+            self._cargado_en = time.monotonic()
+
+    def _vencido(self) -> bool:
+        cargado_en = self._cargado_en
+        return cargado_en is None or time.monotonic() - cargado_en > self.ttl_s
+
+    def _vigente(self) -> None:
+        if not self._vencido():
+            return
+        with self._lock_recarga:
+            # Otro hilo pudo haberlo recargado mientras se esperaba el lock
+            if not self._vencido():
+                return
+            try:
+                self.refrescar()
+            except SQLAlchemyError as e:
+                if self._cargado_en is None:
+                    # Nunca se cargó: no hay un estado anterior con el que validar
+                    raise
+                print(f"No se pudo recargar el registro de nodos ({e}); se sigue con el anterior")
+                self._cargado_en = time.monotonic()
+
+    def nodo_activo(self, nodo_id: int) -> bool:
+        self._vigente()
+        return nodo_id in self.nodos_activos
+
+    def nodo_existe(self, nodo_id: int) -> bool:
+        self._vigente()
+        return nodo_id in self.nodos_activos or nodo_id in self.nodos_inactivos
+
+    def tipo_valido(self, data_type: int) -> bool:
+        self._vigente()
+        return data_type in self.tipos_validos
+
+    def tipo_habilitado(self, nodo_id: int, data_type: int) -> bool:
+        self._vigente()
+        return data_type in self.tipos_por_nodo.get(nodo_id, ())
+
+    def mayor_nodo(self) -> int:
+        """Mayor id de nodo registrado (activo o no), 0 si no hay ninguno."""
+        self._vigente()
+        return max(self.nodos_activos | self.nodos_inactivos, default=0)
+
+    def etiquetas(self, nodo_id: int, data_type: int) -> Dict[str, object]:
+        """Etiquetas nodo_id/type_id para las métricas de una lectura. Los ids
+        que no están registrados van como "desconocido": vienen del payload
+        sin validar y cada valor distinto sería una serie más para siempre."""
+        self._vigente()
+        nodo_conocido = nodo_id in self.nodos_activos or nodo_id in self.nodos_inactivos
+        return {
+            "nodo_id": nodo_id if nodo_conocido else DESCONOCIDO,
+            "type_id": data_type if data_type in self.tipos_validos else DESCONOCIDO,
+        }
+
+    def valor_en_rango(self, data_type: int, valor: float) -> bool:
+        """True si el valor está dentro del rango del tipo (o el tipo no tiene rango)."""
+        self._vigente()
+        rango = self.rangos.get(data_type)
+        return rango is None or rango[0] <= valor <= rango[1]
+
+
+registro = RegistroNodos()
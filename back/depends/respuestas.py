@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+try:
+    # orjson serializa dicts, listas y datetimes directo a bytes, bastante más rápido que json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _por_defecto(valor: Any) -> str:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no se puede serializar a JSON")
+
+
+class RespuestaJSON(Response):
+    """Respuesta JSON para contenido ya armado con tipos básicos (dicts,
+    listas, números, textos y datetimes).
+
+    Al devolver una `Response` FastAPI no vuelve a validar el contenido
+    contra el `response_model` de la ruta ni lo pasa por `jsonable_encoder`:
+    se serializa una sola vez, con orjson si está instalado. El
+    `response_model` sigue sirviendo para documentar la ruta en OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content, default=_por_defecto, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (uno o varios ETag, o "*")."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(valor.strip().removeprefix("W/") == propio for valor in if_none_match.split(","))
+
+
+def verificar_etag(request: Request, response: Response, etag: str, max_age: int = 0) -> dict:
+    """
+    Agrega ETag y Cache-Control a `response` (la que inyecta FastAPI) y
+    retorna esas cabeceras para las rutas que arman su propia respuesta.
+
+    Si el cliente ya tiene esa versión (If-None-Match) lanza un 304 sin
+    cuerpo, así que se llama antes de correr la consulta. Con `max_age` el
+    navegador reutiliza su copia esos segundos sin preguntar; con 0 la
+    revalida en cada pedido.
+    """
+    cabeceras = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}" if max_age else "private, no-cache",
+    }
+    response.headers.update(cabeceras)
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=cabeceras)
+    return cabeceras
@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from .decodificador import Lectura
+from .escritor import escribir_partiendo
+
+
+def codificar_lectura(lectura) -> str:
+    return json.dumps(
+        [lectura.nodo_id, lectura.type_id, lectura.data, lectura.timestamp.isoformat()]
+    )
+
+
+def decodificar_lectura(linea: str) -> Lectura:
+    nodo_id, type_id, data, timestamp = json.loads(linea)
+    return Lectura(nodo_id, type_id, data, datetime.fromisoformat(timestamp))
+
+
+class Spool:
+    """Respaldo local en disco para cuando la base no acepta escrituras.
+
+    Los lotes se agregan al final del segmento activo (una línea por
+    elemento, con flush y fsync) y el segmento se rota al superar
+    `tamanio_segmento` bytes. Un hilo de fondo reproduce los segmentos
+    cerrados en orden, en lotes de `lote_reproduccion` elementos, y borra
+    cada segmento cuando quedó escrito en la base; si la base sigue caída
+    reintenta cada `reintento_s` segundos. Los elementos que fallan con un
+    error permanente (no de conexión) se aíslan partiendo el lote y van a
+    `descartar(elemento, error)` o, sin `descartar`, al archivo
+    `<nombre>.cuarentena` del directorio: así no frenan para siempre la
+    reproducción del resto.
+
+    Mientras quede algo en el spool, `desviar` manda también ahí los lotes
+    nuevos: así todo se escribe en orden de llegada y se conserva el orden
+    de las lecturas de cada nodo. `persistir` tiene que ignorar duplicados,
+    porque si el proceso se corta a mitad de un segmento se vuelve a
+    reproducir completo.
+    """
+
+    def __init__(
+        self,
+        directorio: str,
+        persistir: Callable[[Session, list], int],
+        tamanio_segmento: int = 16 * 1024 * 1024,
+        lote_reproduccion: int = 5000,
+        reintento_s: float = 5,
+        codificar: Callable[[object], str] = codificar_lectura,
+        decodificar: Callable[[str], object] = decodificar_lectura,
+        sesiones: Callable[[], Session] = SessionLocal,
+        nombre: str = "spool",
+        descartar: Optional[Callable[[object, Exception], None]] = None,
+    ) -> None:
+        self.directorio = directorio
+        self.persistir = persistir
+        self.tamanio_segmento = tamanio_segmento
+        self.lote_reproduccion = max(1, lote_reproduccion)
+        self.reintento_s = reintento_s
+        self.codificar = codificar
+        self.decodificar = decodificar
+        self.sesiones = sesiones
+        self.nombre = nombre
+        self.descartar = descartar
+
+        self._lock = threading.Lock()
+        self._archivo = None
+        self._numero = 0
+        self._thread: Optional[threading.Thread] = None
+        self._detenido = threading.Event()
+        # Bytes en disco sin reproducir, llevados en memoria para que
+        # `desviar` no liste el directorio en cada lote
+        self._bytes = sum(os.path.getsize(ruta) for ruta in self.segmentos())
+
+        # Contadores
+        self.guardados = 0
+        self.reproducidos = 0
+        self.lineas_invalidas = 0
+        self.descartados = 0
+
+    # -----------------------------
+    # Segmentos
+    # -----------------------------
+    def _ruta(self, numero: int) -> str:
+        return os.path.join(self.directorio, f"{self.nombre}-{numero:08d}.log")
+
+    def segmentos(self) -> List[str]:
+        """Segmentos en disco, del más viejo al más nuevo (incluye el activo)."""
+        if not os.path.isdir(self.directorio):
+            return []
+        nombres = sorted(
+            n for n in os.listdir(self.directorio)
+            if n.startswith(f"{self.nombre}-") and n.endswith(".log")
+        )
+        return [os.path.join(self.directorio, n) for n in nombres]
+
+    def _abrir_segmento(self) -> None:
+        os.makedirs(self.directorio, exist_ok=True)
+        existentes = self.segmentos()
+        if existentes:
+            ultimo = os.path.basename(existentes[-1])
+            self._numero = max(self._numero, int(ultimo[len(self.nombre) + 1:-4]))
+        self._numero += 1
+        self._archivo = open(self._ruta(self._numero), "a", encoding="utf-8")
+
+    def _cerrar_segmento(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def pendiente(self) -> bool:
+        """True si queda algo en disco por reproducir."""
+        return self._bytes > 0
+
+    def bytes_pendientes(self) -> int:
+        return self._bytes
+
+    # -----------------------------
+    # Escritura
+    # -----------------------------
+    def agregar(self, lote: list) -> None:
+        """Guarda el lote en disco y arranca la reproducción."""
+        if not lote:
+            return
+        with self._lock:
+            self._escribir(lote)
+        self.reanudar()
+
+    def desviar(self, lote: list) -> bool:
+        """Si el spool tiene datos pendientes, guarda ahí el lote y retorna True."""
+        with self._lock:
+            if not self._tiene_datos():
+                return False
+            self._escribir(lote)
+        self.reanudar()
+        return True
+
+    def _tiene_datos(self) -> bool:
+        return self._bytes > 0
+
+    def _escribir(self, lote: list) -> None:
+        if self._archivo is None:
+            self._abrir_segmento()
+        antes = self._archivo.tell()
+        self._archivo.write("".join(self.codificar(e) + "\n" for e in lote))
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self._bytes += self._archivo.tell() - antes
+        self.guardados += len(lote)
+        if self._archivo.tell() >= self.tamanio_segmento:
+            self._cerrar_segmento()
+
+    # -----------------------------
+    # Reproducción
+    # -----------------------------
+    def reanudar(self) -> None:
+        """Arranca el hilo de reproducción si hay datos y no está corriendo."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if not self._tiene_datos():
+                return
+            self._detenido.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"reproduccion-{self.nombre}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._detenido.is_set():
+            with self._lock:
+                segmentos = self.segmentos()
+                if self._archivo is not None:
+                    activo = self._archivo.name
+                    if self._archivo.tell() == 0:
+                        segmentos = [s for s in segmentos if s != activo]
+                    else:
+                        # Se cierra el segmento activo para poder reproducirlo
+                        self._cerrar_segmento()
+                if not segmentos:
+                    # Vacío: desde ahora los lotes vuelven a ir directo a la base.
+                    # Se suelta el hilo con el lock tomado: un `reanudar` posterior
+                    # no lo ve vivo aunque todavía no haya terminado de salir
+                    self._cerrar_segmento()
+                    self._bytes = 0
+                    self._thread = None
+                    return
+            try:
+                self.reproducir_segmento(segmentos[0])
+            except Exception as e:
+                print(f"No se pudo reproducir el spool ({e}); reintento en {self.reintento_s} s")
+                self._detenido.wait(self.reintento_s)
+
+    def reproducir_segmento(self, ruta: str) -> None:
+        lote = []
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    lote.append(self.decodificar(linea))
+                except (ValueError, TypeError) as e:
+                    # Típicamente la última línea, si el proceso se cortó escribiéndola
+                    self.lineas_invalidas += 1
+                    print(f"Línea inválida en {ruta}: {e}")
+                    continue
+                if len(lote) >= self.lote_reproduccion:
+                    self._persistir(lote)
+                    lote = []
+        self._persistir(lote)
+        with self._lock:
+            self._bytes -= os.path.getsize(ruta)
+            os.remove(ruta)
+
+    def _persistir(self, lote: list) -> None:
+        if not lote:
+            return
+        descartados = self.descartados
+        # Los errores de conexión se propagan y el segmento se reintenta entero
+        escribir_partiendo(self.sesiones, self.persistir, lote, self._descartar)
+        self.reproducidos += len(lote) - (self.descartados - descartados)
+
+    def _descartar(self, elemento, error: Exception) -> None:
+        self.descartados += 1
+        if self.descartar is not None:
+            self.descartar(elemento, error)
+            return
+        print(f"Error al reproducir {elemento} del spool, se pasa a cuarentena: {error}")
+        ruta = os.path.join(self.directorio, f"{self.nombre}.cuarentena")
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            archivo.write(self.codificar(elemento) + "\n")
+
+    def detener(self) -> None:
+        """Detiene la reproducción; lo que quede en disco se reproduce al volver a arrancar."""
+        self._detenido.set()
+        hilo = self._thread
+        if hilo is not None and hilo.is_alive():
+            hilo.join()
+        with self._lock:
+            self._cerrar_segmento()
+
+    def estadisticas(self) -> dict:
+        return {
+            "guardados": self.guardados,
+            "reproducidos": self.reproducidos,
+            "lineas_invalidas": self.lineas_invalidas,
+            "descartados": self.descartados,
+            "segmentos": len(self.segmentos()),
+            "bytes_pendientes": self.bytes_pendientes(),
+        }
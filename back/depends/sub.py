@@ -1,58 +1,181 @@
 import sys
 import threading
 import time
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 
 import paho.mqtt.client as paho
 
-from ..depends.config import config
+from ..depends.config import config, particion_de
+from ..depends.metricas import mensajes_recibidos, mqtt_conectado
 
 
 class Subscriptor:
+    """Subscriptor MQTT de la ingesta.
+
+    `on_message_callback` recibe el payload crudo y el nodo del tópico por
+    el que llegó (`<topic>/<nodo_id>`), o None si llegó por `<topic>`.
+
+    Con una sola partición se suscribe a `<topic>` (mensajes con lecturas de
+    cualquier nodo) y a `<topic>/+` (un tópico por nodo). Con `share_group`
+    usa una suscripción compartida MQTT v5 (`$share/<grupo>/...`): el broker
+    reparte los mensajes entre los procesos del grupo sin mirar el nodo, así
+    que no hay afinidad por nodo ni orden garantizado entre sus lecturas.
+
+    Con varias particiones el reparto lo hace el broker: cada proceso se
+    suscribe solo a los tópicos `<topic>/<nodo_id>` de los nodos de su
+    partición, desde 1 hasta el mayor nodo registrado (`nodo_maximo()`) más
+    `reserva_nodos`, para recibir también los nodos que se creen después.
+    Cada `revision_s` segundos se suscribe a los ids nuevos si el mayor nodo
+    creció. Cada mensaje le llega a un solo proceso, que es siempre el mismo
+    para un nodo, así que se conserva el orden de sus lecturas y ningún
+    proceso recibe ni decodifica el tráfico de los demás. `<topic>` (sin
+    nodo en el tópico) lo atiende solo la partición 0: para repartir la
+    carga, los nodos tienen que publicar en su propio tópico.
+    """
+
+    # Tópicos por paquete SUBSCRIBE al suscribirse a los de cada nodo
+    TOPICOS_POR_PEDIDO = 500
+
     def __init__(
         self,
         client: paho.Client,
-        on_message_callback: Optional[Callable[[str], None]] = None,
+        on_message_callback: Optional[Callable[[bytes, Optional[int]], None]] = None,
+        topic: Optional[str] = None,
+        share_group: Optional[str] = None,
+        particiones: int = 1,
+        particion: int = 0,
+        nodo_maximo: Callable[[], int] = lambda: 0,
+        reserva_nodos: int = 1000,
+        revision_s: float = 60,
     ) -> None:
         self.client = client
+        self.topic = topic or config.topic
+        self.share_group = share_group
+        self.particiones = particiones
+        self.particion = particion
+        self.nodo_maximo = nodo_maximo
+        self.reserva_nodos = reserva_nodos
+        self.revision_s = revision_s
         self.message_counter = 0
+        # Mensajes de nodos de otras particiones, descartados por el tópico
+        # (no debería haber: el broker solo entrega los de esta partición)
+        self.omitidos = 0
         self.on_message_callback = on_message_callback
         self.should_exit = False
         self.thread = None
         self.subscribed = False
+        # Mayor nodo_id cubierto por las suscripciones de esta partición
+        self.suscrito_hasta = 0
+        self._lock_suscripcion = threading.Lock()
+        self._detenido = threading.Event()
+        self._revision: Optional[threading.Thread] = None
 
         self.set_event_handlers()
 
+    @property
+    def particionado(self) -> bool:
+        return self.particiones > 1
+
     def set_event_handlers(self) -> None:
-        def on_subscribe(_, userdata, mid, granted_qos) -> None:
+        def on_subscribe(_, userdata, mid, granted_qos, properties=None) -> None:
             if not self.subscribed:
-                print(f"Suscrito a {config.topic}!")
+                print(f"Suscrito a {self.descripcion_suscripcion()}!")
                 self.subscribed = True
 
         def on_message(_, userdata, msg) -> None:
-            message = msg.payload.decode()
+            nodo_id = self.nodo_del_topico(msg.topic)
+            if nodo_id is not None and not self.es_de_esta_particion(nodo_id):
+                self.omitidos += 1
+                return
+            # Se pasa el payload crudo: la decodificación ocurre en el pipeline
+            message = msg.payload
             self.message_counter += 1
+            mensajes_recibidos.inc()
             if self.on_message_callback:
-                self.on_message_callback(message)
+                self.on_message_callback(message, nodo_id)
             else:
                 print(f"Mensaje recibido: {message}")
 
-        def on_connect(_, obj, flags, reason_code) -> None:
+        def on_connect(_, obj, flags, reason_code, properties=None) -> None:
             if self.client.is_connected():
                 print("Suscriptor conectado!")
-                if not self.subscribed:
-                    self.subscribe(config.topic, 1)
+                mqtt_conectado.set(1)
+                # Al reconectar la sesión es nueva: hay que volver a suscribirse
+                with self._lock_suscripcion:
+                    if self.particionado:
+                        self.suscrito_hasta = self.limite_suscripcion()
+                    topicos = self.topicos_suscripcion()
+                self.suscribir_topicos(topicos)
 
-        def on_disconnect(_, userdata, rc) -> None:
+        def on_disconnect(_, userdata, rc, properties=None) -> None:
+            mqtt_conectado.set(0)
             print(f"Total messages received: {self.message_counter}")
             print("Desconectado!")
-            self.should_exit = True
 
         self.client.on_connect = on_connect
         self.client.on_subscribe = on_subscribe
         self.client.on_message = on_message
         self.client.on_disconnect = on_disconnect
 
+    def limite_suscripcion(self) -> int:
+        return self.nodo_maximo() + self.reserva_nodos
+
+    def topicos_de_nodos(self, desde: int, hasta: int) -> List[str]:
+        """Tópicos `<topic>/<nodo_id>` de los nodos de esta partición en [desde, hasta]."""
+        return [f"{self.topic}/{nodo}" for nodo in range(desde, hasta + 1) if self.es_de_esta_particion(nodo)]
+
+    def topicos_suscripcion(self) -> List[str]:
+        if self.particionado:
+            general = [self.topic] if self.particion == 0 else []
+            return general + self.topicos_de_nodos(1, self.suscrito_hasta)
+        topicos = [self.topic, f"{self.topic}/+"]
+        if self.share_group:
+            return [f"$share/{self.share_group}/{topico}" for topico in topicos]
+        return topicos
+
+    def descripcion_suscripcion(self) -> str:
+        if not self.particionado:
+            return ", ".join(self.topicos_suscripcion())
+        general = f"{self.topic} y " if self.particion == 0 else ""
+        return (
+            f"{general}{self.topic}/<nodo_id> de la partición {self.particion} de"
+            f" {self.particiones} (nodos hasta {self.suscrito_hasta})"
+        )
+
+    def suscribir_topicos(self, topicos: List[str]) -> None:
+        for i in range(0, len(topicos), self.TOPICOS_POR_PEDIDO):
+            self.client.subscribe([(topico, 1) for topico in topicos[i:i + self.TOPICOS_POR_PEDIDO]])
+
+    def ampliar_suscripciones(self) -> None:
+        """Se suscribe a los tópicos de los nodos nuevos de esta partición si
+        el mayor nodo registrado creció."""
+        with self._lock_suscripcion:
+            limite = self.limite_suscripcion()
+            if limite <= self.suscrito_hasta:
+                return
+            nuevos = self.topicos_de_nodos(self.suscrito_hasta + 1, limite)
+            self.suscrito_hasta = limite
+        self.suscribir_topicos(nuevos)
+
+    def _revisar_suscripciones(self) -> None:
+        while not self._detenido.wait(self.revision_s):
+            if not self.client.is_connected():
+                continue
+            try:
+                self.ampliar_suscripciones()
+            except Exception as e:
+                print(f"No se pudieron ampliar las suscripciones: {e}")
+
+    def nodo_del_topico(self, topico: str) -> Optional[int]:
+        """Nodo de un tópico `<topic>/<nodo_id>`; None para `<topic>` u otros."""
+        prefijo, _, nodo = topico.rpartition("/")
+        if prefijo != self.topic or not nodo.isdigit():
+            return None
+        return int(nodo)
+
+    def es_de_esta_particion(self, nodo_id: int) -> bool:
+        return not self.particionado or particion_de(nodo_id, self.particiones) == self.particion
+
     def subscribe(self, topic: str, qos: int) -> None:
         self.client.subscribe(topic=topic, qos=qos)
 
@@ -62,17 +185,24 @@ class Subscriptor:
             print("Presione CTRL+C para salir...")
             self.thread = threading.Thread(target=self.run_loop, daemon=True)
             self.thread.start()
+            if self.particionado:
+                self._revision = threading.Thread(
+                    target=self._revisar_suscripciones, name="revision-suscripciones", daemon=True
+                )
+                self._revision.start()
         except Exception as e:
             print(f"Error al conectar con el broker MQTT: {e}")
             sys.exit(1)
 
     def run_loop(self) -> None:
-        while not self.should_exit:
-            self.client.loop()
+        # loop_forever espera en el socket (sin busy-wait) y reconecta solo
+        # hasta que se llama a disconnect()
+        self.client.loop_forever()
 
     def disconnect(self):
-        self.client.disconnect()
         self.should_exit = True
+        self._detenido.set()
+        self.client.disconnect()
         if self.thread and self.thread.is_alive():
             self.thread.join()
 
@@ -0,0 +1,74 @@
+import asyncio
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from back.depends.compresion import CompresionMiddleware, elegir_codificacion
+
+app = FastAPI()
+app.add_middleware(CompresionMiddleware, minimo_bytes=100)
+LINEA = "1,25,10.5,2024-11-05 12:00:00\n"
+
+
+@app.get("/grande")
+def grande():
+    return PlainTextResponse(LINEA * 100)
+
+
+@app.get("/chica")
+def chica():
+    return PlainTextResponse(LINEA)
+
+
+@app.get("/parquet")
+def parquet():
+    return Response(b"PAR1" * 100, media_type="application/vnd.apache.parquet")
+
+
+cliente = TestClient(app)
+
+
+def test_comprime_segun_tamanio_y_tipo():
+    respuesta = cliente.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert respuesta.headers["vary"] == "Accept-Encoding"
+    assert int(respuesta.headers["content-length"]) < len(LINEA) * 10
+    assert respuesta.text == LINEA * 100
+
+    assert "content-encoding" not in cliente.get("/chica", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in cliente.get("/parquet", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in cliente.get("/grande", headers={"Accept-Encoding": "identity"}).headers
+
+    assert elegir_codificacion("gzip, deflate, br", con_brotli=True) == "br"
+    assert elegir_codificacion("gzip, br;q=0", con_brotli=True) == "gzip"
+    assert elegir_codificacion("br", con_brotli=False) is None
+    assert elegir_codificacion("*", con_brotli=False) == "gzip"
+
+
+def test_comprime_por_partes_sin_juntar_la_respuesta():
+    # Se llama al middleware directo: TestClient junta el cuerpo antes de devolverlo
+    async def app_por_partes(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/csv")]})
+        for i in range(5):
+            await send({"type": "http.response.body", "body": (LINEA * 10).encode(), "more_body": i < 4})
+
+    enviados = []
+
+    async def enviar(mensaje):
+        enviados.append(mensaje)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompresionMiddleware(app_por_partes, minimo_bytes=100)(scope, None, enviar))
+
+    inicio, *cuerpos = enviados
+    headers = dict(inicio["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(cuerpos) == 5
+    # Cada trozo se puede descomprimir apenas llega
+    descompresor = zlib.decompressobj(31)
+    for cuerpo in cuerpos:
+        assert descompresor.decompress(cuerpo["body"]) == (LINEA * 10).encode()
+    assert descompresor.eof
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from back.depends.decodificador import agregar_json, codificar_trama, decodificar
+
+
+def test_objeto_json_original():
+    lote = decodificar(b'{"id": 1, "type": "25", "data": "10.5", "time": 1700000000}')
+    (lectura,) = list(lote.lecturas())
+    assert lectura.nodo_id == 1
+    assert lectura.type_id == 25
+    assert lectura.data == 10.5
+    assert lectura.timestamp == datetime.fromtimestamp(1700000000)
+
+
+def test_comillas_simples():
+    lote = decodificar(b"{'id': 2, 'type': 1, 'data': 3, 'time': 1700000000}")
+    assert list(lote.nodo_ids) == [2]
+
+
+def test_array_json_con_objetos_y_tuplas():
+    payload = json.dumps(
+        [
+            {"id": 1, "type": 25, "data": 1.0, "time": 1700000000},
+            [2, 1, 15.5, 1700000060],
+            {"id": 3, "type": 25},
+            ["x", 1, 2, 3],
+        ]
+    ).encode()
+    lote = decodificar(payload)
+    assert len(lote) == 2
+    assert list(lote.nodo_ids) == [1, 2]
+    assert len(lote.errores) == 2
+
+    # Una lectura por vez, como en las líneas NDJSON
+    agregar_json(lote, '{"id": 4, "type": 25, "data": 2.0, "time": 1700000120}')
+    agregar_json(lote, b"[5, 25, 3.0, 1700000180]")
+    assert list(lote.nodo_ids) == [1, 2, 4, 5]
+    with pytest.raises(ValueError):
+        agregar_json(lote, b"{no es json")
+
+
+def test_trama_binaria():
+    tuplas = [(1, 25, 10.25, 1700000000), (2, 16, 3.3, 1700000060)]
+    lote = decodificar(codificar_trama(tuplas))
+    assert [tuple(lectura) for lectura in lote.lecturas()] == [
+        (nodo_id, tipo, data, datetime.fromtimestamp(tiempo)) for nodo_id, tipo, data, tiempo in tuplas
+    ]
+
+
+def test_lecturas_invalidas_no_descartan_el_mensaje():
+    payload = json.dumps(
+        [
+            [1, 25, 1.0, 1700000000],
+            [2, 25, 1.0, 99999999999999],
+            [3, 25, "nan", 1700000000],
+            [4, 25, "inf", 1700000000],
+            [5, 25, 2.0, 1700000060],
+        ]
+    ).encode()
+    lote = decodificar(payload)
+    assert list(lote.nodo_ids) == [1, 5]
+    assert [original[0] for original, _ in lote.errores] == [2, 3, 4]
+
+    lote = decodificar(codificar_trama([(1, 25, 1.0, 1700000000), (2, 25, float("nan"), 1700000000)]))
+    assert list(lote.nodo_ids) == [1]
+    assert len(lote.errores) == 1
+
+
+def test_trama_binaria_truncada():
+    with pytest.raises(ValueError):
+        decodificar(codificar_trama([(1, 25, 1.0, 1700000000)])[:-1])
+
+
+def test_json_invalido():
+    with pytest.raises(ValueError):
+        decodificar(b"no es json")
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from back.depends import paquetes
+from back.depends.decodificador import Lectura
+from back.depends.dedup import CacheRecientes
+from back.migraciones import crear_indice_unico_paquetes, indices_de
+from back.paquete.models import Paquete
+from back.paquete.services import crear_paquetes_lote
+
+
+def test_cache_recientes_olvida_las_claves_viejas():
+    cache = CacheRecientes(capacidad=2)
+    assert not cache.ya_visto((1, 25, 100))
+    assert cache.ya_visto((1, 25, 100))
+    assert not cache.ya_visto((2, 25, 100))
+    assert not cache.ya_visto((3, 25, 100))
+    # (1, 25, 100) ya salió de la caché
+    assert not cache.ya_visto((1, 25, 100))
+    assert cache.suprimidos == 1
+
+
+def test_crear_paquetes_lote_ignora_duplicados(db):
+    instante = datetime(2024, 10, 1, 12, 0)
+    paquete = Lectura(nodo_id=1, type_id=25, data=20.5, timestamp=instante)
+    assert crear_paquetes_lote(db, [paquete, paquete]) == 1
+    assert crear_paquetes_lote(db, [paquete]) == 0
+    db.commit()
+    assert db.query(Paquete).count() == 1
+
+
+def test_duplicados_previos_solo_se_borran_a_pedido(engine):
+    with engine.begin() as conn:
+        # Base anterior al índice único, con una lectura repetida
+        conn.execute(text("DROP INDEX ix_paquetes_nodo_tipo_timestamp"))
+        conn.execute(
+            text("INSERT INTO paquetes (nodo_id, type_id, data, timestamp) VALUES (1, 25, :data, :timestamp)"),
+            [
+                {"data": 20.5, "timestamp": datetime(2024, 10, 1, 12, 0)},
+                {"data": 20.5, "timestamp": datetime(2024, 10, 1, 12, 0)},
+                {"data": 21.0, "timestamp": datetime(2024, 10, 1, 13, 0)},
+            ],
+        )
+
+    with pytest.raises(RuntimeError):
+        crear_indice_unico_paquetes(engine)
+    assert "ix_paquetes_nodo_tipo_timestamp" not in indices_de(engine, "paquetes")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM paquetes")).scalar() == 3
+
+    crear_indice_unico_paquetes(engine, eliminar_duplicados=True)
+    assert "ix_paquetes_nodo_tipo_timestamp" in indices_de(engine, "paquetes")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM paquetes ORDER BY id")).scalars().all() == [1, 3]
+
+
+def test_solo_se_recuerdan_las_lecturas_validas_y_guardadas(monkeypatch):
+    rechazadas, aceptadas = [], []
+    motivos = iter(["nodo_inexistente", None, None, None])
+    monkeypatch.setattr(paquetes, "recientes", CacheRecientes(10))
+    monkeypatch.setattr(paquetes, "motivo_rechazo", lambda lectura: next(motivos))
+    monkeypatch.setattr(paquetes, "rechazar", lambda motivo, lectura=None, contenido=None: rechazadas.append(lectura))
+    monkeypatch.setattr(paquetes.registro, "etiquetas", lambda nodo_id, type_id: {"nodo_id": 1, "type_id": 25})
+    monkeypatch.setattr(paquetes.etapa_alertas, "poner", lambda lectura: None)
+    monkeypatch.setattr(paquetes.etapa_persistencia, "poner", aceptadas.append)
+    mensaje = b'{"id": 1, "type": 25, "data": 20.5, "time": 1700000000}'
+
+    # Rechazada y después reenviada corregida (mismo nodo, tipo y time): entra
+    paquetes.validar_mensaje(mensaje)
+    paquetes.validar_mensaje(mensaje)
+    assert (len(rechazadas), len(aceptadas)) == (1, 1)
+    # Un reenvío de la aceptada se descarta...
+    paquetes.validar_mensaje(mensaje)
+    assert len(aceptadas) == 1
+    # ... salvo que la base la haya rechazado al escribirla
+    paquetes.descartar_paquete(aceptadas[0], ValueError("clave foránea"))
+    paquetes.validar_mensaje(mensaje)
+    assert len(aceptadas) == 2
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+
+from back.depends.escritor import EscritorLotes
+from back.paquete.models import Paquete
+from back.paquete.schemas import PaqueteCreate
+from back.paquete.services import crear_paquetes_lote
+
+
+def paquete(i: int) -> PaqueteCreate:
+    return PaqueteCreate(
+        nodo_id=1, type_id=25, data=float(i), timestamp=datetime.fromtimestamp(1700000000 + i)
+    )
+
+
+def contar_paquetes(sesiones) -> int:
+    db = sesiones()
+    try:
+        return db.query(Paquete).count()
+    finally:
+        db.close()
+
+
+def test_escribe_por_tamanio_de_lote(sesiones):
+    escritor = EscritorLotes(
+        crear_paquetes_lote, lote_max=5, intervalo_ms=60_000, sesiones=sesiones
+    )
+    for i in range(5):
+        escritor.agregar(paquete(i))
+
+    limite = time.monotonic() + 5
+    while escritor.lotes_escritos == 0 and time.monotonic() < limite:
+        time.sleep(0.01)
+
+    assert contar_paquetes(sesiones) == 5
+    assert escritor.ultimo_lote == 5
+
+    escritor.agregar(paquete(5))
+    escritor.agregar(paquete(6))
+    assert escritor.estadisticas()["pendientes"] == 2
+
+    # Al detenerse escribe lo que quedó en el buffer
+    escritor.detener()
+    assert contar_paquetes(sesiones) == 7
+    assert escritor.elementos_escritos == 7
+
+
+def test_escribe_por_tiempo(sesiones):
+    escritor = EscritorLotes(
+        crear_paquetes_lote, lote_max=1000, intervalo_ms=50, sesiones=sesiones
+    )
+    escritor.agregar(paquete(1))
+
+    limite = time.monotonic() + 5
+    while escritor.lotes_escritos == 0 and time.monotonic() < limite:
+        time.sleep(0.01)
+
+    assert contar_paquetes(sesiones) == 1
+    assert escritor.ultimo_lote == 1
+    escritor.detener()
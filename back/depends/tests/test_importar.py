@@ -0,0 +1,37 @@
+from back.importar import importar
+from back.nodos.models import Nodo
+from back.paquete.models import Paquete, PaqueteRechazado, Tipo
+
+
+def test_importa_csv_y_ndjson(db, sesiones, tmp_path):
+    nivel = Tipo(data_type=25, data_symbol="cm", nombre="Nivel Hidrométrico")
+    nodo = Nodo(identificador="historico", descripcion="", porcentajeBateria=100, is_active=True)
+    nodo.tipos = [nivel]
+    db.add_all([nivel, nodo])
+    db.commit()
+
+    csv = tmp_path / "lecturas.csv"
+    csv.write_text(
+        "id,type,data,time\n"
+        f"{nodo.id},25,10.5,1700000000\n"
+        f"{nodo.id},25,11.5,1700000300\n"
+        "999,25,1,1700000000\n"
+        f"{nodo.id},25,x,1700000600\n"
+        f"{nodo.id},25,nan,1700000600\n"
+        f"{nodo.id},25,12,99999999999999\n"
+    )
+    resultado = importar(str(csv), tamanio_lote=2, cuarentena=True, verbose=False,
+                         sesiones=sesiones)
+    assert (resultado.leidas, resultado.insertadas) == (6, 2)
+    assert resultado.rechazadas == {"nodo_inexistente": 1, "formato": 3}
+
+    ndjson = tmp_path / "lecturas.ndjson"
+    ndjson.write_text(
+        f'{{"id": {nodo.id}, "type": 25, "data": 10.5, "time": 1700000000}}\n'
+        f"[{nodo.id}, 25, 12.5, 1700000900]\n"
+    )
+    resultado = importar(str(ndjson), verbose=False, sesiones=sesiones)
+    assert (resultado.insertadas, resultado.duplicadas) == (1, 1)
+
+    assert db.query(Paquete).count() == 3
+    assert db.query(PaqueteRechazado).count() == 4
@@ -0,0 +1,27 @@
+from back.depends.metricas import Contador, Histograma, Medidor, RegistroMetricas
+
+
+def test_exposicion_en_formato_prometheus():
+    registro = RegistroMetricas()
+    lecturas = registro.registrar(Contador("lecturas_total", "Lecturas", ("nodo_id",)))
+    colas = registro.registrar(
+        Medidor("cola", "Profundidad", ("etapa",), funcion=lambda: {("validacion",): 3})
+    )
+    duracion = registro.registrar(Histograma("duracion_segundos", "Duración", cubetas=(0.1, 1)))
+
+    lecturas.inc(nodo_id=1)
+    lecturas.inc(2, nodo_id=1)
+    duracion.observar(0.05)
+    duracion.observar(0.5)
+    duracion.observar(5)
+
+    texto = registro.exponer()
+    assert "# TYPE lecturas_total counter" in texto
+    assert 'lecturas_total{nodo_id="1"} 3' in texto
+    assert 'cola{etapa="validacion"} 3' in texto
+    assert 'duracion_segundos_bucket{le="0.1"} 1' in texto
+    assert 'duracion_segundos_bucket{le="1"} 2' in texto
+    assert 'duracion_segundos_bucket{le="+Inf"} 3' in texto
+    assert "duracion_segundos_sum 5.55" in texto
+    assert "duracion_segundos_count 3" in texto
+    assert colas.tipo == "gauge"
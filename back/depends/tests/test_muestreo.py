@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from back.depends.decodificador import Lectura
+from back.depends.muestreo import lttb, minmax
+from back.paquete.services import crear_paquetes_lote, serie_reducida
+
+
+def serie_con_pico(cantidad: int = 100_000, pico: int = 54_321):
+    x = np.arange(cantidad, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[pico] = 50.0
+    return x, y
+
+
+def test_lttb_conserva_extremos_y_pico():
+    x, y = serie_con_pico()
+    elegidos = lttb(x, y, 1000)
+    assert len(elegidos) == 1000
+    assert elegidos[0] == 0 and elegidos[-1] == len(x) - 1
+    assert np.all(np.diff(elegidos) > 0)
+    assert 54_321 in elegidos
+
+
+def test_minmax_conserva_minimo_y_maximo_de_cada_cubeta():
+    x, y = serie_con_pico()
+    elegidos = minmax(y, 1000)
+    assert len(elegidos) <= 1000
+    assert np.all(np.diff(elegidos) > 0)
+    assert 54_321 in elegidos
+    assert y[elegidos].min() == y.min()
+
+
+def test_series_cortas_se_devuelven_enteras():
+    x, y = np.arange(5.0), np.arange(5.0)
+    assert lttb(x, y, 10).tolist() == [0, 1, 2, 3, 4]
+    assert minmax(y, 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_serie_reducida_desde_la_base(db):
+    inicio = datetime(2024, 10, 1)
+    crear_paquetes_lote(
+        db, [Lectura(1, 25, float(i % 7), inicio + timedelta(minutes=20 * i)) for i in range(500)]
+    )
+    db.commit()
+
+    serie = serie_reducida(db, 1, 25, 50, start=inicio, end=inicio + timedelta(days=2))
+    assert serie["total"] == 144
+    assert len(serie["puntos"]) == 50
+    assert serie["puntos"][0] == {"timestamp": inicio, "data": 0.0}
+    assert serie["puntos"][-1]["timestamp"] == inicio + timedelta(minutes=20 * 143)
+
+    # Con zona horaria el rango se pasa a hora local antes de comparar
+    con_zona = serie_reducida(
+        db,
+        1,
+        25,
+        50,
+        start=inicio.astimezone(timezone.utc),
+        end=(inicio + timedelta(days=2)).astimezone(timezone.utc),
+    )
+    assert con_zona == serie
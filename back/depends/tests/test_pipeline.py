@@ -0,0 +1,45 @@
+import threading
+
+from back.depends.pipeline import Etapa, Pipeline
+
+
+def test_pipeline_conserva_orden_por_clave():
+    recibidos = {}
+    lock = threading.Lock()
+
+    def guardar(elemento):
+        clave, valor = elemento
+        with lock:
+            recibidos.setdefault(clave, []).append(valor)
+
+    etapa = Etapa("guardar", guardar, trabajadores=4, capacidad=8, clave=lambda e: e[0])
+    pipeline = Pipeline([etapa])
+    pipeline.iniciar()
+    for valor in range(200):
+        etapa.poner((valor % 5, valor))
+    pipeline.detener()
+
+    assert etapa.procesados == 200
+    for clave, valores in recibidos.items():
+        assert valores == sorted(valores)
+        assert len(valores) == 40
+
+
+def test_cola_llena_bloquea_al_productor():
+    liberar = threading.Event()
+    etapa = Etapa("lenta", lambda _: liberar.wait(), trabajadores=1, capacidad=2)
+    etapa.iniciar()
+
+    productor = threading.Thread(target=lambda: [etapa.poner(i) for i in range(5)])
+    productor.start()
+    productor.join(timeout=0.2)
+
+    # Uno en proceso y dos en la cola: el productor queda bloqueado
+    assert productor.is_alive()
+    assert etapa.profundidad() == 2
+
+    liberar.set()
+    productor.join(timeout=5)
+    assert not productor.is_alive()
+    etapa.detener()
+    assert etapa.procesados == 5
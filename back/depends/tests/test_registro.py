@@ -0,0 +1,64 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from back.depends.registro import RegistroNodos
+from back.nodos.models import Nodo
+from back.paquete.models import Tipo
+
+
+def test_registro_refleja_nodos_y_tipos(db, sesiones):
+    temperatura = Tipo(data_type=1, data_symbol="°C", nombre="Temperatura")
+    nivel = Tipo(data_type=25, data_symbol="cm", nombre="Nivel Hidrométrico")
+    activo = Nodo(identificador="activo", descripcion="", porcentajeBateria=100, is_active=True)
+    inactivo = Nodo(identificador="inactivo", descripcion="", porcentajeBateria=100, is_active=False)
+    activo.tipos = [temperatura]
+    db.add_all([temperatura, nivel, activo, inactivo])
+    db.commit()
+
+    registro = RegistroNodos(ttl_s=3600, sesiones=sesiones)
+    registro.refrescar()
+
+    assert registro.nodo_activo(activo.id)
+    assert not registro.nodo_activo(inactivo.id)
+    assert registro.nodo_existe(inactivo.id)
+    assert not registro.nodo_existe(999)
+    assert registro.tipo_valido(25)
+    assert not registro.tipo_valido(2)
+    assert registro.tipo_habilitado(activo.id, 1)
+    assert not registro.tipo_habilitado(activo.id, 25)
+    assert registro.etiquetas(inactivo.id, 1) == {"nodo_id": inactivo.id, "type_id": 1}
+    # Los ids sin registrar no crean series nuevas en las métricas
+    assert registro.etiquetas(999, 2) == {"nodo_id": "desconocido", "type_id": "desconocido"}
+
+    # Los cambios se ven recién al refrescar
+    activo.tipos.append(nivel)
+    db.commit()
+    assert not registro.tipo_habilitado(activo.id, 25)
+    registro.refrescar(db)
+    assert registro.tipo_habilitado(activo.id, 25)
+
+
+def test_registro_sigue_con_el_ultimo_estado_si_la_base_se_cae(db, sesiones):
+    nodo = Nodo(identificador="caida", descripcion="", porcentajeBateria=100, is_active=True)
+    db.add(nodo)
+    db.commit()
+    nodo_id = nodo.id
+
+    base_caida = create_engine("sqlite:////ruta/inexistente/rma.db")
+    actual = {"sesiones": sesiones}
+    registro = RegistroNodos(ttl_s=0, sesiones=lambda: actual["sesiones"]())
+    registro.refrescar()
+
+    # Vencido el TTL, cada consulta intenta recargar contra la base caída
+    actual["sesiones"] = sessionmaker(bind=base_caida)
+    registro._cargado_en -= 1
+    assert registro.nodo_activo(nodo_id)
+    assert registro.nodo_existe(nodo_id)
+
+    # Vuelve la base: la siguiente recarga toma el estado nuevo
+    nuevo = Nodo(identificador="nuevo", descripcion="", porcentajeBateria=100, is_active=True)
+    db.add(nuevo)
+    db.commit()
+    actual["sesiones"] = sesiones
+    registro._cargado_en -= 1
+    assert registro.nodo_activo(nuevo.id)
@@ -0,0 +1,190 @@
+import sqlite3
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from back.depends.decodificador import Lectura
+from back.depends.escritor import EscritorLotes, es_transitorio
+from back.depends.spool import Spool, codificar_lectura, decodificar_lectura
+from back.paquete.models import Paquete
+from back.paquete.services import crear_paquetes_lote
+
+
+def lectura(i: int) -> Lectura:
+    return Lectura(1, 25, float(i), datetime.fromtimestamp(1700000000 + i))
+
+
+def paquetes_guardados(sesiones) -> list:
+    db = sesiones()
+    try:
+        return [p.data for p in db.query(Paquete).order_by(Paquete.id)]
+    finally:
+        db.close()
+
+
+def esperar(condicion, segundos: float = 5) -> None:
+    limite = time.monotonic() + segundos
+    while not condicion() and time.monotonic() < limite:
+        time.sleep(0.01)
+
+
+def test_codificacion_ida_y_vuelta():
+    original = lectura(3)
+    assert decodificar_lectura(codificar_lectura(original)) == original
+
+
+def test_base_caida_va_al_disco_y_se_reproduce_en_orden(sesiones, tmp_path):
+    caida = {"activa": True}
+
+    def persistir(db, lote):
+        if caida["activa"]:
+            raise OperationalError("INSERT", {}, Exception("base caída"))
+        return crear_paquetes_lote(db, lote)
+
+    spool = Spool(
+        str(tmp_path), persistir, tamanio_segmento=100, reintento_s=0.05,
+        sesiones=sesiones,
+    )
+    escritor = EscritorLotes(
+        persistir, lote_max=100, intervalo_ms=60_000, sesiones=sesiones,
+        respaldo=spool,
+    )
+    for i in range(6):
+        escritor.agregar(lectura(i))
+        if i % 3 == 2:
+            escritor.flush()
+
+    assert escritor.errores >= 1
+    assert spool.guardados == 6
+    assert len(spool.segmentos()) > 1  # se rotó por tamaño
+    assert paquetes_guardados(sesiones) == []
+
+    # Mientras quede algo en disco, los lotes nuevos van detrás
+    escritor.agregar(lectura(6))
+    escritor.flush()
+    assert spool.guardados == 7
+
+    caida["activa"] = False
+    esperar(lambda: not spool.pendiente())
+    escritor.detener()
+    spool.detener()
+
+    assert paquetes_guardados(sesiones) == [float(i) for i in range(7)]
+    assert spool.segmentos() == []
+    # El hilo se suelta junto con el vaciado: lo próximo que llegue arranca otro
+    assert spool._thread is None
+
+    # Ya vacío, se vuelve a escribir directo en la base
+    escritor = EscritorLotes(
+        persistir, lote_max=3, intervalo_ms=60_000, sesiones=sesiones,
+        respaldo=spool,
+    )
+    escritor.agregar(lectura(7))
+    escritor.flush()
+    assert escritor.lotes_escritos == 1
+    assert spool.guardados == 7
+
+
+def test_buffer_saturado_va_al_disco(sesiones, tmp_path):
+    spool = Spool(str(tmp_path), crear_paquetes_lote, sesiones=sesiones)
+    spool.detener()  # sin reproducción, para ver lo que quedó en disco
+    spool.reanudar = lambda: None
+    escritor = EscritorLotes(
+        crear_paquetes_lote, lote_max=100, intervalo_ms=60_000, sesiones=sesiones,
+        respaldo=spool, max_pendientes=4,
+    )
+    for i in range(4):
+        escritor.agregar(lectura(100 + i))
+
+    assert escritor.pendientes() == 0
+    assert escritor.desviados == 4
+    assert spool.guardados == 4
+
+
+def test_reanuda_segmentos_de_una_corrida_anterior(sesiones, tmp_path):
+    (tmp_path / "paquetes-00000001.log").write_text(
+        codificar_lectura(lectura(200)) + "\n" + '[1, 25, "incompleta'
+    )
+    spool = Spool(str(tmp_path), crear_paquetes_lote, sesiones=sesiones,
+                  nombre="paquetes")
+    assert spool.pendiente()
+
+    spool.reanudar()
+    esperar(lambda: not spool.pendiente())
+    spool.detener()
+
+    assert paquetes_guardados(sesiones) == [200.0]
+    assert spool.lineas_invalidas == 1
+
+
+def test_errores_permanentes_no_frenan_la_escritura(sesiones, tmp_path):
+    def persistir(db, lote):
+        # Simula una clave foránea violada por una lectura del lote
+        if any(lectura.data in (3.0, 13.0) for lectura in lote):
+            raise IntegrityError("INSERT", {}, Exception("FOREIGN KEY constraint failed"))
+        return crear_paquetes_lote(db, lote)
+
+    descartadas = []
+    spool = Spool(str(tmp_path), persistir, sesiones=sesiones, nombre="paquetes")
+    escritor = EscritorLotes(
+        persistir, lote_max=100, intervalo_ms=60_000, sesiones=sesiones,
+        respaldo=spool, descartar=lambda lectura, error: descartadas.append(lectura.data),
+    )
+    for i in range(8):
+        escritor.agregar(lectura(i))
+    escritor.flush()
+
+    # El lote se parte: se escriben todas menos la que falla, sin pasar por el disco
+    assert descartadas == [3.0]
+    assert paquetes_guardados(sesiones) == [float(i) for i in range(8) if i != 3]
+    assert spool.guardados == 0 and not spool.pendiente()
+    assert escritor.descartados == 1 and escritor.omitidos == 0
+
+    # Una línea del spool que falla siempre va a la cuarentena y el resto se reproduce
+    (tmp_path / "paquetes-00000001.log").write_text(
+        "".join(codificar_lectura(lectura(i)) + "\n" for i in range(10, 15))
+    )
+    spool = Spool(str(tmp_path), persistir, sesiones=sesiones, nombre="paquetes")
+    assert spool.bytes_pendientes() > 0
+    spool.reanudar()
+    esperar(lambda: not spool.pendiente())
+    spool.detener()
+
+    assert paquetes_guardados(sesiones)[-4:] == [10.0, 11.0, 12.0, 14.0]
+    assert spool.segmentos() == []
+    assert spool.bytes_pendientes() == 0
+    cuarentena = (tmp_path / "paquetes.cuarentena").read_text().splitlines()
+    assert [decodificar_lectura(linea) for linea in cuarentena] == [lectura(13)]
+
+
+def test_errores_de_esquema_no_van_al_disco(sesiones, tmp_path):
+    def error_sqlite(nombre: str) -> OperationalError:
+        original = sqlite3.OperationalError("error")
+        original.sqlite_errorname = nombre
+        return OperationalError("INSERT", {}, original)
+
+    assert es_transitorio(error_sqlite("SQLITE_BUSY"))
+    assert es_transitorio(error_sqlite("SQLITE_IOERR_WRITE"))
+    assert not es_transitorio(error_sqlite("SQLITE_ERROR"))
+    assert not es_transitorio(IntegrityError("INSERT", {}, Exception("UNIQUE")))
+
+    def persistir(db, lote):
+        # Un "no such table" real de SQLite, p.ej. una migración sin aplicar
+        if any(lectura.data == 2.0 for lectura in lote):
+            db.execute(text("INSERT INTO tabla_inexistente VALUES (1)"))
+        return crear_paquetes_lote(db, lote)
+
+    descartadas = []
+    spool = Spool(str(tmp_path), persistir, sesiones=sesiones)
+    escritor = EscritorLotes(
+        persistir, lote_max=100, intervalo_ms=60_000, sesiones=sesiones,
+        respaldo=spool, descartar=lambda lectura, error: descartadas.append(lectura.data),
+    )
+    for i in range(4):
+        escritor.agregar(lectura(i))
+    escritor.flush()
+
+    assert descartadas == [2.0]
+    assert spool.guardados == 0 and not spool.pendiente()
@@ -0,0 +1,125 @@
+import json
+import time
+
+import pytest
+
+from back.depends.broker_local import BrokerLocal, ClienteLocal, topico_coincide
+from back.depends.config import ingesta, particion_de, verificar_ingesta
+from back.depends.sub import Subscriptor
+
+
+def esperar(condicion, limite=5.0):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.01)
+
+
+def mensaje(nodo_id: int, i: int) -> str:
+    return json.dumps({"id": nodo_id, "type": 25, "data": i, "time": 1700000000 + i})
+
+
+def test_topico_coincide():
+    assert topico_coincide("rma/#", "rma/nodos/1")
+    assert topico_coincide("rma/+/1", "rma/nodos/1")
+    assert not topico_coincide("rma/+", "rma/nodos/1")
+    assert topico_coincide("rma", "rma")
+
+
+def test_grupo_compartido_reparte_mensajes():
+    broker = BrokerLocal()
+    recibidos = [[], []]
+    subs = [
+        Subscriptor(
+            ClienteLocal(broker),
+            on_message_callback=lambda payload, nodo_id, i=i: recibidos[i].append(payload),
+            topic="rma",
+            share_group="ingesta",
+        )
+        for i in range(2)
+    ]
+    for sub in subs:
+        sub.connect("local", 0, 60)
+    esperar(lambda: all(sub.subscribed for sub in subs))
+
+    assert subs[0].topicos_suscripcion() == ["$share/ingesta/rma", "$share/ingesta/rma/+"]
+
+    publicador = ClienteLocal(broker)
+    for i in range(100):
+        publicador.publish("rma", mensaje(i % 7, i))
+    esperar(lambda: len(recibidos[0]) + len(recibidos[1]) == 100)
+
+    for sub in subs:
+        sub.disconnect()
+    assert len(recibidos[0]) == 50
+    assert len(recibidos[1]) == 50
+
+
+def test_particiones_se_reparten_en_el_broker():
+    broker = BrokerLocal()
+    particiones = 3
+    procesados = [[] for _ in range(particiones)]
+    mayor_nodo = {"valor": 10}
+
+    def consumidor(k):
+        def callback(payload, nodo_topico):
+            for lectura in json.loads(payload):
+                procesados[k].append((lectura["id"], lectura["data"]))
+        return callback
+
+    subs = [
+        Subscriptor(
+            ClienteLocal(broker),
+            on_message_callback=consumidor(k),
+            topic="rma",
+            share_group="ingesta",
+            particiones=particiones,
+            particion=k,
+            nodo_maximo=lambda: mayor_nodo["valor"],
+            reserva_nodos=2,
+        )
+        for k in range(particiones)
+    ]
+    for sub in subs:
+        sub.connect("local", 0, 60)
+    esperar(lambda: all(sub.subscribed for sub in subs))
+    # Sin comodines ni $share: cada partición se suscribe solo a sus nodos
+    assert subs[0].topicos_suscripcion()[0] == "rma"
+    assert subs[1].topicos_suscripcion() == [
+        f"rma/{nodo}" for nodo in range(1, 13) if particion_de(nodo, particiones) == 1
+    ]
+
+    publicador = ClienteLocal(broker)
+    for i in range(300):
+        publicador.publish(f"rma/{i % 12 + 1}", json.dumps([json.loads(mensaje(i % 12 + 1, i))]))
+    # Lo publicado en el tópico general lo atiende solo la partición 0
+    publicador.publish("rma", json.dumps([json.loads(mensaje(nodo, 300 + nodo)) for nodo in range(1, 11)]))
+    esperar(lambda: sum(sub.message_counter for sub in subs) == 301)
+
+    # Un nodo nuevo queda fuera de la reserva hasta que se amplían las suscripciones
+    mayor_nodo["valor"] = 20
+    for sub in subs:
+        sub.ampliar_suscripciones()
+    publicador.publish("rma/22", json.dumps([json.loads(mensaje(22, 400))]))
+    esperar(lambda: sum(sub.message_counter for sub in subs) == 302)
+    for sub in subs:
+        sub.disconnect()
+
+    assert sum(sub.omitidos for sub in subs) == 0
+    assert sum(len(p) for p in procesados) == 311
+    for k, lecturas in enumerate(procesados):
+        del_topico_general = sorted((n, d) for n, d in lecturas if 300 <= d < 400)
+        assert del_topico_general == ([(nodo, 300 + nodo) for nodo in range(1, 11)] if k == 0 else [])
+        nodos = {nodo for nodo, dato in lecturas if not 300 <= dato < 400}
+        assert all(particion_de(nodo, particiones) == k for nodo in nodos)
+        for nodo in nodos:
+            datos = [dato for n, dato in lecturas if n == nodo]
+            assert datos == sorted(datos)
+    assert (22, 400) in procesados[particion_de(22, particiones)]
+
+
+def test_configuracion_que_no_conserva_el_orden():
+    verificar_ingesta(ingesta._replace(trabajadores_validacion=1, particiones=2, particion=1))
+    with pytest.raises(ValueError):
+        verificar_ingesta(ingesta._replace(trabajadores_validacion=4))
+    with pytest.raises(ValueError):
+        verificar_ingesta(ingesta._replace(particiones=2, particion=2))
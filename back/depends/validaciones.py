@@ -1,3 +1,5 @@
+from typing import Optional
+
 from back.paquete.schemas import PaqueteBase, PaqueteRechazadoOut
 from back.paquete.models import Tipo
 from back.paquete.services import crear_paquete_rechazado
@@ -5,6 +7,7 @@ from ..database import get_db
 from back.alertas.push_notifications import NotificationHandler
 from back.nodos.models import Nodo
 from ..nodos.services import listar_nodos
+from .registro import registro
 
 notifications = NotificationHandler()
 
@@ -27,17 +30,16 @@ def validar_o_archivar(paquete: PaqueteBase) -> bool:
 
 
 def es_valido(paquete: PaqueteBase) -> bool:
-    """Valida únicamente que el `type_id` del paquete exista en la base de datos.
+    """Valida únicamente que el `type_id` del paquete exista en la tabla `tipos`.
 
     Esta función evita hardcodear tipos y no verifica umbrales. De esta forma,
     si se agregan nuevos tipos en el futuro, serán aceptados automáticamente con
-    solo estar presentes en la tabla `tipos`.
+    solo estar presentes en la tabla `tipos`. La consulta se resuelve contra el
+    registro en memoria (`depends.registro`), sin ir a la base de datos.
 
     Retorna True si el tipo existe; de lo contrario False.
     """
-    db = next(get_db())
-    tipo = db.query(Tipo).filter(Tipo.data_type == paquete.type_id).first()
-    if tipo is None:
+    if not registro.tipo_valido(paquete.type_id):
         print(f"Tipo de dato {paquete.type_id} inválido (no existe en 'tipos').")
         return False
     return True
@@ -53,26 +55,71 @@ def nodo_es_valido(paquete: PaqueteBase) -> bool:
     - Imprime mensajes claros según el error
     - Mantiene la misma filosofía que `es_valido`
 
+    Se resuelve contra el registro en memoria (`depends.registro`).
+
     Retorna:
         True  -> el nodo existe y está activo
         False -> el nodo no existe o está inactivo
     """
-    db = next(get_db())
-
     nodo_id = paquete.nodo_id
 
     if nodo_id is None:
         print("Nodo inválido: no se especificó nodo_id.")
         return False
 
-    nodo = db.query(Nodo).filter(Nodo.id == nodo_id).first()
+    if registro.nodo_activo(nodo_id):
+        return True
 
-    if nodo is None:
+    if registro.nodo_existe(nodo_id):
+        print(f"Nodo inválido: el nodo {nodo_id} existe pero está inactivo.")
+    else:
         print(f"Nodo inválido: el nodo {nodo_id} no existe en la base de datos.")
-        return False
+    return False
 
-    if not nodo.is_active:
-        print(f"Nodo inválido: el nodo {nodo_id} existe pero está inactivo.")
-        return False
 
+def tipo_de_nodo_es_valido(paquete: PaqueteBase) -> bool:
+    """
+    Valida que el tipo del paquete esté vinculado al nodo (tabla `nodo_tipo`).
+
+    Retorna:
+        True  -> el nodo tiene habilitado el tipo de dato
+        False -> el tipo no está vinculado al nodo
+    """
+    if not registro.tipo_habilitado(paquete.nodo_id, paquete.type_id):
+        print(
+            f"Tipo de dato {paquete.type_id} no vinculado al nodo {paquete.nodo_id}."
+        )
+        return False
     return True
+
+
+# -----------------------------
+# Motivos de rechazo (cuarentena)
+# -----------------------------
+FORMATO = "formato"
+NODO_INEXISTENTE = "nodo_inexistente"
+NODO_INACTIVO = "nodo_inactivo"
+TIPO_INEXISTENTE = "tipo_inexistente"
+TIPO_NO_VINCULADO = "tipo_no_vinculado"
+FUERA_DE_RANGO = "fuera_de_rango"
+# La base rechazó la lectura al escribirla (p.ej. el nodo se borró mientras tanto)
+ERROR_ESCRITURA = "error_escritura"
+
+
+def motivo_rechazo(paquete: PaqueteBase) -> Optional[str]:
+    """
+    Aplica las mismas validaciones que `nodo_es_valido`, `es_valido` y
+    `tipo_de_nodo_es_valido`, más el rango de `umbral` de config.json,
+    pero sin imprimir: retorna el motivo del rechazo o None si es válido.
+    """
+    if not registro.nodo_activo(paquete.nodo_id):
+        if registro.nodo_existe(paquete.nodo_id):
+            return NODO_INACTIVO
+        return NODO_INEXISTENTE
+    if not registro.tipo_valido(paquete.type_id):
+        return TIPO_INEXISTENTE
+    if not registro.tipo_habilitado(paquete.nodo_id, paquete.type_id):
+        return TIPO_NO_VINCULADO
+    if not registro.valor_en_rango(paquete.type_id, paquete.data):
+        return FUERA_DE_RANGO
+    return None
@@ -0,0 +1,79 @@
+"""
+    VERSIONES PARA LA CACHÉ HTTP (ETag)
+
+    Contadores en la tabla `versiones` que suben en la misma transacción que
+    las escrituras, para saber si algo cambió sin volver a consultar:
+
+    - "catalogo": nodos, tipos y alertas
+    - "lecturas:<nodo_id>": lecturas de un nodo (ingesta, importación,
+      reproceso de rechazados, archivado del nodo)
+    - "base": valor al azar que se fija al crear la base, para que los ETag
+      de una base nueva no coincidan con los de una anterior
+
+    Los endpoints arman el ETag con estos valores (`etag`) y responden 304
+    antes de correr la consulta si el cliente ya tiene esa versión (ver
+    `depends.respuestas.verificar_etag`).
+"""
+
+import random
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, String, func, select
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from ..models import ModeloBase
+
+CATALOGO = "catalogo"
+BASE = "base"
+
+
+class Version(ModeloBase):
+    __tablename__ = "versiones"
+
+    clave: Mapped[str] = mapped_column(String(50), primary_key=True)
+    valor: Mapped[int] = mapped_column(Integer, default=0)
+
+
+def clave_lecturas(nodo_id: int) -> str:
+    return f"lecturas:{nodo_id}"
+
+
+def incrementar(db: Session, claves: Iterable[str]) -> None:
+    """Suma 1 a cada clave (la crea en 1 si no existe). No hace commit."""
+    # Siempre en el mismo orden, para que dos transacciones no se bloqueen entre sí
+    filas = [{"clave": clave, "valor": 1} for clave in sorted(set(claves))]
+    Version.upsert(db, filas, ["clave"], valores=lambda tabla, nuevos: {"valor": tabla.c.valor + 1})
+
+
+def incrementar_catalogo(db: Session) -> None:
+    incrementar(db, [CATALOGO])
+
+
+def incrementar_lecturas(db: Session, nodos: Iterable[int]) -> None:
+    incrementar(db, [clave_lecturas(nodo_id) for nodo_id in nodos])
+
+
+def version_lecturas(db: Session, nodos: Optional[Iterable[int]] = None) -> int:
+    """Versión de las lecturas de `nodos` o, sin `nodos`, de todos: la suma
+    de sus contadores, que sube con cada escritura de cualquiera de ellos."""
+    if nodos is not None:
+        condicion = Version.clave.in_([clave_lecturas(nodo_id) for nodo_id in nodos])
+    else:
+        condicion = Version.clave.like("lecturas:%")
+    return db.execute(select(func.coalesce(func.sum(Version.valor), 0)).where(condicion)).scalar()
+
+
+def version_catalogo(db: Session) -> int:
+    return db.execute(select(Version.valor).where(Version.clave == CATALOGO)).scalar() or 0
+
+
+def etag(db: Session, recurso: str, *versiones) -> str:
+    """ETag débil con el recurso, la base y las versiones de las que depende."""
+    base = db.execute(select(Version.valor).where(Version.clave == BASE)).scalar() or 0
+    partes = "-".join(str(version) for version in (base, *versiones))
+    return f'W/"{recurso}-{partes}"'
+
+
+def fijar_base(db: Session) -> None:
+    """Crea la clave "base" con un valor al azar si todavía no existe."""
+    Version.insert_ignore(db, [{"clave": BASE, "valor": random.randint(1, 2**31 - 1)}])
@@ -0,0 +1,256 @@
+"""
+    IMPORTACIÓN MASIVA DE LECTURAS HISTÓRICAS
+
+    python -m back.importar lecturas.csv
+    python -m back.importar lecturas.ndjson --lote 50000 --cuarentena
+
+    Lee archivos CSV (encabezado con las columnas id,type,data,time) o NDJSON
+    (un objeto {"id", "type", "data", "time"} o un array [id, type, data, time]
+    por línea), igual que los mensajes MQTT. `time` es epoch en segundos.
+
+    Las filas se leen de a lotes, se validan contra el catálogo de nodos y
+    tipos (mismas reglas que la ingesta) y se insertan con un INSERT
+    multi-fila por lote, en una transacción por lote. No evalúa alertas.
+    Las lecturas repetidas se ignoran, así que se puede volver a correr
+    sobre el mismo archivo. Con --cuarentena las filas inválidas se guardan
+    en `paquetes_rechazados`; si no, solo se cuentan. Los agregados por
+    hora y día se actualizan con cada lote.
+"""
+
+import argparse
+import csv
+import io
+import time
+from collections import Counter
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .depends.decodificador import Lectura, LoteLecturas, agregar_json
+from .depends.registro import registro
+from .depends.validaciones import FORMATO, motivo_rechazo
+from .depends.versiones import incrementar_lecturas
+from .paquete.models import Paquete
+from .paquete.services import (
+    actualizar_agregados,
+    actualizar_ultimas_lecturas,
+    crear_rechazados_lote,
+)
+
+LOTE_POR_DEFECTO = 50_000
+
+SQL_INSERT_SQLITE = (
+    "INSERT OR IGNORE INTO paquetes (nodo_id, type_id, data, timestamp) VALUES (?, ?, ?, ?)"
+)
+
+# Nombres de columna aceptados en el CSV para cada campo
+COLUMNAS = {
+    "id": ("id", "nodo_id"),
+    "type": ("type", "type_id"),
+    "data": ("data",),
+    "time": ("time", "timestamp"),
+}
+
+
+def _indices_csv(encabezado: List[str]) -> List[int]:
+    encabezado = [columna.strip().lower() for columna in encabezado]
+    indices = []
+    for campo, nombres in COLUMNAS.items():
+        for nombre in nombres:
+            if nombre in encabezado:
+                indices.append(encabezado.index(nombre))
+                break
+        else:
+            raise ValueError(f"el CSV no tiene la columna '{campo}'")
+    return indices
+
+
+def leer_csv(archivo: io.TextIOBase, tamanio_lote: int) -> Iterator[LoteLecturas]:
+    lector = csv.reader(archivo)
+    i_id, i_type, i_data, i_time = _indices_csv(next(lector))
+    lote = LoteLecturas()
+    for fila in lector:
+        if not fila:
+            continue
+        try:
+            lote.agregar(fila[i_id], fila[i_type], fila[i_data], fila[i_time])
+        except IndexError:
+            lote.errores.append((fila, "faltan columnas"))
+        if len(lote) >= tamanio_lote:
+            yield lote
+            lote = LoteLecturas()
+    yield lote
+
+
+def leer_ndjson(archivo: io.BufferedIOBase, tamanio_lote: int) -> Iterator[LoteLecturas]:
+    lote = LoteLecturas()
+    for linea in archivo:
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            agregar_json(lote, linea)
+        except ValueError as e:
+            lote.errores.append((linea, f"json: {e}"))
+        if len(lote) >= tamanio_lote:
+            yield lote
+            lote = LoteLecturas()
+    yield lote
+
+
+class Importacion:
+    """Acumula los contadores de una importación."""
+
+    def __init__(self) -> None:
+        self.leidas = 0
+        self.insertadas = 0
+        self.duplicadas = 0
+        self.rechazadas: Counter = Counter()
+        self.inicio = time.perf_counter()
+
+    def segundos(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    def filas_por_segundo(self) -> float:
+        return self.leidas / self.segundos() if self.segundos() else 0
+
+    def resumen(self) -> str:
+        return (
+            f"{self.leidas} filas leídas, {self.insertadas} insertadas, "
+            f"{self.duplicadas} duplicadas, {sum(self.rechazadas.values())} rechazadas "
+            f"{dict(self.rechazadas)} en {self.segundos():.1f} s "
+            f"({self.filas_por_segundo():,.0f} filas/s)"
+        )
+
+
+def insertar_paquetes(db: Session, filas: List[tuple]) -> int:
+    """Inserta tuplas (nodo_id, type_id, data, timestamp) ignorando duplicadas
+    y actualiza `ultimas_lecturas` y los agregados. Retorna la cantidad insertada."""
+    if not filas:
+        return 0
+    if db.get_bind().dialect.name == "sqlite":
+        # Directo al executemany del driver: el procesamiento de parámetros de
+        # SQLAlchemy cuesta tanto como el INSERT. El timestamp se guarda con el
+        # mismo formato que usa SQLAlchemy, para que el índice único y los
+        # filtros por fecha funcionen igual.
+        insertadas = db.connection().exec_driver_sql(
+            SQL_INSERT_SQLITE,
+            [
+                (nodo_id, type_id, data, timestamp.isoformat(" ", "microseconds"))
+                for nodo_id, type_id, data, timestamp in filas
+            ],
+        ).rowcount
+    else:
+        columnas = ("nodo_id", "type_id", "data", "timestamp")
+        insertadas = Paquete.insert_ignore(db, [dict(zip(columnas, fila)) for fila in filas])
+    actualizar_ultimas_lecturas(db, filas)
+    actualizar_agregados(db, filas, insertadas)
+    if insertadas:
+        incrementar_lecturas(db, {fila[0] for fila in filas})
+    return insertadas
+
+
+def importar_lote(
+    lote: LoteLecturas,
+    importacion: Importacion,
+    cuarentena: bool,
+    sesiones: Callable[[], Session] = SessionLocal,
+) -> None:
+    """Valida e inserta un lote en una transacción."""
+    # Camino rápido: pares (nodo, tipo) habilitados y rangos, resueltos una vez por lote
+    habilitados = {
+        (nodo_id, tipo)
+        for nodo_id in registro.nodos_activos
+        for tipo in registro.tipos_por_nodo.get(nodo_id, ())
+    }
+    rangos = registro.rangos
+
+    filas = []
+    rechazados = []
+    for nodo_id, type_id, data, tiempo in zip(lote.nodo_ids, lote.tipos, lote.datos, lote.tiempos):
+        rango = rangos.get(type_id)
+        if (nodo_id, type_id) in habilitados and (rango is None or rango[0] <= data <= rango[1]):
+            filas.append((nodo_id, type_id, data, tiempo))
+            continue
+        lectura = Lectura(nodo_id, type_id, data, tiempo)
+        motivo = motivo_rechazo(lectura)
+        importacion.rechazadas[motivo] += 1
+        if cuarentena:
+            rechazados.append(
+                {"nodo_id": nodo_id, "type_id": type_id, "data": data,
+                 "timestamp": lectura.timestamp, "motivo": motivo}
+            )
+    for original, _ in lote.errores:
+        importacion.rechazadas[FORMATO] += 1
+        if cuarentena:
+            rechazados.append({"motivo": FORMATO, "contenido": repr(original)[:2000]})
+
+    db = sesiones()
+    try:
+        insertadas = insertar_paquetes(db, filas)
+        crear_rechazados_lote(db, rechazados)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    importacion.leidas += len(lote) + len(lote.errores)
+    importacion.insertadas += insertadas
+    importacion.duplicadas += len(filas) - insertadas
+
+
+def importar(
+    ruta: str,
+    formato: Optional[str] = None,
+    tamanio_lote: int = LOTE_POR_DEFECTO,
+    cuarentena: bool = False,
+    verbose: bool = True,
+    sesiones: Callable[[], Session] = SessionLocal,
+) -> Importacion:
+    formato = formato or ("csv" if ruta.lower().endswith(".csv") else "ndjson")
+    db = sesiones()
+    try:
+        registro.refrescar(db)
+    finally:
+        db.close()
+    importacion = Importacion()
+
+    if formato == "csv":
+        archivo = open(ruta, "r", newline="", encoding="utf-8")
+        lotes = leer_csv(archivo, tamanio_lote)
+    else:
+        archivo = open(ruta, "rb")
+        lotes = leer_ndjson(archivo, tamanio_lote)
+
+    with archivo:
+        for lote in lotes:
+            if not len(lote) and not lote.errores:
+                continue
+            importar_lote(lote, importacion, cuarentena, sesiones)
+            if verbose:
+                print(f"... {importacion.leidas} filas ({importacion.filas_por_segundo():,.0f} filas/s)")
+
+    if verbose:
+        print(f"Importación terminada: {importacion.resumen()}")
+    return importacion
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa lecturas históricas desde CSV o NDJSON.")
+    parser.add_argument("archivo", help="Archivo .csv o .ndjson")
+    parser.add_argument("--formato", choices=["csv", "ndjson"], default=None,
+                        help="Formato del archivo (por defecto según la extensión)")
+    parser.add_argument("--lote", type=int, default=LOTE_POR_DEFECTO,
+                        help="Filas por transacción")
+    parser.add_argument("--cuarentena", action="store_true",
+                        help="Guardar las filas inválidas en paquetes_rechazados")
+    args = parser.parse_args()
+
+    importar(args.archivo, args.formato, args.lote, args.cuarentena)
+
+
+if __name__ == "__main__":
+    main()
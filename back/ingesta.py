@@ -0,0 +1,138 @@
+"""
+    PROCESO DE INGESTA MQTT INDEPENDIENTE DE LA API
+
+    python -m back.ingesta
+
+    Corre el Subscriptor MQTT y el pipeline de ingesta (validación, alertas y
+    escritura por lotes) sin levantar FastAPI. Pensado para usarse junto con
+    INGESTA_EN_API=0, de modo que la API pueda correr con varios workers sin
+    duplicar subscriptores. La base de datos tiene que estar inicializada
+    (basta con haber levantado la API una vez).
+
+    Para repartir la ingesta entre N procesos, cada uno se lanza con
+    INGESTA_PARTICIONES=N y su INGESTA_PARTICION (0..N-1), uno solo por
+    partición. Cada proceso se suscribe solo a los tópicos `<topic>/<nodo_id>`
+    de los nodos de su partición, así que el broker le entrega únicamente sus
+    mensajes; los publicados en `<topic>` los atiende la partición 0 (ver
+    `depends.sub.Subscriptor`).
+
+    Con INGESTA_METRICAS_PUERTO se sirven /metrics y /health/ready por HTTP.
+"""
+
+import json
+import os
+import signal
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import paho.mqtt.client as paho
+
+from .depends.config import config, ingesta, verificar_ingesta
+from .depends.metricas import CONTENT_TYPE, metricas
+from .depends.paquetes import (
+    detener_ingesta,
+    estadisticas_ingesta,
+    iniciar_ingesta,
+    mi_callback,
+    salud_ingesta,
+)
+from .depends.registro import registro
+from .depends.sub import Subscriptor
+
+
+def iniciar_subscriptor() -> Subscriptor:
+    """Levanta el pipeline y conecta el subscriptor MQTT en su propio hilo."""
+    verificar_ingesta(ingesta)
+    iniciar_ingesta()
+    particionada = ingesta.particiones > 1
+    if particionada and config.share_group:
+        print("MQTT_SHARE_GROUP no se usa con varias particiones: cada partición es un solo proceso")
+    elif config.share_group:
+        print("Suscripción compartida sin particiones: no hay afinidad ni orden por nodo")
+    # Las suscripciones compartidas requieren MQTT v5
+    protocolo = paho.MQTTv5 if config.share_group and not particionada else paho.MQTTv311
+    # El client_id incluye host y pid: dos procesos nunca se desconectan entre
+    # sí. Uno solo por partición, o los mensajes de sus nodos se duplican
+    client_id = (
+        f"rma-ingesta-{ingesta.particion}-de-{ingesta.particiones}-{socket.gethostname()}-{os.getpid()}"
+        if particionada
+        else ""
+    )
+    sub = Subscriptor(
+        client=paho.Client(client_id=client_id, protocol=protocolo),
+        on_message_callback=mi_callback,
+        share_group=config.share_group,
+        particiones=ingesta.particiones,
+        particion=ingesta.particion,
+        nodo_maximo=registro.mayor_nodo,
+        reserva_nodos=ingesta.nodos_reserva,
+        revision_s=ingesta.registro_ttl_s,
+    )
+    sub.connect(config.host, config.port, config.keepalive)
+    return sub
+
+
+def detener_subscriptor(sub: Subscriptor) -> None:
+    """Desconecta el subscriptor, vacía el pipeline y escribe lo pendiente."""
+    sub.disconnect()
+    detener_ingesta()
+    print(f"Estadísticas de ingesta: {estadisticas_ingesta()}")
+
+
+class ManejadorMetricas(BaseHTTPRequestHandler):
+    """Sirve /metrics y /health/ready del proceso de ingesta."""
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            self._responder(200, metricas.exponer().encode(), CONTENT_TYPE)
+        elif self.path == "/health/ready":
+            salud = salud_ingesta()
+            estado = 200 if salud["listo"] else 503
+            self._responder(estado, json.dumps(salud).encode(), "application/json")
+        else:
+            self._responder(404, b"", "text/plain")
+
+    def _responder(self, estado: int, cuerpo: bytes, tipo: str) -> None:
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args) -> None:
+        # Prometheus consulta seguido: no llenar la salida con cada pedido
+        pass
+
+
+def servir_metricas(puerto: int) -> ThreadingHTTPServer:
+    servidor = ThreadingHTTPServer(("0.0.0.0", puerto), ManejadorMetricas)
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    print(f"Métricas en http://0.0.0.0:{puerto}/metrics")
+    return servidor
+
+
+def main() -> None:
+    registro.refrescar()
+    servidor = servir_metricas(ingesta.metricas_puerto) if ingesta.metricas_puerto else None
+    sub = iniciar_subscriptor()
+    print("Ingesta iniciada.")
+
+    detener = threading.Event()
+
+    def signal_handler(sig, frame):
+        print("Recibida señal de terminación. Cerrando ingesta...")
+        detener.set()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    detener.wait()
+    detener_subscriptor(sub)
+    if servidor is not None:
+        servidor.shutdown()
+    print("Ingesta finalizada correctamente.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,16 @@ import sys
 import threading
 from contextlib import asynccontextmanager
 
-import paho.mqtt.client as paho
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .database import engine
-from .depends.config import config
-from .depends.paquetes import mi_callback
-from .depends.sub import Subscriptor
+from .depends.compresion import CompresionMiddleware
+from .depends.config import compresion, ingesta
+from .depends.registro import registro
+from .ingesta import detener_subscriptor, iniciar_subscriptor
+from .migraciones import aplicar_migraciones
 from .models import ModeloBase
 from .paquete.router import router as paquetes_router
 from .permisos.router import router as permisos_router
@@ -23,6 +24,7 @@ from .rango_valores.router import router as config_router
 from .auth.router import router as auth_router
 from .alertas.router import router as alertas_router
 from .rango_alertas.router import router as rango_alertas_router
+from .salud.router import router as salud_router
 from .carga_db import init_db
 
 # -----------------------------
@@ -36,14 +38,14 @@ ROOT_PATH = os.getenv(f"ROOT_PATH_{ENV.upper()}", "")
 # Variable para subscriptor
 # -----------------------------
 subscriptor_iniciado = False
+subscriptor = None
 
 def iniciar_thread() -> None:
     """Inicializa el subscriptor MQTT en un hilo aparte (solo una vez)."""
-    global subscriptor_iniciado
+    global subscriptor_iniciado, subscriptor
     if not subscriptor_iniciado:
         subscriptor_iniciado = True
-        sub = Subscriptor(client=paho.Client(), on_message_callback=mi_callback)
-        sub.connect(config.host, config.port, config.keepalive)
+        subscriptor = iniciar_subscriptor()
         print("Subscriptor iniciado.")
     else:
         print("El hilo del suscriptor ya está en ejecución.")
@@ -55,21 +57,28 @@ def iniciar_thread() -> None:
 async def lifespan(app: FastAPI):
     # Crear tablas
     ModeloBase.metadata.create_all(bind=engine)
+    # Ajustar tablas ya existentes (índices, columnas nuevas)
+    aplicar_migraciones(engine)
     # Inicializar datos base
     init_db()
+    # Cargar el registro de nodos/tipos usado para validar la ingesta
+    registro.refrescar()
 
-    # Iniciar subscriptor en hilo daemon
+    # Iniciar subscriptor en hilo daemon (salvo que la ingesta corra aparte)
     thread_sub = threading.Thread(target=iniciar_thread, daemon=True)
-    thread_sub.start()
-    print("Hilo del subscriptor lanzado.")
+    if ingesta.en_api:
+        thread_sub.start()
+        print("Hilo del subscriptor lanzado.")
+    else:
+        print("Subscriptor MQTT deshabilitado en la API (INGESTA_EN_API=0).")
 
     # Manejo de Ctrl+C para cerrar correctamente
     def signal_handler(sig, frame):
         print("Recibida señal de interrupción (Ctrl+C). Cerrando aplicación...")
-        if hasattr(Subscriptor, "should_exit"):
-            Subscriptor.should_exit = True
         if thread_sub.is_alive():
             thread_sub.join()
+        if subscriptor is not None:
+            detener_subscriptor(subscriptor)
         sys.exit(0)
 
     signal.signal(signal.SIGINT, signal_handler)
@@ -80,6 +89,9 @@ async def lifespan(app: FastAPI):
     print("Finalizando aplicación FastAPI...")
     if thread_sub.is_alive():
         thread_sub.join()
+    if subscriptor is not None:
+        # Vaciar el pipeline y escribir los paquetes que quedaron en el buffer
+        detener_subscriptor(subscriptor)
     print("Aplicación cerrada correctamente.")
 
 # -----------------------------
@@ -101,6 +113,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Nombre del archivo de /paquetes/export
+    expose_headers=["Content-Disposition"],
+)
+
+# -----------------------------
+# Compresión gzip / brotli
+# -----------------------------
+app.add_middleware(
+    CompresionMiddleware,
+    minimo_bytes=compresion.minimo_bytes,
+    nivel_gzip=compresion.nivel_gzip,
+    calidad_brotli=compresion.calidad_brotli,
 )
 
 # -----------------------------
@@ -115,5 +139,6 @@ app.include_router(auth_router)
 app.include_router(config_router)
 app.include_router(alertas_router)
 app.include_router(rango_alertas_router)
+app.include_router(salud_router)
 
 print("FastAPI inicializado correctamente con CORS y routers.")
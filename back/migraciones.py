@@ -0,0 +1,206 @@
+"""
+    MIGRACIONES IDEMPOTENTES DEL ESQUEMA
+
+    `ModeloBase.metadata.create_all` crea las tablas nuevas pero no modifica
+    las existentes. Las funciones de este módulo ajustan bases ya creadas y
+    se pueden ejecutar en cada arranque: solo hacen algo si hace falta.
+
+    python -m back.migraciones
+    python -m back.migraciones --eliminar-duplicados
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+
+def indices_de(engine: Engine, tabla: str) -> set:
+    return {indice["name"] for indice in inspect(engine).get_indexes(tabla)}
+
+
+def crear_indice_unico_paquetes(engine: Engine, eliminar_duplicados: bool = False) -> None:
+    """Índice único (nodo_id, type_id, timestamp) en `paquetes`.
+
+    Si ya hay lecturas duplicadas no se puede crear: sin `eliminar_duplicados`
+    lanza RuntimeError (la API no arranca sin el índice, del que depende que
+    la ingesta descarte las lecturas repetidas). Con `eliminar_duplicados`
+    (`python -m back.migraciones --eliminar-duplicados`) se borran,
+    conservando la primera que se guardó, y se listan los ids borrados.
+    """
+    if "ix_paquetes_nodo_tipo_timestamp" in indices_de(engine, "paquetes"):
+        return
+    with engine.begin() as conn:
+        duplicados = conn.execute(
+            text(
+                "SELECT id, nodo_id, type_id, timestamp FROM paquetes WHERE id NOT IN ("
+                " SELECT MIN(id) FROM paquetes GROUP BY nodo_id, type_id, timestamp)"
+                " ORDER BY id"
+            )
+        ).all()
+        if duplicados and not eliminar_duplicados:
+            raise RuntimeError(
+                f"Hay {len(duplicados)} lecturas duplicadas en paquetes y no se puede crear su"
+                " índice único. Para borrarlas (se conserva la primera):"
+                " python -m back.migraciones --eliminar-duplicados"
+            )
+        for id_, nodo_id, type_id, timestamp in duplicados:
+            print(f"Lectura duplicada eliminada: id={id_} nodo={nodo_id} tipo={type_id} timestamp={timestamp}")
+        eliminados = conn.execute(
+            text(
+                "DELETE FROM paquetes WHERE id NOT IN ("
+                " SELECT MIN(id) FROM paquetes GROUP BY nodo_id, type_id, timestamp)"
+            )
+        ).rowcount
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_paquetes_nodo_tipo_timestamp"
+                " ON paquetes (nodo_id, type_id, timestamp)"
+            )
+        )
+    print(f"Índice único de paquetes creado ({eliminados} duplicados eliminados).")
+
+
+def crear_indice_nodo_timestamp(engine: Engine) -> None:
+    """Índice (nodo_id, timestamp) en `paquetes` para listar un nodo por fecha."""
+    if "ix_paquetes_nodo_timestamp" in indices_de(engine, "paquetes"):
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_paquetes_nodo_timestamp"
+                " ON paquetes (nodo_id, timestamp)"
+            )
+        )
+    print("Índice (nodo_id, timestamp) de paquetes creado.")
+
+
+INDICES_OBSOLETOS = {
+    "paquetes": ["ix_paquetes_id", "ix_paquetes_nodo_id", "ix_paquetes_data"],
+    "paquetes_archivo": ["ix_paquetes_archivo_id", "ix_paquetes_archivo_data"],
+}
+
+
+def ajustar_indices_series(engine: Engine) -> None:
+    """Índice (nodo_id, type_id, timestamp) en `paquetes_archivo` y borrado de
+    los índices de una columna que ya no se usan en `paquetes` y
+    `paquetes_archivo` (la clave primaria, los que cubre un índice
+    compuesto y los de `data`)."""
+    cambios = []
+    if "ix_paquetes_archivo_nodo_tipo_timestamp" not in indices_de(engine, "paquetes_archivo"):
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_paquetes_archivo_nodo_tipo_timestamp"
+                    " ON paquetes_archivo (nodo_id, type_id, timestamp)"
+                )
+            )
+        cambios.append("creado ix_paquetes_archivo_nodo_tipo_timestamp")
+    for tabla, obsoletos in INDICES_OBSOLETOS.items():
+        for indice in sorted(indices_de(engine, tabla) & set(obsoletos)):
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX IF EXISTS {indice}"))
+            cambios.append(f"borrado {indice}")
+    if cambios:
+        print(f"Índices de series ajustados: {', '.join(cambios)}.")
+
+
+def columnas_de(engine: Engine, tabla: str) -> set:
+    return {columna["name"] for columna in inspect(engine).get_columns(tabla)}
+
+
+def recrear_paquetes_rechazados(engine: Engine) -> None:
+    """Pasa `paquetes_rechazados` al esquema de cuarentena (id propio y
+    campos opcionales). La tabla original tenía como clave (nodo_id,
+    timestamp); sus filas se copian a la tabla nueva."""
+    from .paquete.models import PaqueteRechazado
+
+    if "id" in columnas_de(engine, "paquetes_rechazados"):
+        return
+    with engine.begin() as conn:
+        filas = conn.execute(
+            text("SELECT nodo_id, type_id, data, timestamp, motivo FROM paquetes_rechazados")
+        ).mappings().all()
+        PaqueteRechazado.__table__.drop(conn)
+        PaqueteRechazado.__table__.create(conn)
+        if filas:
+            conn.execute(PaqueteRechazado.__table__.insert(), [dict(f) for f in filas])
+    print(f"Tabla paquetes_rechazados recreada ({len(filas)} filas copiadas).")
+
+
+def poblar_ultimas_lecturas(engine: Engine) -> None:
+    """Carga `ultimas_lecturas` desde `paquetes` si la tabla está vacía
+    (recién creada sobre una base con datos). Después la mantiene la ingesta."""
+    from .paquete.models import UltimaLectura
+
+    UltimaLectura.__table__.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM ultimas_lecturas LIMIT 1")).first():
+            return
+        cargadas = conn.execute(
+            text(
+                "INSERT INTO ultimas_lecturas (nodo_id, type_id, data, timestamp)"
+                " SELECT p.nodo_id, p.type_id, p.data, p.timestamp FROM paquetes p"
+                " JOIN (SELECT nodo_id, type_id, MAX(timestamp) AS timestamp"
+                "       FROM paquetes GROUP BY nodo_id, type_id) m"
+                " ON p.nodo_id = m.nodo_id AND p.type_id = m.type_id"
+                " AND p.timestamp = m.timestamp"
+            )
+        ).rowcount
+    if cargadas:
+        print(f"Tabla ultimas_lecturas cargada desde paquetes ({cargadas} filas).")
+
+
+def poblar_agregados(engine: Engine) -> None:
+    """Calcula `agregados_hora` y `agregados_dia` desde `paquetes` si están
+    vacíos (recién creados sobre una base con datos)."""
+    from sqlalchemy.orm import Session
+
+    from .paquete.models import AgregadoDia, AgregadoHora
+    from .paquete.services import reconstruir_agregados
+
+    for modelo in (AgregadoHora, AgregadoDia):
+        modelo.__table__.create(engine, checkfirst=True)
+    with Session(engine) as db:
+        if db.query(AgregadoDia).first() is not None:
+            return
+        procesadas = reconstruir_agregados(db)
+        db.commit()
+    if procesadas:
+        print(f"Agregados por hora y día calculados desde paquetes ({procesadas} lecturas).")
+
+
+def fijar_base_versiones(engine: Engine) -> None:
+    """Crea `versiones` y su clave "base" (al azar) si no existen, para que
+    los ETag de esta base no coincidan con los de una base anterior."""
+    from sqlalchemy.orm import Session
+
+    from .depends.versiones import Version, fijar_base
+
+    Version.__table__.create(engine, checkfirst=True)
+    with Session(engine) as db:
+        fijar_base(db)
+        db.commit()
+
+
+def aplicar_migraciones(engine: Engine, eliminar_duplicados: bool = False) -> None:
+    crear_indice_unico_paquetes(engine, eliminar_duplicados)
+    crear_indice_nodo_timestamp(engine)
+    ajustar_indices_series(engine)
+    recrear_paquetes_rechazados(engine)
+    poblar_ultimas_lecturas(engine)
+    poblar_agregados(engine)
+    fijar_base_versiones(engine)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Ajusta el esquema de una base ya creada.")
+    parser.add_argument("--eliminar-duplicados", action="store_true",
+                        help="Borrar las lecturas duplicadas de paquetes para crear su índice único")
+    args = parser.parse_args()
+    try:
+        aplicar_migraciones(engine, args.eliminar_duplicados)
+    except RuntimeError as e:
+        raise SystemExit(f"Error: {e}")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel as Schema
-from sqlalchemy import update
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session, declarative_base
 
 Base = declarative_base()
@@ -49,6 +50,65 @@ class ModeloBase(Base):
         instance = cls(**schema.model_dump())
         return instance.save(db)
 
+    @classmethod
+    def _insert_ignore(cls, db: Session):
+        """INSERT que ignora las filas que violan una restricción única
+        (INSERT OR IGNORE / ON CONFLICT DO NOTHING) según el motor."""
+        dialecto = db.get_bind().dialect.name
+        if dialecto == "sqlite":
+            return sqlite.insert(cls.__table__).on_conflict_do_nothing()
+        if dialecto == "postgresql":
+            return postgresql.insert(cls.__table__).on_conflict_do_nothing()
+        return insert(cls.__table__)
+
+    @classmethod
+    def insert_ignore(cls, db: Session, filas: list) -> int:
+        """INSERT multi-fila que ignora las filas duplicadas.
+        No hace commit. Retorna la cantidad de filas insertadas."""
+        if not filas:
+            return 0
+        return db.execute(cls._insert_ignore(db), filas).rowcount
+
+    @classmethod
+    def insert_ignore_desde(cls, db: Session, columnas: list, consulta) -> int:
+        """INSERT ... SELECT que ignora las filas duplicadas.
+        No hace commit. Retorna la cantidad de filas insertadas."""
+        stmt = cls._insert_ignore(db).from_select(columnas, consulta)
+        return db.execute(stmt).rowcount
+
+    @classmethod
+    def upsert(
+        cls, db: Session, filas: list, claves: list, condicion=None, valores=None
+    ) -> None:
+        """INSERT multi-fila que, si ya existe una fila con la misma `claves`,
+        la actualiza con los valores nuevos (ON CONFLICT DO UPDATE).
+        `condicion(tabla, nuevos)` limita qué filas existentes se actualizan y
+        `valores(tabla, nuevos)` retorna {columna: expresión} para combinar la
+        fila existente con la nueva en lugar de reemplazarla.
+        No hace commit."""
+        if not filas:
+            return
+        dialecto = db.get_bind().dialect.name
+        if dialecto not in ("sqlite", "postgresql"):
+            if valores is not None:
+                raise NotImplementedError(f"upsert con `valores` no soportado en {dialecto}")
+            for fila in filas:
+                db.merge(cls(**fila))
+            return
+        modulo = sqlite if dialecto == "sqlite" else postgresql
+        stmt = modulo.insert(cls.__table__)
+        if valores is not None:
+            set_ = valores(cls.__table__, stmt.excluded)
+        else:
+            set_ = {c: stmt.excluded[c] for c in filas[0] if c not in claves}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=claves,
+            set_=set_,
+            where=condicion(cls.__table__, stmt.excluded) if condicion else None,
+        )
+        # executemany: la sentencia se compila una sola vez para todo el lote
+        db.execute(stmt, filas)
+
     @classmethod
     def get(cls, db: Session, id: int):
         return db.query(cls).filter(cls.id == id).first()
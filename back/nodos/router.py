@@ -1,9 +1,12 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from ..auth.dependencies import permiso_requerido
 from ..database import get_db
+from ..depends.registro import registro
+from ..depends.respuestas import verificar_etag
+from ..depends.versiones import etag, version_catalogo, version_lecturas
 from ..nodos import schemas, services
 from .schemas import NodoCreate, NodoOut
 from .services import crear_nodo, get_nodo
@@ -20,12 +23,14 @@ router = APIRouter()
     tags=["Nodos"],
     dependencies=[Depends(permiso_requerido("read_nodos"))],
 )
-def read_nodos(db: Session = Depends(get_db)):
+def read_nodos(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Retorna la lista de todos los nodos activos.
     Los tipos se devuelven como lista de strings (nombres), 
     sin modificar la relación ORM.
+    Responde 304 si los nodos no cambiaron desde el ETag del pedido.
     """
+    verificar_etag(request, response, etag(db, "nodos", version_catalogo(db)))
     nodos = services.listar_nodos(db)
     
     # Convertimos a lista de diccionarios serializable
@@ -60,6 +65,7 @@ def create_nodo(nodo: NodoCreate, db: Session = Depends(get_db)):
     """
     tipos_ids = nodo.tipos or []  # lista de IDs de tipos seleccionados
     nuevo_nodo = crear_nodo(db, nodo, tipos_ids)
+    registro.refrescar(db)
 
     # Construimos diccionario serializable
     nodo_dict = {
@@ -74,6 +80,28 @@ def create_nodo(nodo: NodoCreate, db: Session = Depends(get_db)):
     return nodo_dict
 
 
+# -------------------------------
+# Endpoint: Última lectura de cada nodo y tipo
+# -------------------------------
+# Declarado antes de /nodos/{id} para que no lo capture esa ruta
+@router.get(
+    "/nodos/ultimas-lecturas",
+    response_model=List[schemas.NodoUltimasLecturas],
+    tags=["Nodos"],
+    dependencies=[Depends(permiso_requerido("read_nodos"))],
+)
+def read_ultimas_lecturas(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Devuelve, para cada nodo activo, el último valor recibido de cada tipo.
+    Sale de la tabla `ultimas_lecturas` que mantiene la ingesta, sin
+    recorrer `paquetes`. Responde 304 si no cambiaron los nodos ni llegaron
+    lecturas desde el ETag del pedido.
+    """
+    verificar_etag(
+        request, response, etag(db, "ultimas-lecturas", version_catalogo(db), version_lecturas(db))
+    )
+    return services.listar_ultimas_lecturas(db)
+
 # -------------------------------
 # Endpoint: Obtener un nodo por ID
 # -------------------------------
@@ -104,6 +132,7 @@ def update_nodo(nodo_id: int, nodo: schemas.NodoUpdate, db: Session = Depends(ge
     Modifica un nodo existente.
     """
     nodo_actualizado = services.modificar_nodo(db, nodo_id, nodo)
+    registro.refrescar(db)
     nodo_dict = {
         "id": nodo_actualizado.id,
         "identificador": nodo_actualizado.identificador,
@@ -128,7 +157,9 @@ def delete_nodo(nodo_id: int, db: Session = Depends(get_db)):
     """
     Archiva y elimina un nodo.
     """
-    return services.archivar_y_eliminar_nodo(db=db, nodo_id=nodo_id)
+    resultado = services.archivar_y_eliminar_nodo(db=db, nodo_id=nodo_id)
+    registro.refrescar(db)
+    return resultado
 
 # -------------------------------
 # Endpoint: Listar nodos inactivos
@@ -139,10 +170,11 @@ def delete_nodo(nodo_id: int, db: Session = Depends(get_db)):
     tags=["Nodos"],
     dependencies=[Depends(permiso_requerido("read_nodos_inactivos"))],
 )
-def read_nodos_inactivos(db: Session = Depends(get_db)):
+def read_nodos_inactivos(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Lista todos los nodos inactivos, serializando sus tipos.
     """
+    verificar_etag(request, response, etag(db, "nodos-inactivos", version_catalogo(db)))
     nodos_inactivos = services.listar_nodos_inactivos(db)
     nodos_serializados = []
     for nodo in nodos_inactivos:
@@ -173,6 +205,7 @@ def revivir_nodo(nodo_id: int, db: Session = Depends(get_db)):
     Reactiva un nodo previamente inactivo.
     """
     nodo_revivido = services.activar_nodo(db, nodo_id)
+    registro.refrescar(db)
     nodo_dict = {
         "id": nodo_revivido.id,
         "identificador": nodo_revivido.identificador,
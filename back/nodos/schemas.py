@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 from ..paquete.schemas import PaqueteOut as PaqueteSchema
@@ -35,3 +36,16 @@ class DeleteResponseSchema(BaseModel):
 
 class NodoConPaquetes(NodoOut):
     paquetes: List[PaqueteSchema]
+
+
+class UltimaLecturaOut(BaseModel):
+    type_id: int
+    data: float
+    timestamp: datetime
+    model_config = {"from_attributes": True}
+
+
+class NodoUltimasLecturas(BaseModel):
+    nodo_id: int
+    identificador: str
+    lecturas: List[UltimaLecturaOut]
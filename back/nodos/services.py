@@ -5,7 +5,8 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import select, delete
 
-from ..paquete.models import Paquete, PaqueteArchivo, Tipo
+from ..depends.versiones import incrementar_catalogo, incrementar_lecturas
+from ..paquete.models import AgregadoDia, AgregadoHora, Paquete, PaqueteArchivo, Tipo, UltimaLectura
 from .models import Nodo
 from .schemas import NodoOut as NodoSchema
 from .schemas import NodoCreate, NodoUpdate
@@ -22,6 +23,7 @@ def crear_nodo(db: Session, nodo_data: NodoCreate, tipos_ids: List[int]) -> Nodo
         nodo.tipos.extend(tipos)
 
     db.add(nodo)
+    incrementar_catalogo(db)
     db.commit()
     db.refresh(nodo)
     return nodo
@@ -83,11 +85,37 @@ def modificar_nodo(db: Session, nodo_id: int, nodo_actualizado: NodoUpdate) -> N
         nodo.tipos.clear()
         nodo.tipos.extend(tipos)
 
+    incrementar_catalogo(db)
     db.commit()
     db.refresh(nodo)
     return nodo
 
 
+# --------------------------------------------------
+# ÚLTIMAS LECTURAS
+# --------------------------------------------------
+def listar_ultimas_lecturas(db: Session) -> List[dict]:
+    """
+    Nodos activos con la última lectura de cada tipo, en una sola consulta
+    sobre `ultimas_lecturas` (una fila por nodo y tipo).
+    """
+    filas = (
+        db.query(Nodo.id, Nodo.identificador, UltimaLectura)
+        .outerjoin(UltimaLectura, UltimaLectura.nodo_id == Nodo.id)
+        .filter(Nodo.is_active.is_(True))
+        .order_by(Nodo.id, UltimaLectura.type_id)
+        .all()
+    )
+    nodos = {}
+    for nodo_id, identificador, lectura in filas:
+        nodo = nodos.setdefault(
+            nodo_id, {"nodo_id": nodo_id, "identificador": identificador, "lecturas": []}
+        )
+        if lectura is not None:
+            nodo["lecturas"].append(lectura)
+    return list(nodos.values())
+
+
 # --------------------------------------------------
 # ARCHIVAR NODO
 # --------------------------------------------------
@@ -99,11 +127,15 @@ def archivar_y_eliminar_nodo(db: Session, nodo_id: int) -> dict:
 
     subquery = select(Paquete.id).filter(Paquete.nodo_id == nodo_id)
     db.execute(delete(Paquete).where(Paquete.id.in_(subquery)))
+    for modelo in (UltimaLectura, AgregadoHora, AgregadoDia):
+        db.execute(delete(modelo).where(modelo.nodo_id == nodo_id))
 
     nodo = Nodo.get(db, nodo_id)
     if nodo:
         nodo.is_active = False
 
+    incrementar_lecturas(db, [nodo_id])
+    incrementar_catalogo(db)
     db.commit()
     return {"detail": "Nodo archivado y marcado como inactivo correctamente"}
 
@@ -118,6 +150,7 @@ def activar_nodo(db: Session, nodo_id: int) -> NodoSchema:
         raise HTTPException(status_code=404, detail="Nodo no encontrado")
 
     nodo.is_active = True
+    incrementar_catalogo(db)
     db.commit()
 
     return NodoSchema.model_validate(nodo)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from back.models import ModeloBase
@@ -32,31 +32,100 @@ class Tipo(ModeloBase):
 class Paquete(ModeloBase):
     __tablename__ = "paquetes"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    nodo_id: Mapped[int] = mapped_column(ForeignKey("nodos.id"), index=True)
-    data: Mapped[float] = mapped_column(Float, index=True)
+    # Sin índices de una columna para id (ya es la clave), nodo_id (lo cubren
+    # los índices compuestos) ni data (no se busca por valor): cada índice
+    # encarece cada inserción
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    nodo_id: Mapped[int] = mapped_column(ForeignKey("nodos.id"))
+    data: Mapped[float] = mapped_column(Float)
     type_id: Mapped[int] = mapped_column(ForeignKey("tipos.id"), index=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime, index=True, default=datetime.utcnow)
 
     type: Mapped[Tipo] = relationship("Tipo", back_populates="paquetes")
     nodo: Mapped[Nodo] = relationship("Nodo", back_populates="paquetes")
 
+    __table_args__ = (
+        # Una sola lectura por nodo, tipo e instante: los reenvíos MQTT se
+        # ignoran. También sirve a las series de un nodo y tipo por fecha
+        Index(
+            "ix_paquetes_nodo_tipo_timestamp", "nodo_id", "type_id", "timestamp", unique=True
+        ),
+        # Listados de un nodo ordenados por fecha (paginación por cursor)
+        Index("ix_paquetes_nodo_timestamp", "nodo_id", "timestamp"),
+    )
+
+
+class UltimaLectura(ModeloBase):
+    """Última lectura de cada nodo y tipo, mantenida por la ingesta.
+
+    Evita recorrer `paquetes` para saber el valor actual de cada nodo.
+    `type_id` es el código de tipo, igual que en `paquetes`.
+    """
+
+    __tablename__ = "ultimas_lecturas"
+
+    nodo_id: Mapped[int] = mapped_column(ForeignKey("nodos.id"), primary_key=True)
+    type_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data: Mapped[float] = mapped_column(Float)
+    timestamp: Mapped[datetime] = mapped_column(DateTime)
+
+
+class AgregadoMixin:
+    """Resumen de las lecturas de un nodo y tipo en un intervalo que empieza
+    en `inicio` (hora local). Lo mantiene la ingesta lote a lote."""
+
+    nodo_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    type_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    inicio: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    cantidad: Mapped[int] = mapped_column(Integer)
+    suma: Mapped[float] = mapped_column(Float)
+    minimo: Mapped[float] = mapped_column(Float)
+    maximo: Mapped[float] = mapped_column(Float)
+    # Primera y última lectura del intervalo
+    primero: Mapped[float] = mapped_column(Float)
+    primero_timestamp: Mapped[datetime] = mapped_column(DateTime)
+    ultimo: Mapped[float] = mapped_column(Float)
+    ultimo_timestamp: Mapped[datetime] = mapped_column(DateTime)
+
+    @property
+    def promedio(self) -> float:
+        return self.suma / self.cantidad
+
+
+class AgregadoHora(AgregadoMixin, ModeloBase):
+    __tablename__ = "agregados_hora"
+
+
+class AgregadoDia(AgregadoMixin, ModeloBase):
+    __tablename__ = "agregados_dia"
+
 
 class PaqueteRechazado(ModeloBase):
+    """Cuarentena de lecturas rechazadas por la ingesta.
+
+    Los campos de la lectura son opcionales porque un mensaje mal formado
+    puede no tenerlos; en ese caso `contenido` guarda lo que se recibió.
+    `nodo_id` y `type_id` no son claves foráneas: justamente pueden
+    referirse a un nodo o tipo que todavía no existe.
+    """
+
     __tablename__ = "paquetes_rechazados"
 
-    nodo_id: Mapped[int] = mapped_column(ForeignKey("nodos.id"), primary_key=True, index=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, index=True)
-    data: Mapped[float] = mapped_column(Float, index=True)
-    type_id: Mapped[int] = mapped_column(ForeignKey("tipos.id"), index=True)
-    motivo: Mapped[str] = mapped_column(String, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    nodo_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    type_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    data: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    motivo: Mapped[str] = mapped_column(String(30), index=True)
+    contenido: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    recibido: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
 
 class PaqueteArchivo(ModeloBase):
     __tablename__ = "paquetes_archivo"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    data: Mapped[float] = mapped_column(Float, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data: Mapped[float] = mapped_column(Float)
     type_id: Mapped[int] = mapped_column(ForeignKey("tipos.id"))
     timestamp: Mapped[datetime] = mapped_column(DateTime, index=True)
     nodo_id: Mapped[int] = mapped_column(ForeignKey("nodos.id"))
@@ -64,6 +133,11 @@ class PaqueteArchivo(ModeloBase):
     type: Mapped[Tipo] = relationship("Tipo")
     nodo: Mapped[Nodo] = relationship("Nodo")
 
+    __table_args__ = (
+        # Series de un nodo y tipo por fecha
+        Index("ix_paquetes_archivo_nodo_tipo_timestamp", "nodo_id", "type_id", "timestamp"),
+    )
+
     @classmethod
     def from_paquete(cls, paquete: Paquete):
         return cls(
@@ -1,13 +1,19 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List, Union
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..auth.dependencies import permiso_requerido
-from ..database import get_db
+from ..database import SessionLocal, get_db
+from ..depends import columnar
+from ..depends.config import catalogo_max_age_s, get_config_alertas
+from ..depends.registro import rangos_de_config, registro
+from ..depends.respuestas import RespuestaJSON, verificar_etag
+from ..depends.versiones import etag, version_catalogo, version_lecturas
 from ..paquete import schemas, services
-from .models import Tipo
+from .models import Paquete, PaqueteArchivo, Tipo
 
 router = APIRouter()
 
@@ -18,11 +24,13 @@ router = APIRouter()
 
 @router.get(
     "/paquetes",
-    response_model=schemas.PaqueteResponse,
+    response_model=Union[schemas.PaqueteResponse, schemas.PaqueteColumnarResponse],
     tags=["Paquetes"],
     dependencies=[Depends(permiso_requerido("read_paquetes"))],
 )
 def read_paquetes(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1),
     nodo_id: Optional[int] = None,
@@ -33,16 +41,150 @@ def read_paquetes(
     order_by: Optional[str] = None,
     type_id: Optional[int] = None,
     order: str = Query("asc"),
+    cursor: Optional[str] = None,
+    conteo: Optional[Literal["exacto", "cache", "estimado", "ninguno"]] = None,
+    format: Literal["json", "columnar"] = "json",
     db: Session = Depends(get_db),
 ):
     """
-    Listar paquetes con filtros y paginación.
+    Listar paquetes con filtros y paginación. Con `cursor` (el `next_cursor`
+    de la respuesta anterior) se pagina por cursor en lugar de por `page`.
+    `conteo` elige cómo se calcula el total: exacto (por defecto por
+    página), cache, estimado o ninguno (por defecto por cursor).
+    Con `format=columnar` las lecturas de la página vienen en `series`, una
+    por nodo y tipo, con `timestamps` (ms desde 1970) y `values` como listas.
+    Responde 304 si no llegaron lecturas del nodo (o de ninguno, sin
+    `nodo_id`) desde el ETag del pedido.
+    """
+    cabeceras = verificar_etag(
+        request, response, etag(db, "paquetes", version_lecturas(db, [nodo_id] if nodo_id else None))
+    )
+    offset = (page - 1) * limit
+    try:
+        result = services.listar_paquetes(
+            db,
+            limit=limit,
+            offset=offset,
+            nodo_id=nodo_id,
+            start_date=start_date,
+            end_date=end_date,
+            data_min=data_min,
+            data_max=data_max,
+            order_by=order_by,
+            order=order,
+            type_id=type_id,
+            cursor=cursor,
+            conteo=conteo,
+            formato=format,
+        )
+    except ValueError as e:
+        # Cursor mal formado o generado con otro orden
+        raise HTTPException(status_code=400, detail=str(e))
+    # Ya armado con tipos básicos: se serializa sin volver a validarlo
+    return RespuestaJSON(result, headers=cabeceras)
+
+
+@router.get(
+    "/paquetesarchivos",
+    response_model=schemas.PaqueteArchivoResponse,
+    tags=["Paquetes"],
+    # dependencies=[Depends(permiso_requerido("read_paquetes_archivos"))],
+)
+def read_paquetes_archivo(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1),
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    order_by: Optional[str] = None,
+    type_id: Optional[int] = None,
+    order: str = Query("asc"),
+    cursor: Optional[str] = None,
+    conteo: Optional[Literal["exacto", "cache", "estimado", "ninguno"]] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Listar paquetes archivados con filtros y paginación. Con `cursor` se
+    pagina por cursor en lugar de por `page`.
     """
     offset = (page - 1) * limit
-    result = services.listar_paquetes(
-        db,
-        limit=limit,
-        offset=offset,
+    try:
+        result = services.listar_paquetes_archivo(
+            db,
+            limit=limit,
+            offset=offset,
+            nodo_id=nodo_id,
+            start_date=start_date,
+            end_date=end_date,
+            data_min=data_min,
+            data_max=data_max,
+            order_by=order_by,
+            order=order,
+            type_id=type_id,
+            cursor=cursor,
+            conteo=conteo,
+        )
+    except ValueError as e:
+        # Cursor mal formado o generado con otro orden
+        raise HTTPException(status_code=400, detail=str(e))
+    # Ya armado con tipos básicos: se serializa sin volver a validarlo
+    return RespuestaJSON(result)
+
+
+TIPOS_EXPORTACION = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def respuesta_exportacion(Model, nombre: str, formato: str, filtros: dict) -> StreamingResponse:
+    if formato in ("parquet", "arrow") and not columnar.disponible():
+        raise HTTPException(
+            status_code=501, detail="La exportación a Parquet/Arrow necesita pyarrow en el servidor"
+        )
+
+    def contenido():
+        # Sesión propia: la de get_db se cierra antes de terminar de enviar la respuesta
+        db = SessionLocal()
+        try:
+            yield from services.exportar_paquetes(db, Model, formato, **filtros)
+        finally:
+            db.close()
+
+    archivo = f"{nombre}-{datetime.now():%Y%m%d-%H%M%S}.{formato}"
+    return StreamingResponse(
+        contenido(),
+        media_type=TIPOS_EXPORTACION[formato],
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'},
+    )
+
+
+@router.get(
+    "/paquetes/export",
+    tags=["Paquetes"],
+    dependencies=[Depends(permiso_requerido("read_paquetes"))],
+)
+def export_paquetes(
+    format: Literal["csv", "ndjson", "parquet", "arrow"] = "csv",
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    order_by: Optional[str] = None,
+    type_id: Optional[int] = None,
+    order: str = Query("asc"),
+):
+    """
+    Exportar todos los paquetes que pasan los filtros (los mismos de
+    /paquetes) en CSV, NDJSON, Parquet o Arrow IPC. La respuesta se envía
+    por partes a medida que se leen las filas.
+    """
+    filtros = dict(
         nodo_id=nodo_id,
         start_date=start_date,
         end_date=end_date,
@@ -52,18 +194,16 @@ def read_paquetes(
         order=order,
         type_id=type_id,
     )
-    return result
+    return respuesta_exportacion(Paquete, "paquetes", format, filtros)
 
 
 @router.get(
-    "/paquetesarchivos",
-    response_model=schemas.PaqueteArchivoResponse,
+    "/paquetesarchivos/export",
     tags=["Paquetes"],
     # dependencies=[Depends(permiso_requerido("read_paquetes_archivos"))],
 )
-def read_paquetes_archivo(
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1),
+def export_paquetes_archivo(
+    format: Literal["csv", "ndjson", "parquet", "arrow"] = "csv",
     nodo_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
@@ -72,16 +212,12 @@ def read_paquetes_archivo(
     order_by: Optional[str] = None,
     type_id: Optional[int] = None,
     order: str = Query("asc"),
-    db: Session = Depends(get_db),
 ):
     """
-    Listar paquetes archivados con filtros y paginación.
+    Exportar los paquetes archivados que pasan los filtros en CSV, NDJSON,
+    Parquet o Arrow IPC.
     """
-    offset = (page - 1) * limit
-    result = services.listar_paquetes_archivo(
-        db,
-        limit=limit,
-        offset=offset,
+    filtros = dict(
         nodo_id=nodo_id,
         start_date=start_date,
         end_date=end_date,
@@ -91,7 +227,111 @@ def read_paquetes_archivo(
         order=order,
         type_id=type_id,
     )
-    return result
+    return respuesta_exportacion(PaqueteArchivo, "paquetes-archivo", format, filtros)
+
+
+@router.get(
+    "/paquetes/agregados",
+    response_model=List[schemas.AgregadoOut],
+    tags=["Paquetes"],
+    dependencies=[Depends(permiso_requerido("read_paquetes"))],
+)
+def read_agregados(
+    nodo_id: int,
+    type_id: int,
+    resolucion: Literal["hora", "dia"] = "hora",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Cantidad, suma, promedio, mínimo, máximo, primera y última lectura por
+    hora o por día (hora local, UTC-3) de un nodo y tipo, sin recorrer
+    `paquetes`. Incluye los intervalos que empiezan entre `start` y `end`.
+    """
+    return services.listar_agregados(db, nodo_id, type_id, resolucion, start, end)
+
+
+@router.get(
+    "/paquetes/serie",
+    response_model=schemas.SerieOut,
+    tags=["Paquetes"],
+    dependencies=[Depends(permiso_requerido("read_paquetes"))],
+)
+def read_serie(
+    nodo_id: int,
+    type_id: int,
+    puntos: int = Query(1000, ge=2, le=10000),
+    metodo: Literal["lttb", "minmax"] = "lttb",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Lecturas de un nodo y tipo entre `start` y `end` reducidas a `puntos`
+    puntos para graficar. `lttb` conserva la forma de la curva; `minmax`
+    conserva el mínimo y el máximo de cada tramo (picos de nivel).
+    """
+    return services.serie_reducida(db, nodo_id, type_id, puntos, metodo, start, end)
+
+
+def lista_de_ids(texto: str, parametro: str) -> List[int]:
+    """Ids separados por coma ("1,2,3") de un parámetro de la consulta."""
+    try:
+        ids = [int(valor) for valor in texto.split(",") if valor.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"`{parametro}` debe ser una lista de ids separados por coma")
+    if not ids:
+        raise HTTPException(status_code=400, detail=f"`{parametro}` no puede estar vacío")
+    return ids
+
+
+@router.get(
+    "/series",
+    response_model=schemas.SeriesResponse,
+    tags=["Paquetes"],
+    dependencies=[Depends(permiso_requerido("read_paquetes"))],
+)
+def read_series(
+    request: Request,
+    response: Response,
+    nodos: str = Query(..., description="Ids de nodos separados por coma"),
+    tipos: str = Query(..., description="Ids de tipos separados por coma"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolucion: Literal["lectura", "hora", "dia"] = "lectura",
+    db: Session = Depends(get_db),
+):
+    """
+    Todas las series de `nodos` x `tipos` entre `start` (inclusivo) y `end`
+    (exclusivo) en una sola consulta, con clave "nodo_id:type_id". Cada una
+    trae `timestamps` (ms desde 1970) y `values`. Con `resolucion=hora|dia`
+    se responde desde los agregados: promedio, mínimo, máximo y cantidad
+    de cada intervalo. Responde 304 si no llegaron lecturas de `nodos`
+    desde el ETag del pedido.
+    """
+    ids_nodos, ids_tipos = lista_de_ids(nodos, "nodos"), lista_de_ids(tipos, "tipos")
+    cabeceras = verificar_etag(request, response, etag(db, "series", version_lecturas(db, ids_nodos)))
+    try:
+        result = services.series_multiples(db, ids_nodos, ids_tipos, resolucion, start, end)
+    except ValueError as e:
+        # Demasiadas lecturas para resolucion=lectura
+        raise HTTPException(status_code=400, detail=str(e))
+    return RespuestaJSON(result, headers=cabeceras)
+
+
+@router.post(
+    "/paquetes/rechazados/reprocesar",
+    response_model=schemas.ReprocesoRechazadosOut,
+    tags=["Paquetes"],
+    dependencies=[Depends(permiso_requerido("admin"))],
+)
+def reprocesar_paquetes_rechazados(db: Session = Depends(get_db)):
+    """
+    Vuelve a validar los paquetes en cuarentena y mueve a `paquetes` los que
+    ahora son válidos (p.ej. después de crear el nodo o tipo que faltaba).
+    """
+    return services.reprocesar_rechazados(db, rangos_de_config(get_config_alertas()))
 
 
 # ==========================
@@ -103,10 +343,12 @@ def read_paquetes_archivo(
     response_model=List[schemas.TipoOut],
     tags=["Tipos"]
 )
-def read_tipos(db: Session = Depends(get_db)):
+def read_tipos(request: Request, response: Response, db: Session = Depends(get_db)):
     """
-    Obtener todos los tipos de datos.
+    Obtener todos los tipos de datos. El navegador puede reutilizarlos
+    `CATALOGO_MAX_AGE_S` segundos y después revalidarlos con el ETag.
     """
+    verificar_etag(request, response, etag(db, "tipos", version_catalogo(db)), catalogo_max_age_s)
     tipos = services.listar_tipos(db)
     return tipos
 
@@ -151,4 +393,6 @@ def create_tipo(tipo: schemas.TipoCreate, db: Session = Depends(get_db)):
     if len(tipo.data_symbol) > 5:
         raise HTTPException(status_code=400, detail="data_symbol debe tener máximo 5 caracteres")
     
-    return services.crear_tipo(db=db, tipo=tipo)
+    nuevo_tipo = services.crear_tipo(db=db, tipo=tipo)
+    registro.refrescar(db)
+    return nuevo_tipo
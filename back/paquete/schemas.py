@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from pydantic import BaseModel
 
 # ==========================
@@ -90,17 +90,67 @@ class PaqueteArchivoOut(PaqueteBase):
     class Config:
         orm_mode = True
 
-class PaqueteRechazadoOut(PaqueteBase):
+class PaqueteRechazadoOut(BaseModel):
     """
     Schema para paquetes rechazados.
-    Incluye un motivo explicando por qué no fue aceptado.
+    Incluye un motivo explicando por qué no fue aceptado. Los campos de la
+    lectura pueden faltar si el mensaje no se pudo interpretar.
     """
     id: int
+    nodo_id: Optional[int] = None
+    type_id: Optional[int] = None
+    data: Optional[float] = None
+    timestamp: Optional[datetime] = None
     motivo: str
+    contenido: Optional[str] = None
+    recibido: Optional[datetime] = None
 
     class Config:
         orm_mode = True
 
+class ReprocesoRechazadosOut(BaseModel):
+    """
+    Resultado de reprocesar la cuarentena de paquetes rechazados.
+    """
+    evaluados: int
+    movidos: int
+    pendientes: int
+
+class AgregadoOut(BaseModel):
+    """
+    Resumen de las lecturas de un nodo y tipo en una hora o un día local.
+    `inicio` es el comienzo del intervalo; `primero` y `ultimo` son los
+    valores de la primera y la última lectura del intervalo.
+    """
+    inicio: datetime
+    cantidad: int
+    suma: float
+    promedio: float
+    minimo: float
+    maximo: float
+    primero: float
+    primero_timestamp: datetime
+    ultimo: float
+    ultimo_timestamp: datetime
+
+    class Config:
+        orm_mode = True
+
+class PuntoSerie(BaseModel):
+    timestamp: datetime
+    data: float
+
+class SerieOut(BaseModel):
+    """
+    Serie reducida para gráficos. `total` es la cantidad de lecturas en el
+    rango antes de reducirla.
+    """
+    nodo_id: int
+    type_id: int
+    metodo: str
+    total: int
+    puntos: List[PuntoSerie]
+
 # ==========================
 # PAGINACIÓN
 # ==========================
@@ -108,12 +158,20 @@ class PaqueteRechazadoOut(PaqueteBase):
 class PaginationInfo(BaseModel):
     """
     Información de paginación para respuestas que retornan listas.
-    """
-    total_items: int
-    total_pages: int
-    current_page: int
+    `total_exacto` indica si `total_items` es exacto o una estimación; si
+    no se contó el total (conteo=ninguno, o al paginar por cursor)
+    `total_items`, `total_pages` y `total_exacto` quedan en null. Al
+    paginar por cursor tampoco hay `current_page`.
+    `next_cursor` se pasa como `cursor` para pedir la página siguiente
+    (null en la última).
+    """
+    total_items: Optional[int] = None
+    total_exacto: Optional[bool] = None
+    total_pages: Optional[int] = None
+    current_page: Optional[int] = None
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
 
 class PaqueteResponse(BaseModel):
     """
@@ -122,6 +180,41 @@ class PaqueteResponse(BaseModel):
     info: PaginationInfo
     items: List[PaqueteOut]
 
+class SerieColumnar(BaseModel):
+    """
+    Lecturas de un nodo y tipo como columnas paralelas: `timestamps` en
+    milisegundos desde 1970 (UTC) y `values` con el valor de cada uno.
+    """
+    nodo_id: int
+    type_id: int
+    timestamps: List[int]
+    values: List[float]
+
+class PaqueteColumnarResponse(BaseModel):
+    """
+    Respuesta paginada de Paquetes con `format=columnar`: las lecturas de
+    la página agrupadas en una serie por (nodo_id, type_id).
+    """
+    info: PaginationInfo
+    series: List[SerieColumnar]
+
+class SerieAgregada(SerieColumnar):
+    """
+    Serie desde los agregados por hora o por día: cada timestamp es el
+    comienzo de un intervalo y `values` su promedio.
+    """
+    minimos: List[float]
+    maximos: List[float]
+    cantidades: List[int]
+
+class SeriesResponse(BaseModel):
+    """
+    Respuesta de GET /series: una serie por cada nodo y tipo pedidos, con
+    clave "nodo_id:type_id".
+    """
+    resolucion: str
+    series: Dict[str, Union[SerieAgregada, SerieColumnar]]
+
 class PaqueteArchivoResponse(BaseModel):
     """
     Respuesta paginada de PaquetesArchivo.
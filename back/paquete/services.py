@@ -1,17 +1,69 @@
-from datetime import datetime
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta
 from math import ceil
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 
-from sqlalchemy import func
+import numpy as np
+from sqlalchemy import String, and_, case, cast, delete, func, insert, or_, select, true
 from sqlalchemy.orm import Session
 
 from . import schemas
-from .models import Paquete, PaqueteArchivo, PaqueteRechazado, Tipo
+from .models import (
+    AgregadoDia,
+    AgregadoHora,
+    Paquete,
+    PaqueteArchivo,
+    PaqueteRechazado,
+    Tipo,
+    UltimaLectura,
+)
+from ..depends import columnar
+from ..depends.cache import CacheTTL
+from ..depends.config import conteo_ttl_s, desfase_local_h, series_max_lecturas
+from ..depends.muestreo import lttb, minmax
+from ..depends.versiones import incrementar_catalogo, incrementar_lecturas
+from ..nodos.models import Nodo, nodo_tipo
 
 # -------------------------------
 # Función auxiliar para filtros y orden
 # -------------------------------
-def aplicar_filtros_y_orden(
+def _hora_guardada(fecha: datetime) -> datetime:
+    """Las fechas con zona horaria se pasan a la hora local sin zona, que es
+    como se guardan los timestamps."""
+    if fecha.tzinfo is not None:
+        return fecha.astimezone().replace(tzinfo=None)
+    return fecha
+
+
+def _medianoche(fecha: datetime) -> datetime:
+    return fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rango_de_fechas(
+    start_date: Optional[datetime], end_date: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    [desde, hasta) de timestamps guardados para los filtros de fecha, o
+    (None, None) si no se filtra por fecha. `end_date` es exclusivo, salvo
+    que sea una fecha sin hora: entonces incluye ese día entero, como al
+    elegir un rango de días en el dashboard. Sin `end_date` se filtra hasta
+    el final del día de `start_date`.
+    """
+    if not start_date:
+        return None, None
+    desde = _hora_guardada(start_date)
+    if end_date is None:
+        return desde, _medianoche(desde) + timedelta(days=1)
+    hasta = _hora_guardada(end_date)
+    if hasta == _medianoche(hasta):
+        hasta += timedelta(days=1)
+    return desde, hasta
+
+
+def aplicar_filtros(
     query,
     Model,
     nodo_id: Optional[int] = None,
@@ -19,30 +71,271 @@ def aplicar_filtros_y_orden(
     end_date: Optional[datetime] = None,
     data_min: Optional[float] = None,
     data_max: Optional[float] = None,
-    order_by: Optional[str] = None,
-    order: str = "asc",
     type_id: Optional[int] = None,
 ):
-    # Filtros
     if type_id is not None:
         query = query.filter(Model.type_id == type_id)
     if nodo_id is not None:
         query = query.filter(Model.nodo_id == nodo_id)
-    if start_date and end_date:
-        query = query.filter(func.date(Model.timestamp).between(start_date.date(), end_date.date()))
-    elif start_date:
-        query = query.filter(func.date(Model.timestamp) == start_date.date())
+    # Rango semiabierto sobre la columna tal cual, para que use los índices
+    desde, hasta = rango_de_fechas(start_date, end_date)
+    if desde is not None:
+        query = query.filter(Model.timestamp >= desde, Model.timestamp < hasta)
     if data_min is not None:
         query = query.filter(Model.data >= data_min)
     if data_max is not None:
         query = query.filter(Model.data <= data_max)
+    return query
+
 
-    # Orden dinámico (solo si la columna existe)
+def columna_de_orden(Model, order_by: Optional[str]):
+    """Columna por la que se ordena: `order_by` si existe en el modelo, si no `id`."""
     if order_by and hasattr(Model, order_by):
-        column = getattr(Model, order_by)
-        query = query.order_by(column.desc() if order.lower() == "desc" else column)
+        return getattr(Model, order_by)
+    return Model.id
 
-    return query
+
+def aplicar_filtros_y_orden(
+    query,
+    Model,
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    order_by: Optional[str] = None,
+    order: str = "asc",
+    type_id: Optional[int] = None,
+):
+    # Filtros
+    query = aplicar_filtros(query, Model, nodo_id, start_date, end_date, data_min, data_max, type_id)
+
+    # Orden dinámico por la columna pedida (si existe) y luego por id, para
+    # que el orden sea total y las páginas no se solapen
+    column = columna_de_orden(Model, order_by)
+    desc = order.lower() == "desc"
+    if column is not Model.id:
+        query = query.order_by(column.desc() if desc else column)
+    return query.order_by(Model.id.desc() if desc else Model.id)
+
+
+# -------------------------------
+# Paginación por cursor (keyset)
+# -------------------------------
+def codificar_cursor(order_by: str, order: str, valor, id: int) -> str:
+    """Cursor opaco con la posición (valor de la columna de orden, id) de la
+    última fila de una página."""
+    if isinstance(valor, datetime):
+        valor = {"t": valor.isoformat()}
+    contenido = json.dumps([order_by, order, valor, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, order_by: str, order: str) -> tuple:
+    """Retorna (valor, id) del cursor. Lanza ValueError si el cursor es
+    inválido o se generó con otro orden."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        columna, orden, valor, id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if isinstance(valor, dict):
+            valor = datetime.fromisoformat(valor["t"])
+        id = int(id)
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("cursor inválido") from e
+    if (columna, orden) != (order_by, order):
+        raise ValueError("el cursor corresponde a otro orden")
+    return valor, id
+
+
+def aplicar_cursor(query, Model, column, desc: bool, valor, id: int):
+    """Filas posteriores a (valor, id) en el orden (column, id).
+
+    Se escribe como `column >= valor AND (column > valor OR id > ultimo)`
+    para que la base pueda usar el índice de la columna como rango.
+    """
+    if column is Model.id:
+        return query.filter(Model.id < id if desc else Model.id > id)
+    if desc:
+        return query.filter(column <= valor, or_(column < valor, Model.id < id))
+    return query.filter(column >= valor, or_(column > valor, Model.id > id))
+
+
+def paginar(
+    query,
+    Model,
+    limit: Optional[int],
+    offset: int,
+    order_by: Optional[str],
+    order: str,
+    cursor: Optional[str] = None,
+    conteo: Optional[str] = None,
+    filtros: Optional[dict] = None,
+):
+    """
+    Pagina una consulta ya filtrada y ordenada con `aplicar_filtros_y_orden`.
+
+    Con `cursor` sigue desde la última fila de la página anterior con un
+    WHERE en lugar de OFFSET, así que cuesta lo mismo en cualquier página y
+    no saltea ni repite filas si llegan nuevas mientras se pagina. Si la
+    página viene llena se retorna `next_cursor`, también en el modo por página.
+    `conteo` elige cómo se obtiene el total (ver `contar`); por defecto
+    "exacto" por página y "ninguno" por cursor. `filtros` son los mismos
+    filtros aplicados a la consulta.
+    Retorna (items, info).
+    """
+    order = "desc" if order.lower() == "desc" else "asc"
+    column = columna_de_orden(Model, order_by)
+    clave_orden = column.key
+    if conteo is None:
+        conteo = "ninguno" if cursor else "exacto"
+    total_items, total_exacto = contar(query.session, Model, query, conteo, filtros or {})
+
+    if cursor:
+        valor, ultimo_id = decodificar_cursor(cursor, clave_orden, order)
+        query = aplicar_cursor(query, Model, column, order == "desc", valor, ultimo_id)
+        limit = limit or 100
+        items = query.limit(limit).all()
+        info = schemas.PaginationInfo(
+            total_items=total_items, total_exacto=total_exacto, limit=limit, offset=0
+        )
+    else:
+        if not limit or limit <= 0:
+            limit = None
+        pagina = query.offset(offset)
+        items = (pagina.limit(limit) if limit else pagina).all()
+        total_pages = None
+        if total_items is not None:
+            total_pages = ceil(total_items / limit) if limit else 1
+        info = schemas.PaginationInfo(
+            total_items=total_items,
+            total_exacto=total_exacto,
+            total_pages=total_pages,
+            current_page=(offset // limit) + 1 if limit else 1,
+            limit=limit or len(items),
+            offset=offset,
+        )
+
+    if items and limit and len(items) == limit:
+        ultimo = items[-1]
+        info.next_cursor = codificar_cursor(
+            clave_orden, order, getattr(ultimo, clave_orden), ultimo.id
+        )
+    return items, info
+
+
+# -------------------------------
+# Total de los listados paginados
+# -------------------------------
+cache_conteos = CacheTTL(conteo_ttl_s)
+
+
+def clave_conteo(Model, nodo_id=None, start_date=None, end_date=None, data_min=None, data_max=None, type_id=None):
+    """Clave de `cache_conteos`: filtros que dejan pasar las mismas filas dan la misma clave."""
+    return (Model.__tablename__, nodo_id, type_id, *rango_de_fechas(start_date, end_date), data_min, data_max)
+
+
+def contar_desde_agregados(
+    db: Session,
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    type_id: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Cantidad estimada de filas de `paquetes` que pasan los filtros, sumada
+    de los agregados en lugar de recorrer la tabla. Retorna None si el rango
+    de fechas no empieza y termina en bordes de hora local.
+
+    Es una estimación: los agregados pueden no coincidir con `paquetes`
+    (filas cargadas antes de calcularlos, o borradas a mano). Con
+    `data_min`/`data_max` cada hora entra entera si su [mínimo, máximo] cae
+    dentro del rango, no entra si cae afuera y, si lo cruza, en proporción
+    a la parte que se solapa.
+    """
+    por_valor = data_min is not None or data_max is not None
+    desde, hasta = rango_de_fechas(start_date, end_date)
+    # Bordes del rango en hora local, que es como se agrupan los agregados
+    bordes = [borde + DESFASE_LOCAL - datetime.min for borde in (desde, hasta) if borde is not None]
+    if not por_valor and all(borde % timedelta(days=1) == timedelta(0) for borde in bordes):
+        modelo = AgregadoDia
+    elif all(borde % timedelta(hours=1) == timedelta(0) for borde in bordes):
+        modelo = AgregadoHora
+    else:
+        return None
+
+    condiciones = []
+    if nodo_id is not None:
+        condiciones.append(modelo.nodo_id == nodo_id)
+    if type_id is not None:
+        condiciones.append(modelo.type_id == type_id)
+    if desde is not None:
+        condiciones += [modelo.inicio >= desde + DESFASE_LOCAL, modelo.inicio < hasta + DESFASE_LOCAL]
+
+    if not por_valor:
+        return int(db.query(func.coalesce(func.sum(modelo.cantidad), 0)).filter(*condiciones).scalar())
+
+    if db.get_bind().dialect.name == "postgresql":
+        menor, mayor = func.least, func.greatest
+    else:
+        menor, mayor = func.min, func.max
+    dentro, fuera = [], []
+    arriba, abajo = modelo.maximo, modelo.minimo
+    if data_min is not None:
+        dentro.append(modelo.minimo >= data_min)
+        fuera.append(modelo.maximo < data_min)
+        abajo = mayor(modelo.minimo, data_min)
+    if data_max is not None:
+        dentro.append(modelo.maximo <= data_max)
+        fuera.append(modelo.minimo > data_max)
+        arriba = menor(modelo.maximo, data_max)
+    # Si cruza el rango, máximo > mínimo
+    proporcion = (arriba - abajo) / (modelo.maximo - modelo.minimo)
+    total = (
+        db.query(
+            func.sum(case((and_(*dentro), modelo.cantidad), (or_(*fuera), 0), else_=modelo.cantidad * proporcion))
+        )
+        .filter(*condiciones)
+        .scalar()
+    )
+    return int(round(total or 0))
+
+
+def contar(db: Session, Model, query, modo: str, filtros: dict) -> Tuple[Optional[int], Optional[bool]]:
+    """
+    Total de filas de `query` (filtrada con `filtros`) según `modo`.
+    Retorna (total, exacto); (None, None) con "ninguno".
+
+    - exacto: COUNT.
+    - cache: como exacto, pero reutiliza un COUNT de hace menos de
+      `CONTEO_TTL_S` segundos con los mismos filtros (aproximado: pueden
+      haber llegado filas).
+    - estimado: nunca recorre la tabla si puede evitarlo; usa los agregados
+      (proporcionales con data_min/data_max), la caché o, sin filtros, el
+      rango de ids. El total nunca se marca como exacto.
+    - ninguno: no cuenta.
+    """
+    if modo == "ninguno":
+        return None, None
+    if modo == "estimado" and Model is Paquete:
+        agregados = contar_desde_agregados(db, **filtros)
+        if agregados is not None:
+            return agregados, False
+
+    clave = clave_conteo(Model, **filtros)
+    if modo in ("cache", "estimado"):
+        guardado = cache_conteos.obtener(clave)
+        if guardado is not None:
+            return guardado, False
+    if modo == "estimado" and not any(v is not None for v in filtros.values()):
+        # Sin filtros: el rango de ids (sobreestima si se borraron filas)
+        return db.query(func.coalesce(func.max(Model.id) - func.min(Model.id) + 1, 0)).scalar(), False
+
+    # El orden no cambia el total y evita que el motor ordene para contar
+    total = query.order_by(None).count()
+    cache_conteos.guardar(clave, total)
+    return total, True
 
 
 # -------------------------------
@@ -67,6 +360,11 @@ def get_tipo(db: Session, tipo_id: int) -> Tipo:
 # -------------------------------
 # Listar Paquetes
 # -------------------------------
+def columnas_de_salida(Model) -> list:
+    """Columnas de `PaqueteOut`, en su orden, para leer filas como tuplas."""
+    return [getattr(Model, campo) for campo in schemas.PaqueteOut.model_fields]
+
+
 def listar_paquetes(
     db: Session,
     limit: Optional[int] = None,
@@ -79,30 +377,184 @@ def listar_paquetes(
     order_by: Optional[str] = None,
     order: str = "asc",
     type_id: Optional[int] = None,
-) -> schemas.PaqueteResponse:
-    query = db.query(Paquete)
+    cursor: Optional[str] = None,
+    conteo: Optional[str] = None,
+    formato: str = "json",
+) -> dict:
+    """
+    Página de paquetes con la forma de `schemas.PaqueteResponse`, ya lista
+    para `RespuestaJSON`: se leen solo las columnas de `PaqueteOut` como
+    tuplas (sin instanciar modelos ni validar cada fila) y se devuelven como
+    dicts. Con `formato="columnar"` las filas de la página se agrupan por
+    serie (ver `series_columnares`), con la forma de
+    `schemas.PaqueteColumnarResponse`.
+    """
+    filtros = dict(
+        nodo_id=nodo_id,
+        start_date=start_date,
+        end_date=end_date,
+        data_min=data_min,
+        data_max=data_max,
+        type_id=type_id,
+    )
     query = aplicar_filtros_y_orden(
-        query, Paquete, nodo_id, start_date, end_date, data_min, data_max, order_by, order, type_id
+        db.query(*columnas_de_salida(Paquete)), Paquete, order_by=order_by, order=order, **filtros
     )
+    items, info = paginar(query, Paquete, limit, offset, order_by, order, cursor, conteo, filtros)
 
-    # Paginación
-    total_items = query.count()
-    if not limit or limit <= 0:
-        limit = total_items
-    items = query.offset(offset).limit(limit).all()
-    total_pages = ceil(total_items / limit) if limit > 0 else 1
-    current_page = (offset // limit) + 1 if limit > 0 else 1
+    if formato == "columnar":
+        return {"info": info.model_dump(), "series": series_columnares(items)}
+    return {"info": info.model_dump(), "items": [fila._asdict() for fila in items]}
 
-    return schemas.PaqueteResponse(
-        info=schemas.PaginationInfo(
-            total_items=total_items,
-            total_pages=total_pages,
-            current_page=current_page,
-            limit=limit,
-            offset=offset,
-        ),
-        items=[schemas.PaqueteOut.model_validate(p, from_attributes=True) for p in items],
+
+def epoch_ms(fechas: List[datetime]) -> np.ndarray:
+    """
+    Milisegundos desde 1970 (UTC) de timestamps guardados en hora local sin
+    zona. La conversión es vectorizada; el desfase con UTC se calcula una
+    vez por hora distinta, así que respeta cambios de horario.
+    """
+    locales = np.asarray(fechas, dtype="datetime64[ms]").astype(np.int64)
+    horas, posiciones = np.unique(locales // 3_600_000, return_inverse=True)
+    desfases = np.array(
+        [
+            (EPOCA + timedelta(hours=int(hora))).astimezone().utcoffset() // timedelta(milliseconds=1)
+            for hora in horas
+        ],
+        dtype=np.int64,
     )
+    return locales - desfases[posiciones]
+
+
+def series_columnares(filas: List[tuple]) -> List[dict]:
+    """
+    Agrupa filas (nodo_id, type_id, data, timestamp, ...) en una serie por
+    (nodo_id, type_id), ordenadas por nodo y tipo, con los timestamps (ms
+    desde 1970) y los valores como listas paralelas. Dentro de cada serie
+    se mantiene el orden de las filas. Se arma con arrays de NumPy por
+    columna, sin un objeto por fila.
+    """
+    if not filas:
+        return []
+    nodos, tipos, valores, fechas = (np.array(columna) for columna in list(zip(*filas))[:4])
+    # Orden estable por (nodo, tipo): cada serie queda contigua y en el orden de la página
+    orden = np.lexsort((tipos, nodos))
+    return partir_por_serie(
+        nodos[orden],
+        tipos[orden],
+        timestamps=epoch_ms(fechas)[orden],
+        values=valores[orden].astype(np.float64),
+    )
+
+
+def partir_por_serie(nodos: np.ndarray, tipos: np.ndarray, **columnas: np.ndarray) -> List[dict]:
+    """
+    Corta columnas paralelas, ya ordenadas de modo que cada (nodo, tipo)
+    quede contiguo, en un dict por serie con `nodo_id`, `type_id` y cada
+    columna como lista.
+    """
+    if not len(nodos):
+        return []
+    cortes = np.flatnonzero((np.diff(nodos) != 0) | (np.diff(tipos) != 0)) + 1
+    inicios = np.concatenate(([0], cortes))
+    tramos = {nombre: np.split(columna, cortes) for nombre, columna in columnas.items()}
+    return [
+        {
+            "nodo_id": int(nodos[inicio]),
+            "type_id": int(tipos[inicio]),
+            **{nombre: partes[i].tolist() for nombre, partes in tramos.items()},
+        }
+        for i, inicio in enumerate(inicios)
+    ]
+
+
+# -------------------------------
+# Varias series en una consulta
+# -------------------------------
+def series_multiples(
+    db: Session,
+    nodos: List[int],
+    tipos: List[int],
+    resolucion: str = "lectura",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """
+    Series de cada combinación de `nodos` y `tipos` en [start, end), con una
+    sola consulta ordenada por (nodo_id, type_id, timestamp) que recorre el
+    índice único de `paquetes`. Cada serie trae `timestamps` (ms desde 1970)
+    y `values` como listas; las combinaciones sin lecturas vienen vacías.
+
+    Con resolucion "hora" o "dia" se responde desde los agregados: un punto
+    por intervalo (timestamp de su comienzo) con el promedio en `values` y
+    además `minimos`, `maximos` y `cantidades`.
+    Lanza ValueError si con resolucion "lectura" hay más de
+    `series_max_lecturas` lecturas.
+    """
+    nodos, tipos = sorted(set(nodos)), sorted(set(tipos))
+    desde = _hora_guardada(start) if start is not None else None
+    hasta = _hora_guardada(end) if end is not None else None
+
+    if resolucion == "lectura":
+        modelo, columna_tiempo = Paquete, Paquete.timestamp
+        consulta = select(Paquete.nodo_id, Paquete.type_id, cast(Paquete.timestamp, String), Paquete.data)
+        if desde is not None:
+            consulta = consulta.where(Paquete.timestamp >= desde)
+        if hasta is not None:
+            consulta = consulta.where(Paquete.timestamp < hasta)
+        consulta = consulta.limit(series_max_lecturas + 1)
+    else:
+        modelo = RESOLUCIONES[resolucion]
+        columna_tiempo = modelo.inicio
+        consulta = select(
+            modelo.nodo_id,
+            modelo.type_id,
+            cast(modelo.inicio, String),
+            modelo.suma / modelo.cantidad,
+            modelo.minimo,
+            modelo.maximo,
+            modelo.cantidad,
+        )
+        # Los intervalos se guardan en hora local: los que empiezan en el rango
+        if desde is not None:
+            consulta = consulta.where(modelo.inicio >= INICIOS[modelo](desde))
+        if hasta is not None:
+            consulta = consulta.where(modelo.inicio < hasta + DESFASE_LOCAL)
+    consulta = consulta.where(modelo.nodo_id.in_(nodos), modelo.type_id.in_(tipos)).order_by(
+        modelo.nodo_id, modelo.type_id, columna_tiempo
+    )
+    # Por la conexión (Core): las filas llegan como tuplas, sin pasar por el ORM
+    filas = db.connection().execute(consulta).all()
+    if resolucion == "lectura" and len(filas) > series_max_lecturas:
+        raise ValueError(
+            f"Más de {series_max_lecturas} lecturas: pedir un rango más corto o resolucion=hora|dia"
+        )
+
+    series = {
+        f"{nodo}:{tipo}": {"nodo_id": nodo, "type_id": tipo, "timestamps": [], "values": []}
+        for nodo in nodos
+        for tipo in tipos
+    }
+    if filas:
+        columnas = list(zip(*filas))
+        # Las marcas de tiempo llegan como texto: NumPy las convierte de una vez
+        fechas = np.array(columnas[2], dtype="datetime64[ms]")
+        extras = {}
+        if resolucion != "lectura":
+            fechas = fechas - np.timedelta64(DESFASE_LOCAL // timedelta(milliseconds=1), "ms")
+            extras = dict(
+                minimos=np.array(columnas[4], dtype=np.float64),
+                maximos=np.array(columnas[5], dtype=np.float64),
+                cantidades=np.array(columnas[6], dtype=np.int64),
+            )
+        for serie in partir_por_serie(
+            np.array(columnas[0]),
+            np.array(columnas[1]),
+            timestamps=epoch_ms(fechas),
+            values=np.array(columnas[3], dtype=np.float64),
+            **extras,
+        ):
+            series[f"{serie['nodo_id']}:{serie['type_id']}"] = serie
+    return {"resolucion": resolucion, "series": series}
 
 # -------------------------------
 # Listar Paquetes Archivo
@@ -119,42 +571,477 @@ def listar_paquetes_archivo(
     order_by: Optional[str] = None,
     order: str = "asc",
     type_id: Optional[int] = None,
-) -> schemas.PaqueteArchivoResponse:
-    query = db.query(PaqueteArchivo)
+    cursor: Optional[str] = None,
+    conteo: Optional[str] = None,
+) -> dict:
+    """
+    Página de paquetes archivados con la forma de
+    `schemas.PaqueteArchivoResponse`, armada como en `listar_paquetes`.
+    """
+    filtros = dict(
+        nodo_id=nodo_id,
+        start_date=start_date,
+        end_date=end_date,
+        data_min=data_min,
+        data_max=data_max,
+        type_id=type_id,
+    )
     query = aplicar_filtros_y_orden(
-        query, PaqueteArchivo, nodo_id, start_date, end_date, data_min, data_max, order_by, order, type_id
+        db.query(*columnas_de_salida(PaqueteArchivo)), PaqueteArchivo, order_by=order_by, order=order, **filtros
     )
+    items, info = paginar(query, PaqueteArchivo, limit, offset, order_by, order, cursor, conteo, filtros)
 
-    # Paginación
-    total_items = query.count()
-    if not limit or limit <= 0:
-        limit = total_items
-    items = query.offset(offset).limit(limit).all()
-    total_pages = ceil(total_items / limit) if limit > 0 else 1
-    current_page = (offset // limit) + 1 if limit > 0 else 1
+    # Pocos tipos: se serializan una vez y se repiten en cada fila
+    tipos = {}
+    if items:
+        tipos = {t.id: schemas.TipoOut.model_validate(t, from_attributes=True).model_dump() for t in db.query(Tipo)}
+    return {
+        "info": info.model_dump(),
+        "items": [{**fila._asdict(), "type": tipos.get(fila.type_id)} for fila in items],
+    }
 
-    return schemas.PaqueteArchivoResponse(
-        info=schemas.PaginationInfo(
-            total_items=total_items,
-            total_pages=total_pages,
-            current_page=current_page,
-            limit=limit,
-            offset=offset,
-        ),
-        items=[schemas.PaqueteArchivoOut.model_validate(p, from_attributes=True) for p in items],
+# -------------------------------
+# Exportar Paquetes
+# -------------------------------
+COLUMNAS_EXPORTACION = ("id", "nodo_id", "type_id", "data", "timestamp")
+
+
+def lotes_exportacion(
+    db: Session,
+    Model,
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    order_by: Optional[str] = None,
+    order: str = "asc",
+    type_id: Optional[int] = None,
+    tamanio_lote: int = 5000,
+) -> Iterator[list]:
+    """
+    Filas de `Model` que pasan los filtros, como tuplas con las
+    `COLUMNAS_EXPORTACION`, en lotes de `tamanio_lote`. Se leen con
+    `yield_per` (sin instanciar modelos ni schemas), así que la memoria no
+    depende de cuántas filas haya. El timestamp viene como texto, tal como
+    lo guarda la base.
+    """
+    columnas = [getattr(Model, columna) for columna in COLUMNAS_EXPORTACION[:-1]]
+    # El timestamp sale como texto de la base: ahorra convertirlo a datetime y de vuelta
+    columnas.append(cast(Model.timestamp, String))
+    consulta = aplicar_filtros_y_orden(
+        select(*columnas), Model, nodo_id, start_date, end_date, data_min, data_max, order_by, order, type_id
     )
+    # Por la conexión y no la sesión: filas de Core, sin la carga del ORM
+    resultado = db.connection().execute(consulta, execution_options={"yield_per": tamanio_lote})
+    yield from resultado.partitions()
 
 
+def exportar_paquetes(
+    db: Session,
+    Model,
+    formato: str = "csv",
+    nodo_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    data_min: Optional[float] = None,
+    data_max: Optional[float] = None,
+    order_by: Optional[str] = None,
+    order: str = "asc",
+    type_id: Optional[int] = None,
+    tamanio_lote: Optional[int] = None,
+) -> Iterator:
+    """
+    Genera el archivo exportado por partes, una por lote de
+    `lotes_exportacion`: texto para "csv" y "ndjson", bytes para "parquet"
+    (un row group por lote) y "arrow" (stream IPC). Los formatos columnares
+    usan lotes más grandes y necesitan pyarrow.
+    """
+    binario = formato in ("parquet", "arrow")
+    lotes = lotes_exportacion(
+        db, Model, nodo_id, start_date, end_date, data_min, data_max, order_by, order, type_id,
+        tamanio_lote or (100_000 if binario else 5000),
+    )
 
-def crear_paquete(db: Session, paquete: schemas.PaqueteCreate) -> schemas.PaqueteCreate:
+    if formato == "parquet":
+        yield from columnar.trozos_parquet(lotes)
+    elif formato == "arrow":
+        yield from columnar.trozos_arrow(lotes)
+    elif formato == "csv":
+        yield ",".join(COLUMNAS_EXPORTACION) + "\n"
+        for lote in lotes:
+            texto = io.StringIO()
+            csv.writer(texto, lineterminator="\n").writerows(lote)
+            yield texto.getvalue()
+    else:
+        for lote in lotes:
+            yield "".join(
+                json.dumps(
+                    {"id": id, "nodo_id": nodo, "type_id": tipo, "data": data, "timestamp": timestamp.replace(" ", "T", 1)}
+                ) + "\n"
+                for id, nodo, tipo, data, timestamp in lote
+            )
+
+
+def crear_paquete(db: Session, paquete: schemas.PaqueteCreate) -> Paquete:
     """
-    Crea un paquete válido en la base de datos.
+    Crea un paquete válido en la base de datos. Pasa por `crear_paquetes_lote`
+    para mantener `ultimas_lecturas`, los agregados y la versión del nodo;
+    si ya existía (mismo nodo, tipo y timestamp) devuelve el guardado.
     """
-    nuevo_paquete = Paquete(**paquete.model_dump())
-    db.add(nuevo_paquete)
+    if paquete.timestamp is None:
+        paquete = paquete.model_copy(update={"timestamp": datetime.now()})
+    crear_paquetes_lote(db, [paquete])
     db.commit()
-    db.refresh(nuevo_paquete)
-    return nuevo_paquete
+    return (
+        db.query(Paquete)
+        .filter(
+            Paquete.nodo_id == paquete.nodo_id,
+            Paquete.type_id == paquete.type_id,
+            Paquete.timestamp == paquete.timestamp,
+        )
+        .one()
+    )
+
+
+def crear_paquetes_lote(db: Session, paquetes: List[schemas.PaqueteCreate]) -> int:
+    """
+    Inserta un lote de paquetes con un único INSERT multi-fila.
+    Acepta `PaqueteCreate` o cualquier objeto con los mismos atributos
+    (p.ej. las lecturas del pipeline de ingesta).
+    Las lecturas repetidas (mismo nodo, tipo y timestamp) se ignoran.
+    También actualiza `ultimas_lecturas`, los agregados y la versión de
+    las lecturas de cada nodo del lote.
+    No hace commit: la transacción la maneja quien llama.
+    Retorna la cantidad de paquetes insertados.
+    """
+    if not paquetes:
+        return 0
+    filas = [
+        {
+            "nodo_id": p.nodo_id,
+            "type_id": p.type_id,
+            "data": p.data,
+            "timestamp": p.timestamp or datetime.now(),
+        }
+        for p in paquetes
+    ]
+    insertados = Paquete.insert_ignore(db, filas)
+    lecturas = [(f["nodo_id"], f["type_id"], f["data"], f["timestamp"]) for f in filas]
+    actualizar_ultimas_lecturas(db, lecturas)
+    actualizar_agregados(db, lecturas, insertados)
+    if insertados:
+        incrementar_lecturas(db, {f["nodo_id"] for f in filas})
+    return insertados
+
+
+# -------------------------------
+# Últimas lecturas por nodo y tipo
+# -------------------------------
+def actualizar_ultimas_lecturas(db: Session, lecturas: List[tuple]) -> None:
+    """
+    Actualiza `ultimas_lecturas` con tuplas (nodo_id, type_id, data, timestamp).
+    Se queda con la más reciente de cada nodo y tipo del lote y solo pisa la
+    guardada si es más nueva, así que el orden de los lotes no importa.
+    No hace commit.
+    """
+    ultimas = {}
+    for nodo_id, type_id, data, timestamp in lecturas:
+        actual = ultimas.get((nodo_id, type_id))
+        if actual is None or timestamp > actual[1]:
+            ultimas[(nodo_id, type_id)] = (data, timestamp)
+    UltimaLectura.upsert(
+        db,
+        [
+            {"nodo_id": nodo_id, "type_id": type_id, "data": data, "timestamp": timestamp}
+            for (nodo_id, type_id), (data, timestamp) in ultimas.items()
+        ],
+        ["nodo_id", "type_id"],
+        condicion=lambda tabla, nuevos: tabla.c.timestamp < nuevos.timestamp,
+    )
+
+
+
+# -------------------------------
+# Agregados por hora y por día
+# -------------------------------
+RESOLUCIONES = {"hora": AgregadoHora, "dia": AgregadoDia}
+DESFASE_LOCAL = timedelta(hours=desfase_local_h)
+CLAVES_AGREGADO = ["nodo_id", "type_id", "inicio"]
+
+
+def inicio_hora(timestamp: datetime) -> datetime:
+    """Comienzo de la hora local de un timestamp guardado."""
+    return (timestamp + DESFASE_LOCAL).replace(minute=0, second=0, microsecond=0)
+
+
+def inicio_dia(timestamp: datetime) -> datetime:
+    """Comienzo del día local (medianoche UTC-3) de un timestamp guardado."""
+    return (timestamp + DESFASE_LOCAL).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+INICIOS = {AgregadoHora: inicio_hora, AgregadoDia: inicio_dia}
+
+
+def resumir(lecturas: List[tuple], inicio_de) -> List[dict]:
+    """Agrupa tuplas (nodo_id, type_id, data, timestamp) por nodo, tipo e
+    intervalo, con las columnas de los agregados."""
+    # [cantidad, suma, mínimo, máximo, primero, primero_ts, último, último_ts]
+    resumen = {}
+    for nodo_id, type_id, data, timestamp in lecturas:
+        clave = (nodo_id, type_id, inicio_de(timestamp))
+        fila = resumen.get(clave)
+        if fila is None:
+            resumen[clave] = [1, data, data, data, data, timestamp, data, timestamp]
+            continue
+        fila[0] += 1
+        fila[1] += data
+        if data < fila[2]:
+            fila[2] = data
+        elif data > fila[3]:
+            fila[3] = data
+        if timestamp < fila[5]:
+            fila[4], fila[5] = data, timestamp
+        elif timestamp > fila[7]:
+            fila[6], fila[7] = data, timestamp
+    return [
+        {
+            "nodo_id": nodo_id,
+            "type_id": type_id,
+            "inicio": inicio,
+            "cantidad": cantidad,
+            "suma": suma,
+            "minimo": minimo,
+            "maximo": maximo,
+            "primero": primero,
+            "primero_timestamp": primero_timestamp,
+            "ultimo": ultimo,
+            "ultimo_timestamp": ultimo_timestamp,
+        }
+        for (nodo_id, type_id, inicio), (
+            cantidad, suma, minimo, maximo, primero, primero_timestamp, ultimo, ultimo_timestamp
+        ) in resumen.items()
+    ]
+
+
+def _combinar_agregados(db: Session):
+    """Expresiones del upsert que suman un resumen nuevo al existente."""
+    if db.get_bind().dialect.name == "postgresql":
+        menor, mayor = func.least, func.greatest
+    else:
+        # En SQLite MIN/MAX con dos argumentos son escalares
+        menor, mayor = func.min, func.max
+
+    def valores(tabla, nuevos) -> dict:
+        return {
+            "cantidad": tabla.c.cantidad + nuevos.cantidad,
+            "suma": tabla.c.suma + nuevos.suma,
+            "minimo": menor(tabla.c.minimo, nuevos.minimo),
+            "maximo": mayor(tabla.c.maximo, nuevos.maximo),
+            "primero": case(
+                (nuevos.primero_timestamp < tabla.c.primero_timestamp, nuevos.primero),
+                else_=tabla.c.primero,
+            ),
+            "primero_timestamp": menor(tabla.c.primero_timestamp, nuevos.primero_timestamp),
+            "ultimo": case(
+                (nuevos.ultimo_timestamp > tabla.c.ultimo_timestamp, nuevos.ultimo),
+                else_=tabla.c.ultimo,
+            ),
+            "ultimo_timestamp": mayor(tabla.c.ultimo_timestamp, nuevos.ultimo_timestamp),
+        }
+
+    return valores
+
+
+def sumar_a_agregados(db: Session, lecturas: List[tuple]) -> None:
+    """Suma lecturas nuevas (tuplas nodo_id, type_id, data, timestamp) a los
+    agregados por hora y por día. No hace commit."""
+    valores = _combinar_agregados(db)
+    for modelo, inicio_de in INICIOS.items():
+        modelo.upsert(db, resumir(lecturas, inicio_de), CLAVES_AGREGADO, valores=valores)
+
+
+def rangos_por_serie(lecturas: List[tuple]) -> Dict[Tuple[int, int], Tuple[datetime, datetime]]:
+    """{(nodo_id, type_id): (timestamp mínimo, timestamp máximo)} de las lecturas."""
+    rangos = {}
+    for nodo_id, type_id, _, timestamp in lecturas:
+        actual = rangos.get((nodo_id, type_id))
+        if actual is None:
+            rangos[(nodo_id, type_id)] = (timestamp, timestamp)
+        else:
+            rangos[(nodo_id, type_id)] = (min(actual[0], timestamp), max(actual[1], timestamp))
+    return rangos
+
+
+def recalcular_agregados(
+    db: Session, rangos: Dict[Tuple[int, int], Tuple[datetime, datetime]]
+) -> None:
+    """Vuelve a calcular desde `paquetes` los agregados de los días locales
+    que tocan `rangos` ({(nodo_id, type_id): (desde, hasta)}). No hace commit."""
+    for (nodo_id, type_id), (desde, hasta) in rangos.items():
+        primer_dia = inicio_dia(desde)
+        fin = inicio_dia(hasta) + timedelta(days=1)
+        for modelo in INICIOS:
+            db.execute(
+                delete(modelo).where(
+                    modelo.nodo_id == nodo_id,
+                    modelo.type_id == type_id,
+                    modelo.inicio >= primer_dia,
+                    modelo.inicio < fin,
+                )
+            )
+        lecturas = db.execute(
+            select(Paquete.nodo_id, Paquete.type_id, Paquete.data, Paquete.timestamp).where(
+                Paquete.nodo_id == nodo_id,
+                Paquete.type_id == type_id,
+                Paquete.timestamp >= primer_dia - DESFASE_LOCAL,
+                Paquete.timestamp < fin - DESFASE_LOCAL,
+            )
+        ).all()
+        sumar_a_agregados(db, lecturas)
+
+
+def actualizar_agregados(db: Session, lecturas: List[tuple], insertadas: int) -> None:
+    """Mantiene los agregados después de insertar `lecturas` ignorando duplicadas.
+
+    Si entraron todas se suman directamente; si alguna era repetida no se
+    sabe cuáles, así que se recalculan los días que tocan. No hace commit.
+    """
+    if insertadas == len(lecturas):
+        sumar_a_agregados(db, lecturas)
+    else:
+        recalcular_agregados(db, rangos_por_serie(lecturas))
+
+
+def reconstruir_agregados(
+    db: Session, desde: Optional[datetime] = None, tamanio_lote: int = 50_000
+) -> int:
+    """Borra y vuelve a calcular los agregados desde `paquetes` (todos, o los
+    de los días locales a partir de `desde`). No hace commit.
+    Retorna la cantidad de lecturas procesadas."""
+    consulta = select(Paquete.nodo_id, Paquete.type_id, Paquete.data, Paquete.timestamp)
+    for modelo in INICIOS:
+        borrar = delete(modelo)
+        if desde is not None:
+            borrar = borrar.where(modelo.inicio >= inicio_dia(desde - DESFASE_LOCAL))
+        db.execute(borrar)
+    if desde is not None:
+        consulta = consulta.where(Paquete.timestamp >= inicio_dia(desde - DESFASE_LOCAL) - DESFASE_LOCAL)
+
+    procesadas = 0
+    resultado = db.execute(consulta.execution_options(yield_per=tamanio_lote))
+    for lote in resultado.partitions():
+        sumar_a_agregados(db, lote)
+        procesadas += len(lote)
+    return procesadas
+
+
+def listar_agregados(
+    db: Session,
+    nodo_id: int,
+    type_id: int,
+    resolucion: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> list:
+    """
+    Agregados de un nodo y tipo ordenados por `inicio`. `start` y `end` son
+    hora local (las fechas con zona se pasan a hora local); se incluyen los
+    intervalos que empiezan en [start, end), contando el que contiene a
+    `start`.
+    """
+    modelo = RESOLUCIONES[resolucion]
+    query = db.query(modelo).filter(modelo.nodo_id == nodo_id, modelo.type_id == type_id)
+    if start is not None:
+        # `start` ya es hora local: se redondea sin aplicar el desfase
+        query = query.filter(modelo.inicio >= INICIOS[modelo](_hora_guardada(start) - DESFASE_LOCAL))
+    if end is not None:
+        query = query.filter(modelo.inicio < _hora_guardada(end))
+    return query.order_by(modelo.inicio).all()
+
+
+# -------------------------------
+# Serie reducida para gráficos
+# -------------------------------
+EPOCA = datetime(1970, 1, 1)
+
+
+def columnas_serie(
+    db: Session,
+    nodo_id: int,
+    type_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Timestamps (segundos desde 1970, sin zona) y valores de una serie en
+    [start, end), ordenados, como arrays de NumPy. Se leen las dos columnas
+    sin armar objetos por fila.
+    """
+    if start is not None:
+        start = _hora_guardada(start)
+    if end is not None:
+        end = _hora_guardada(end)
+    if db.get_bind().dialect.name == "sqlite":
+        # Directo al cursor del driver: el timestamp se convierte en la base y
+        # cada fila llega como una tupla de floats, sin pasar por `Row`
+        sql = (
+            "SELECT (julianday(timestamp) - 2440587.5) * 86400.0, data FROM paquetes"
+            " WHERE nodo_id = ? AND type_id = ?"
+        )
+        parametros = [nodo_id, type_id]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            parametros.append(start.isoformat(" ", "microseconds"))
+        if end is not None:
+            sql += " AND timestamp < ?"
+            parametros.append(end.isoformat(" ", "microseconds"))
+        sql += " ORDER BY timestamp"
+        cursor = db.connection().connection.cursor()
+        try:
+            filas = cursor.execute(sql, parametros).fetchall()
+        finally:
+            cursor.close()
+    else:
+        consulta = select(func.extract("epoch", Paquete.timestamp), Paquete.data).where(
+            Paquete.nodo_id == nodo_id, Paquete.type_id == type_id
+        )
+        if start is not None:
+            consulta = consulta.where(Paquete.timestamp >= start)
+        if end is not None:
+            consulta = consulta.where(Paquete.timestamp < end)
+        filas = [tuple(fila) for fila in db.execute(consulta.order_by(Paquete.timestamp))]
+
+    datos = np.array(filas, dtype=np.float64).reshape(-1, 2)
+    return datos[:, 0], datos[:, 1]
+
+
+def serie_reducida(
+    db: Session,
+    nodo_id: int,
+    type_id: int,
+    puntos: int,
+    metodo: str = "lttb",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """
+    Serie de un nodo y tipo reducida a `puntos` puntos para graficar, con
+    LTTB o con el mínimo y el máximo de cada cubeta (ver `depends/muestreo`).
+    """
+    x, y = columnas_serie(db, nodo_id, type_id, start, end)
+    elegidos = lttb(x, y, puntos) if metodo == "lttb" else minmax(y, puntos)
+    return {
+        "nodo_id": nodo_id,
+        "type_id": type_id,
+        "metodo": metodo,
+        "total": len(x),
+        "puntos": [
+            {"timestamp": EPOCA + timedelta(seconds=round(segundos, 3)), "data": valor}
+            for segundos, valor in zip(x[elegidos].tolist(), y[elegidos].tolist())
+        ],
+    }
+
 
 def crear_paquete_rechazado(db: Session, paquete: schemas.PaqueteRechazadoOut) -> schemas.PaqueteRechazadoOut:
     """
@@ -167,5 +1054,133 @@ def crear_paquete_rechazado(db: Session, paquete: schemas.PaqueteRechazadoOut) -
     return schemas.PaqueteRechazadoOut.model_validate(nuevo)
 
 
+def crear_rechazados_lote(db: Session, rechazados: List[dict]) -> int:
+    """
+    Inserta un lote de paquetes rechazados (dicts con las columnas de
+    `PaqueteRechazado`) con un único INSERT multi-fila.
+    No hace commit: la transacción la maneja quien llama.
+    """
+    if not rechazados:
+        return 0
+    db.execute(insert(PaqueteRechazado), rechazados)
+    return len(rechazados)
+
+
+def reprocesar_rechazados(
+    db: Session, rangos: dict
+) -> schemas.ReprocesoRechazadosOut:
+    """
+    Vuelve a validar la cuarentena (p.ej. después de crear el nodo o el tipo
+    que faltaba) y mueve a `paquetes` los rechazados que ahora son válidos.
+
+    Se resuelve con un INSERT ... SELECT y un DELETE con las mismas
+    condiciones que la ingesta: nodo activo, tipo vinculado al nodo y valor
+    dentro de `rangos` ({data_type: (mín, máx)}). Se limita a los rechazados
+    existentes al empezar, para no tocar los que lleguen mientras tanto.
+    """
+    tope = db.query(func.max(PaqueteRechazado.id)).scalar()
+    if tope is None:
+        return schemas.ReprocesoRechazadosOut(evaluados=0, movidos=0, pendientes=0)
+
+    evaluados = (
+        db.query(func.count(PaqueteRechazado.id))
+        .filter(PaqueteRechazado.id <= tope)
+        .scalar()
+    )
+
+    tipo_vinculado = (
+        select(nodo_tipo.c.nodo_id)
+        .join(Tipo, Tipo.id == nodo_tipo.c.tipo_id)
+        .join(Nodo, Nodo.id == nodo_tipo.c.nodo_id)
+        .where(
+            nodo_tipo.c.nodo_id == PaqueteRechazado.nodo_id,
+            Tipo.data_type == PaqueteRechazado.type_id,
+            Nodo.is_active.is_(True),
+        )
+        .exists()
+    )
+    if rangos:
+        en_rango = or_(
+            PaqueteRechazado.type_id.notin_(list(rangos)),
+            *[
+                and_(PaqueteRechazado.type_id == tipo, PaqueteRechazado.data.between(minimo, maximo))
+                for tipo, (minimo, maximo) in rangos.items()
+            ],
+        )
+    else:
+        en_rango = true()
+    condiciones = (
+        PaqueteRechazado.id <= tope,
+        PaqueteRechazado.data.isnot(None),
+        PaqueteRechazado.timestamp.isnot(None),
+        tipo_vinculado,
+        en_rango,
+    )
+
+    columnas = ["nodo_id", "type_id", "data", "timestamp"]
+    validos = select(
+        PaqueteRechazado.nodo_id,
+        PaqueteRechazado.type_id,
+        PaqueteRechazado.data,
+        PaqueteRechazado.timestamp,
+    ).where(*condiciones)
+    # La más reciente de cada nodo y tipo entre los que se mueven
+    mas_recientes = (
+        select(
+            PaqueteRechazado.nodo_id,
+            PaqueteRechazado.type_id,
+            func.max(PaqueteRechazado.timestamp).label("timestamp"),
+        )
+        .where(*condiciones)
+        .group_by(PaqueteRechazado.nodo_id, PaqueteRechazado.type_id)
+        .subquery()
+    )
+    # Días a recalcular en los agregados: rango de timestamps de cada serie movida
+    periodos = {
+        (nodo_id, type_id): (desde, hasta)
+        for nodo_id, type_id, desde, hasta in db.execute(
+            select(
+                PaqueteRechazado.nodo_id,
+                PaqueteRechazado.type_id,
+                func.min(PaqueteRechazado.timestamp),
+                func.max(PaqueteRechazado.timestamp),
+            )
+            .where(*condiciones)
+            .group_by(PaqueteRechazado.nodo_id, PaqueteRechazado.type_id)
+        )
+    }
+    ultimas = db.execute(
+        select(
+            PaqueteRechazado.nodo_id,
+            PaqueteRechazado.type_id,
+            PaqueteRechazado.data,
+            PaqueteRechazado.timestamp,
+        ).join(
+            mas_recientes,
+            and_(
+                PaqueteRechazado.nodo_id == mas_recientes.c.nodo_id,
+                PaqueteRechazado.type_id == mas_recientes.c.type_id,
+                PaqueteRechazado.timestamp == mas_recientes.c.timestamp,
+            ),
+        ).where(PaqueteRechazado.id <= tope)
+    ).all()
+    try:
+        # Los que ya estaban en `paquetes` se ignoran pero igual salen de la cuarentena
+        Paquete.insert_ignore_desde(db, columnas, validos)
+        actualizar_ultimas_lecturas(db, ultimas)
+        recalcular_agregados(db, periodos)
+        incrementar_lecturas(db, {nodo_id for nodo_id, _ in periodos})
+        movidos = db.execute(delete(PaqueteRechazado).where(*condiciones)).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return schemas.ReprocesoRechazadosOut(
+        evaluados=evaluados, movidos=movidos, pendientes=evaluados - movidos
+    )
+
+
 def crear_tipo(db: Session, tipo: schemas.TipoCreate) -> Tipo:
+    incrementar_catalogo(db)
     return Tipo.create(db, tipo)
\ No newline at end of file
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+from back.depends.decodificador import Lectura
+from back.paquete.models import AgregadoDia, AgregadoHora
+from back.paquete.services import crear_paquetes_lote, listar_agregados, reconstruir_agregados, series_multiples
+
+
+def lectura(data: float, dia: int, hora: int, minuto: int) -> Lectura:
+    return Lectura(1, 25, data, datetime(2024, 10, dia, hora, minuto))
+
+
+def resumen(db, modelo) -> list:
+    return [
+        (a.inicio, a.cantidad, a.suma, a.minimo, a.maximo, a.primero, a.ultimo)
+        for a in db.query(modelo).order_by(modelo.inicio)
+    ]
+
+
+def test_incremental_coincide_con_reconstruir(db):
+    crear_paquetes_lote(db, [lectura(5.0, 1, 10, 30), lectura(2.0, 1, 10, 10), lectura(7.0, 1, 23, 50)])
+    db.commit()
+    # Lote desordenado y con un reenvío (10:10): se recalcula el día
+    crear_paquetes_lote(db, [lectura(1.0, 1, 10, 5), lectura(2.0, 1, 10, 10), lectura(4.0, 2, 0, 0)])
+    db.commit()
+    crear_paquetes_lote(db, [lectura(9.0, 1, 10, 45)])
+    db.commit()
+
+    horas = resumen(db, AgregadoHora)
+    assert horas[0] == (datetime(2024, 10, 1, 10), 4, 17.0, 1.0, 9.0, 1.0, 9.0)
+    dias = resumen(db, AgregadoDia)
+    assert [(d[0], d[1]) for d in dias] == [(datetime(2024, 10, 1), 5), (datetime(2024, 10, 2), 1)]
+
+    reconstruir_agregados(db)
+    db.commit()
+    assert resumen(db, AgregadoHora) == horas
+    assert resumen(db, AgregadoDia) == dias
+
+    agregados = listar_agregados(
+        db, 1, 25, "hora", start=datetime(2024, 10, 1, 10, 20), end=datetime(2024, 10, 2)
+    )
+    assert [a.inicio.hour for a in agregados] == [10, 23]
+    assert agregados[0].promedio == 17.0 / 4
+    # Con zona horaria se compara en hora local, no como texto
+    con_zona = listar_agregados(
+        db,
+        1,
+        25,
+        "hora",
+        start=datetime(2024, 10, 1, 10, 20).astimezone(timezone.utc),
+        end=datetime(2024, 10, 2).astimezone(timezone.utc),
+    )
+    assert [a.inicio for a in con_zona] == [a.inicio for a in agregados]
+
+
+def test_series_multiples_crudas_y_desde_agregados(db):
+    crear_paquetes_lote(
+        db,
+        [
+            Lectura(nodo, tipo, float(minuto), datetime(2024, 10, 5, 8, minuto))
+            for minuto in (50, 10, 30)
+            for nodo in (2, 3)
+            for tipo in (1, 25)
+        ]
+        + [Lectura(2, 25, 100.0, datetime(2024, 10, 5, 9, 0))],
+    )
+    db.commit()
+
+    crudas = series_multiples(db, [3, 2], [25], start=datetime(2024, 10, 5, 8), end=datetime(2024, 10, 5, 9))
+    assert list(crudas["series"]) == ["2:25", "3:25"]
+    serie = crudas["series"]["2:25"]
+    assert serie["values"] == [10.0, 30.0, 50.0]
+    assert serie["timestamps"] == [int(datetime(2024, 10, 5, 8, m).timestamp() * 1000) for m in (10, 30, 50)]
+
+    por_hora = series_multiples(db, [2, 4], [25], "hora", start=datetime(2024, 10, 5, 8, 20))
+    serie = por_hora["series"]["2:25"]
+    # La hora que contiene a `start` se incluye entera
+    assert serie["timestamps"] == [int(datetime(2024, 10, 5, hora).timestamp() * 1000) for hora in (8, 9)]
+    assert (serie["values"], serie["minimos"], serie["maximos"], serie["cantidades"]) == (
+        [30.0, 100.0], [10.0, 100.0], [50.0, 100.0], [3, 1]
+    )
+    assert por_hora["series"]["4:25"] == {"nodo_id": 4, "type_id": 25, "timestamps": [], "values": []}
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from back.depends.decodificador import Lectura
+from back.paquete.models import Paquete
+from back.paquete.services import crear_paquetes_lote, exportar_paquetes
+
+
+def test_exporta_por_partes_con_filtros(db):
+    crear_paquetes_lote(
+        db,
+        [Lectura(nodo, 25, float(minuto), datetime(2024, 11, 5, 12, minuto)) for minuto in range(10) for nodo in (1, 2)],
+    )
+    db.commit()
+
+    partes = list(exportar_paquetes(db, Paquete, "csv", nodo_id=1, order_by="timestamp", order="desc", tamanio_lote=3))
+    # Encabezado y cuatro lotes de hasta 3 filas
+    assert len(partes) == 5
+    filas = list(csv.DictReader("".join(partes).splitlines()))
+    assert [float(f["data"]) for f in filas] == [float(m) for m in range(9, -1, -1)]
+    assert {f["nodo_id"] for f in filas} == {"1"}
+    assert datetime.fromisoformat(filas[0]["timestamp"]) == datetime(2024, 11, 5, 12, 9)
+
+    lineas = "".join(exportar_paquetes(db, Paquete, "ndjson", data_min=8)).splitlines()
+    assert [json.loads(l)["data"] for l in lineas] == [8.0, 8.0, 9.0, 9.0]
+    assert datetime.fromisoformat(json.loads(lineas[0])["timestamp"]) == datetime(2024, 11, 5, 12, 8)
+
+
+def test_exporta_parquet_por_nodo_y_mes(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from back.exportar import exportar
+
+    crear_paquetes_lote(
+        db, [Lectura(5, 25, float(dia), datetime(2024, mes, dia, 8)) for mes in (1, 2) for dia in (1, 2, 3)]
+    )
+    db.commit()
+
+    tabla = pq.read_table(io.BytesIO(b"".join(exportar_paquetes(db, Paquete, "parquet", nodo_id=5, tamanio_lote=2))))
+    assert tabla.num_rows == 6
+    assert tabla.column("timestamp").to_pylist()[0] == datetime(2024, 1, 1, 8)
+
+    escritas = exportar(db, Paquete, str(tmp_path), nodo_id=5, filas_por_grupo=2)
+    assert sorted((os.path.relpath(r, tmp_path), n) for r, n in escritas.items()) == [
+        (os.path.join("nodo=5", "mes=2024-01", "paquetes.parquet"), 3),
+        (os.path.join("nodo=5", "mes=2024-02", "paquetes.parquet"), 3),
+    ]
+    enero = pq.ParquetFile(tmp_path / "nodo=5" / "mes=2024-01" / "paquetes.parquet")
+    assert enero.metadata.num_row_groups == 2
+    assert enero.read().column("data").to_pylist() == [1.0, 2.0, 3.0]
+
+    # --desde sin --hasta exporta todo lo posterior, no solo ese día
+    escritas = exportar(db, Paquete, str(tmp_path / "desde"), nodo_id=5, desde=datetime(2024, 1, 2))
+    assert sorted(escritas.values()) == [2, 3]
+    escritas = exportar(db, Paquete, str(tmp_path / "hasta"), nodo_id=5, hasta=datetime(2024, 1, 2))
+    assert list(escritas.values()) == [2]
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import pytest
+
+from back.depends.decodificador import Lectura
+from back.paquete.models import Paquete, PaqueteArchivo, Tipo
+from back.paquete.schemas import PaqueteArchivoResponse
+from back.paquete.services import (
+    cache_conteos,
+    crear_paquetes_lote,
+    listar_paquetes,
+    listar_paquetes_archivo,
+    rango_de_fechas,
+)
+
+
+def test_cursor_recorre_todo_sin_repetir_con_timestamps_iguales(db):
+    # Varias lecturas por timestamp (distintos tipos): el id desempata
+    crear_paquetes_lote(
+        db,
+        [Lectura(1, tipo, 0.0, datetime(2024, 10, 1, 12, minuto)) for minuto in range(7) for tipo in (1, 2, 3)],
+    )
+    db.commit()
+    por_pagina = [p["id"] for p in listar_paquetes(db, order_by="timestamp", order="desc")["items"]]
+
+    vistos = []
+    respuesta = listar_paquetes(db, limit=4, order_by="timestamp", order="desc")
+    assert respuesta["info"]["total_items"] == 21
+    primer_cursor = respuesta["info"]["next_cursor"]
+    while True:
+        vistos += [p["id"] for p in respuesta["items"]]
+        if not respuesta["info"]["next_cursor"]:
+            break
+        respuesta = listar_paquetes(
+            db, limit=4, order_by="timestamp", order="desc", cursor=respuesta["info"]["next_cursor"]
+        )
+        assert respuesta["info"]["total_items"] is None
+    assert vistos == por_pagina
+
+    # El cursor solo sirve para el orden con que se generó
+    with pytest.raises(ValueError):
+        listar_paquetes(db, limit=4, order_by="timestamp", order="asc", cursor=primer_cursor)
+    with pytest.raises(ValueError):
+        listar_paquetes(db, limit=4, order_by="timestamp", order="desc", cursor="no-es-un-cursor")
+
+
+def test_modos_de_conteo(db):
+    crear_paquetes_lote(
+        db, [Lectura(2, 25, float(minuto), datetime(2024, 11, 1 + minuto % 2, 12, minuto)) for minuto in range(10)]
+    )
+    db.commit()
+    cache_conteos.limpiar()
+
+    info = listar_paquetes(db, limit=3, nodo_id=2, start_date=datetime(2024, 11, 2))["info"]
+    assert (info["total_items"], info["total_exacto"], info["total_pages"]) == (5, True, 2)
+    # Estimado desde los agregados, que no ven una fila cargada por fuera de la ingesta
+    db.add(Paquete(nodo_id=2, type_id=25, data=1.0, timestamp=datetime(2024, 11, 2, 15)))
+    db.commit()
+    info = listar_paquetes(db, limit=3, nodo_id=2, start_date=datetime(2024, 11, 2), conteo="estimado")["info"]
+    assert (info["total_items"], info["total_exacto"]) == (5, False)
+    info = listar_paquetes(db, limit=3, nodo_id=2, start_date=datetime(2024, 11, 2))["info"]
+    assert (info["total_items"], info["total_exacto"]) == (6, True)
+
+    # Con rango de valores que corta una hora: estimado desde los agregados
+    info = listar_paquetes(db, limit=3, nodo_id=2, data_min=2.5, conteo="estimado")["info"]
+    assert info["total_exacto"] is False
+    # ... y exacto recorriendo la tabla, que queda en caché
+    info = listar_paquetes(db, limit=3, nodo_id=2, data_min=2.5)["info"]
+    assert (info["total_items"], info["total_exacto"]) == (7, True)
+    crear_paquetes_lote(db, [Lectura(2, 25, 9.0, datetime(2024, 11, 3))])
+    db.commit()
+    info = listar_paquetes(db, limit=3, nodo_id=2, data_min=2.5, conteo="cache")["info"]
+    assert (info["total_items"], info["total_exacto"]) == (7, False)
+
+    info = listar_paquetes(db, limit=3, nodo_id=2, conteo="ninguno")["info"]
+    assert (info["total_items"], info["total_pages"], info["current_page"]) == (None, None, 1)
+
+
+def test_rango_de_fechas_semiabierto(db):
+    dia = datetime(2024, 11, 5)
+    # Fechas sin hora: incluyen el día final entero
+    assert rango_de_fechas(dia, dia) == (dia, datetime(2024, 11, 6))
+    assert rango_de_fechas(dia, None) == (dia, datetime(2024, 11, 6))
+    # Con hora: `end_date` exclusivo
+    assert rango_de_fechas(datetime(2024, 11, 5, 8), datetime(2024, 11, 5, 9, 30)) == (
+        datetime(2024, 11, 5, 8),
+        datetime(2024, 11, 5, 9, 30),
+    )
+    assert rango_de_fechas(None, dia) == (None, None)
+
+    crear_paquetes_lote(db, [Lectura(3, 25, 1.0, datetime(2024, 11, 5, hora)) for hora in range(24)])
+    db.commit()
+    info = listar_paquetes(
+        db, nodo_id=3, start_date=datetime(2024, 11, 5, 8), end_date=datetime(2024, 11, 5, 10)
+    )["info"]
+    assert (info["total_items"], info["total_exacto"]) == (2, True)
+
+
+def test_listado_archivo_con_la_forma_del_esquema(db):
+    db.add_all([Tipo(id=40, data_type=40, data_symbol="V", nombre="batería"), Tipo(id=41, data_type=41, data_symbol="m", nombre="nivel")])
+    db.add_all(
+        [
+            PaqueteArchivo(nodo_id=4, type_id=tipo, data=3.3, timestamp=datetime(2024, 11, 5, 8, 0, segundo, 250000))
+            for segundo, tipo in enumerate((40, 40, 41))
+        ]
+    )
+    db.commit()
+    respuesta = listar_paquetes_archivo(db, limit=10, nodo_id=4, order_by="timestamp")
+    # Las filas como tuplas dan lo mismo que validar los modelos contra el esquema
+    assert PaqueteArchivoResponse.model_validate(respuesta).model_dump() == respuesta
+    assert [p["type"]["nombre"] for p in respuesta["items"]] == ["batería", "batería", "nivel"]
+    assert respuesta["items"][0]["timestamp"] == datetime(2024, 11, 5, 8, 0, 0, 250000)
+
+
+def test_listado_columnar_una_serie_por_nodo_y_tipo(db):
+    crear_paquetes_lote(
+        db,
+        [Lectura(6, tipo, float(minuto), datetime(2024, 11, 7, 9, minuto)) for minuto in range(4) for tipo in (25, 1)],
+    )
+    db.commit()
+    filas = listar_paquetes(db, limit=5, nodo_id=6, order_by="timestamp", order="desc")
+    columnar = listar_paquetes(db, limit=5, nodo_id=6, order_by="timestamp", order="desc", formato="columnar")
+
+    assert columnar["info"] == filas["info"]
+    assert [(s["nodo_id"], s["type_id"]) for s in columnar["series"]] == [(6, 1), (6, 25)]
+    # Las mismas lecturas de la página, en el mismo orden dentro de cada serie
+    for serie in columnar["series"]:
+        esperadas = [p for p in filas["items"] if p["type_id"] == serie["type_id"]]
+        assert serie["values"] == [p["data"] for p in esperadas]
+        assert serie["timestamps"] == [int(p["timestamp"].timestamp() * 1000) for p in esperadas]
+    assert listar_paquetes(db, nodo_id=99, formato="columnar")["series"] == []
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from back.depends.registro import rangos_de_config
+from back.nodos.models import Nodo
+from back.paquete.models import Paquete, PaqueteRechazado, Tipo
+from back.paquete.services import crear_rechazados_lote, reprocesar_rechazados
+
+
+def rechazado(nodo_id: int, data: float, motivo: str, segundo: int = 0) -> dict:
+    return {
+        "nodo_id": nodo_id,
+        "type_id": 25,
+        "data": data,
+        "timestamp": datetime(2024, 10, 1, 12, 0, segundo),
+        "motivo": motivo,
+    }
+
+
+def test_rangos_de_config():
+    config = {"type": {"nivel": 25, "temperatura": 1}, "umbral": {"nivel": [0, 100]}}
+    assert rangos_de_config(config) == {25: (0.0, 100.0)}
+    assert rangos_de_config(None) == {}
+
+
+def test_reprocesar_mueve_los_que_ahora_son_validos(db):
+    nivel = Tipo(data_type=25, data_symbol="cm", nombre="Nivel Hidrométrico")
+    nodo = Nodo(identificador="nuevo", descripcion="", porcentajeBateria=100, is_active=True)
+    db.add_all([nivel, nodo])
+    db.commit()
+
+    crear_rechazados_lote(
+        db,
+        [
+            rechazado(nodo.id, 50.0, "tipo_no_vinculado", 1),
+            rechazado(nodo.id, 500.0, "fuera_de_rango", 2),
+            rechazado(999, 50.0, "nodo_inexistente", 3),
+            {"motivo": "formato", "contenido": "{'id': 'x'}"},
+        ],
+    )
+    db.commit()
+    rangos = {25: (0.0, 100.0)}
+
+    # El tipo todavía no está vinculado al nodo: no se mueve nada
+    resultado = reprocesar_rechazados(db, rangos)
+    assert (resultado.evaluados, resultado.movidos, resultado.pendientes) == (4, 0, 4)
+
+    nodo.tipos.append(nivel)
+    db.commit()
+    resultado = reprocesar_rechazados(db, rangos)
+    assert (resultado.movidos, resultado.pendientes) == (1, 3)
+    assert [p.data for p in db.query(Paquete).all()] == [50.0]
+    assert sorted(r.motivo for r in db.query(PaqueteRechazado).all()) == [
+        "formato",
+        "fuera_de_rango",
+        "nodo_inexistente",
+    ]
+
+    # Al ampliar el rango también sale el que estaba fuera de rango
+    resultado = reprocesar_rechazados(db, {25: (0.0, 1000.0)})
+    assert resultado.movidos == 1
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from back.depends.decodificador import Lectura
+from back.nodos.models import Nodo
+from back.nodos.services import listar_ultimas_lecturas
+from back.paquete.models import AgregadoHora, UltimaLectura
+from back.paquete.schemas import PaqueteCreate
+from back.paquete.services import crear_paquete, crear_paquetes_lote
+
+
+def lectura(nodo_id: int, type_id: int, data: float, minuto: int) -> Lectura:
+    return Lectura(nodo_id, type_id, data, datetime(2024, 10, 1, 12, minuto))
+
+
+def test_se_queda_con_la_mas_reciente_aunque_lleguen_desordenadas(db):
+    activo = Nodo(identificador="activo", descripcion="", porcentajeBateria=100, is_active=True)
+    inactivo = Nodo(identificador="inactivo", descripcion="", porcentajeBateria=100, is_active=False)
+    vacio = Nodo(identificador="vacio", descripcion="", porcentajeBateria=100, is_active=True)
+    db.add_all([activo, inactivo, vacio])
+    db.commit()
+
+    crear_paquetes_lote(
+        db,
+        [lectura(activo.id, 25, 1.0, 5), lectura(activo.id, 25, 2.0, 9), lectura(activo.id, 1, 20.0, 1)],
+    )
+    db.commit()
+    # Un lote atrasado (p.ej. reproducido del spool) no pisa la más nueva
+    crear_paquetes_lote(db, [lectura(activo.id, 25, 3.0, 7), lectura(inactivo.id, 25, 4.0, 1)])
+    db.commit()
+
+    assert db.get(UltimaLectura, (activo.id, 25)).data == 2.0
+    assert db.query(UltimaLectura).count() == 3
+
+    nodos = listar_ultimas_lecturas(db)
+    assert [n["identificador"] for n in nodos] == ["activo", "vacio"]
+    assert [(l.type_id, l.data) for l in nodos[0]["lecturas"]] == [(1, 20.0), (25, 2.0)]
+    assert nodos[1]["lecturas"] == []
+
+
+def test_crear_paquete_actualiza_ultimas_lecturas_y_agregados(db):
+    paquete = crear_paquete(db, PaqueteCreate(nodo_id=7, type_id=25, data=5.5, timestamp=datetime(2024, 10, 2, 8, 30)))
+    assert paquete.id is not None
+    assert db.get(UltimaLectura, (7, 25)).data == 5.5
+    agregado = db.query(AgregadoHora).filter_by(nodo_id=7, type_id=25).one()
+    assert (agregado.inicio, agregado.cantidad) == (datetime(2024, 10, 2, 8), 1)
+    # Repetido: no se duplica y se devuelve el guardado
+    assert crear_paquete(db, PaqueteCreate(nodo_id=7, type_id=25, data=5.5, timestamp=paquete.timestamp)).id == paquete.id
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from back.database import get_db
+from back.depends.decodificador import Lectura
+from back.depends.respuestas import coincide_etag
+from back.depends.versiones import etag, fijar_base, version_catalogo, version_lecturas
+from back.paquete import schemas
+from back.paquete.router import router
+from back.paquete.services import crear_paquetes_lote, crear_tipo
+
+
+def test_versiones_suben_con_cada_escritura(db):
+    fijar_base(db)
+    db.commit()
+    antes = etag(db, "paquetes", version_lecturas(db))
+
+    crear_paquetes_lote(db, [Lectura(nodo, 25, 1.0, datetime(2024, 11, 5, 12)) for nodo in (1, 2)])
+    db.commit()
+    assert (version_lecturas(db, [1]), version_lecturas(db, [2]), version_lecturas(db)) == (1, 1, 2)
+    # Un lote solo con repetidas no cambia nada
+    crear_paquetes_lote(db, [Lectura(1, 25, 1.0, datetime(2024, 11, 5, 12))])
+    db.commit()
+    assert version_lecturas(db, [1]) == 1
+    crear_paquetes_lote(db, [Lectura(1, 25, 2.0, datetime(2024, 11, 5, 13))])
+    db.commit()
+    assert (version_lecturas(db, [1]), version_lecturas(db, [2]), version_lecturas(db, [3])) == (2, 1, 0)
+    assert etag(db, "paquetes", version_lecturas(db)) != antes
+
+    assert coincide_etag('"x", W/"paquetes-1-2"', 'W/"paquetes-1-2"')
+    assert coincide_etag("*", 'W/"paquetes-1-2"')
+    assert not coincide_etag('W/"paquetes-1-3"', 'W/"paquetes-1-2"')
+
+
+def test_tipos_responde_304_hasta_que_cambia_el_catalogo(db, sesiones):
+    def db_de_prueba():
+        db = sesiones()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = db_de_prueba
+    cliente = TestClient(app)
+
+    respuesta = cliente.get("/tipos")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["cache-control"].startswith("private, max-age=")
+    etag_tipos = respuesta.headers["etag"]
+    respuesta = cliente.get("/tipos", headers={"If-None-Match": etag_tipos})
+    assert (respuesta.status_code, respuesta.content) == (304, b"")
+
+    catalogo = version_catalogo(db)
+    crear_tipo(db, schemas.TipoCreate(data_type=30, data_symbol="%", nombre="humedad"))
+    assert version_catalogo(db) == catalogo + 1
+    respuesta = cliente.get("/tipos", headers={"If-None-Match": etag_tipos})
+    assert respuesta.status_code == 200
+    assert [t["nombre"] for t in respuesta.json()] == ["humedad"]
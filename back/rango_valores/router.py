@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
-from .services import load_config, update_config
+from fastapi import APIRouter, HTTPException, Request, Response
+from .services import load_config, update_config, version_config
+from ..depends.registro import registro
+from ..depends.respuestas import verificar_etag
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/config", tags=["Config"])
@@ -8,9 +10,13 @@ class ConfigUpdate(BaseModel):
     umbral: dict
 
 @router.get("/")
-async def get_config():
+async def get_config(request: Request, response: Response):
     try:
+        verificar_etag(request, response, f'W/"config-{version_config()}"')
         return load_config()
+    except HTTPException:
+        # 304 de verificar_etag
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Errorrrrr al cargar la configuración: {str(e)}")
 
@@ -22,6 +28,8 @@ async def update_config_endpoint(config_update: ConfigUpdate):
         current_config['umbral'] = config_update.umbral
 
         update_config(current_config)
+        # La ingesta valida contra estos rangos desde el registro en memoria
+        registro.refrescar()
 
         return {"message": "Configuración actualizada correctamente"}
     except Exception as e:
@@ -9,6 +9,11 @@ def load_config():
     with open(CONFIG_FILE, "r") as file:
         return json.load(file)
 
+def version_config() -> str:
+    """Cambia cada vez que se escribe el archivo (fecha de modificación y tamaño)."""
+    estado = os.stat(CONFIG_FILE)
+    return f"{estado.st_mtime_ns:x}-{estado.st_size:x}"
+
 def update_config(new_config: dict):
     with open(CONFIG_FILE, "w") as file:
         json.dump(new_config, file, indent=4)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+
+from ..depends.config import ingesta
+from ..depends.metricas import CONTENT_TYPE, metricas
+from ..depends.paquetes import salud_ingesta
+
+router = APIRouter(tags=["Salud"])
+
+
+@router.get("/metrics")
+def get_metrics():
+    """
+    Métricas del proceso en formato de texto de Prometheus.
+    """
+    return Response(content=metricas.exponer(), media_type=CONTENT_TYPE)
+
+
+@router.get("/health/ready")
+def get_ready():
+    """
+    Indica si la ingesta está lista: subscriptor MQTT conectado y sin
+    lecturas trabadas en los buffers. Responde 503 si no lo está.
+    """
+    if not ingesta.en_api:
+        # La ingesta corre en otro proceso, que expone su propio /health/ready
+        return {"listo": True, "ingesta": "externa"}
+    salud = salud_ingesta()
+    if not salud["listo"]:
+        return JSONResponse(status_code=503, content=salud)
+    return salud
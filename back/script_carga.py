@@ -22,14 +22,21 @@ MIN_TEMP = -10
 
 
 
-import random
 import time
 import os
 import json
-import math
 import paho.mqtt.client as mqtt
 from dotenv import load_dotenv
 
+from simuladores import (
+    NIVEL_HIDROMETRICO,
+    PRECIPITACION,
+    TEMPERATURA,
+    TENSION,
+    VIENTO,
+    Simulador,
+)
+
 load_dotenv()
 
 import argparse
@@ -134,147 +141,45 @@ def enviar_mensaje(mensaje):
 valid_types = [1, 14, 16, 25, 26]
 
 
-# Generación de datos
+# Generación de datos (los modelos de cada magnitud están en simuladores.py)
 
-# Valores iniciales
-data_temp = 15
-data_precip = 0
-data_tension = 3.2
-data_nivel = 0
-data_viento = 5
-
-def generar_temp():
-    
-    [MIN, MAX] = getLimitsFromType(1)
-    global data_temp
+def generar(tipo):
+    [MIN, MAX] = getLimitsFromType(tipo)
+    simulador = Simulador(tipo, MIN, MAX, MINUTES_BETWEEN_ENTRIES)
 
     for i in range(ENTRY_COUNT):
         fecha_hora = start_date + timedelta(minutes=i * MINUTES_BETWEEN_ENTRIES)
-        # Simulación de la temperatura
-        data_temp += (random.random() - 0.5) * (1.2 * MINUTES_BETWEEN_ENTRIES / 20)
-
-        data_temp += math.sin(math.pi * (fecha_hora.hour - 7)/12)
-        
-        # Limitar el dato
-        data_temp = max(MIN, min(MAX, data_temp))
+        valor = simulador.siguiente(fecha_hora)
 
         # Crear el mensaje JSON
         mensaje = {
             "id": args.nodo,
-            "type": 1,
-            "data": args.data if args.data is not None else data_temp,
+            "type": tipo,
+            "data": args.data if args.data is not None else valor,
             "time": int(fecha_hora.timestamp()) if args.data is None else int(datetime.now().timestamp()),
         }
 
         enviar_mensaje(mensaje)
 
-def generar_nivel():
-    [MIN, MAX] = getLimitsFromType(25)
-    global data_nivel
-
-    for i in range(ENTRY_COUNT):
-        fecha_hora = start_date + timedelta(minutes=i * MINUTES_BETWEEN_ENTRIES)
-        
-        # Simulación del nivel
-        data_nivel += (random.random() - 0.5) * 20
-        
-        # Limitar el dato
-        data_nivel = max(MIN, min(MAX, data_nivel))
 
-        # Crear el mensaje JSON
-        mensaje = {
-            "id": args.nodo,
-            "type": 25,
-            "data": args.data if args.data is not None else data_nivel,
-            "time": int(fecha_hora.timestamp()) if args.data is None else int(datetime.now().timestamp()),
-        }
-        enviar_mensaje(mensaje)
-
-
-def generar_tension():
-    [MIN, MAX] = getLimitsFromType(16)
-    global data_tension
-
-    for i in range(ENTRY_COUNT):
-        fecha_hora = start_date + timedelta(minutes=i * MINUTES_BETWEEN_ENTRIES)
-        
-        # Simulación de la caida en la bateria
-        data_tension -= random.random() * 0.03
+def generar_temp():
+    generar(TEMPERATURA)
 
-        # A veces, puede cargarse
-        random_number = random.random() - 0.5
-        if random_number > 0.94:
-            data_tension += 2
-        
 
-        # Limitar el dato
-        data_tension = max(MIN, min(MAX, data_tension))
+def generar_nivel():
+    generar(NIVEL_HIDROMETRICO)
 
-        # Crear el mensaje JSON
-        mensaje = {
-            "id": args.nodo,
-            "type": 16,
-            "data": args.data if args.data is not None else data_tension,
-            "time": int(fecha_hora.timestamp()) if args.data is None else int(datetime.now().timestamp()),
-        }
 
-        enviar_mensaje(mensaje)
+def generar_tension():
+    generar(TENSION)
 
 
 def generar_precip():
-    [MIN, MAX] = getLimitsFromType(14)
-    global data_precip
-
-    for i in range(ENTRY_COUNT):
-        fecha_hora = start_date + timedelta(minutes=i * MINUTES_BETWEEN_ENTRIES)
-
-        random_number = random.random()
-        if random_number > 0.3:
-            data_precip = 0
-        else:
-            data_precip = random_number * 10
-
-        # Limitar el dato
-        data_precip = max(MIN, min(MAX, data_precip))
-
-        # Crear el mensaje JSON
-        mensaje = {
-            "id": args.nodo,
-            "type": 14,
-            "data": args.data if args.data is not None else data_precip,
-            "time": int(fecha_hora.timestamp()) if args.data is None else int(datetime.now().timestamp()),
-        }
-
-        enviar_mensaje(mensaje)
+    generar(PRECIPITACION)
 
 
 def generar_viento():
-    [MIN, MAX] = getLimitsFromType(26)
-    global data_viento
-
-    for i in range(ENTRY_COUNT):
-        fecha_hora = start_date + timedelta(minutes=i * MINUTES_BETWEEN_ENTRIES)
-        
-        # Simulación de la velocidad del viento
-        data_viento += (random.random() - 0.5) * (2 * MINUTES_BETWEEN_ENTRIES / 20)
-        
-        # A veces, hay ráfagas
-        random_number = random.random()
-        if random_number > 0.92:
-            data_viento += random.random() * 15
-        
-        # Limitar el dato
-        data_viento = max(MIN, min(MAX, data_viento))
-
-        # Crear el mensaje JSON
-        mensaje = {
-            "id": args.nodo,
-            "type": 26,
-            "data": args.data if args.data is not None else data_viento,
-            "time": int(fecha_hora.timestamp()) if args.data is None else int(datetime.now().timestamp()),
-        }
-
-        enviar_mensaje(mensaje)
+    generar(VIENTO)
 
 
 if args.type == 1:
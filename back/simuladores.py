@@ -0,0 +1,109 @@
+"""
+    SIMULADORES DE LECTURAS DE LOS SENSORES
+
+    Modelos simples de cada magnitud (temperatura, precipitación, tensión,
+    nivel hidrométrico y viento) usados por `script_carga.py` y por el
+    generador de carga `benchmarks/carga_mqtt.py`.
+
+    No usa imports relativos para poder importarse también desde
+    `script_carga.py` cuando se ejecuta como script.
+"""
+
+import json
+import math
+import os
+import random
+from datetime import datetime
+
+TEMPERATURA = 1
+PRECIPITACION = 14
+TENSION = 16
+NIVEL_HIDROMETRICO = 25
+VIENTO = 26
+
+# Nombre de cada tipo en la sección `umbral` de config.json
+NOMBRES = {
+    TEMPERATURA: "temperatura",
+    PRECIPITACION: "precipitacion",
+    TENSION: "tension",
+    NIVEL_HIDROMETRICO: "nivel_hidrometrico",
+    VIENTO: "viento",
+}
+
+# Valores iniciales
+INICIALES = {
+    TEMPERATURA: 15,
+    PRECIPITACION: 0,
+    TENSION: 3.2,
+    NIVEL_HIDROMETRICO: 0,
+    VIENTO: 5,
+}
+
+
+def cargar_limites(ruta: str = None) -> dict:
+    """Límites [mín, máx] por tipo según `umbral` de config.json."""
+    ruta = ruta or os.path.join(os.path.dirname(__file__), "config.json")
+    with open(ruta, "r") as archivo:
+        umbral = json.load(archivo)["umbral"]
+    return {tipo: umbral[nombre] for tipo, nombre in NOMBRES.items() if nombre in umbral}
+
+
+def paso_temperatura(valor: float, fecha_hora: datetime, minutos: int) -> float:
+    valor += (random.random() - 0.5) * (1.2 * minutos / 20)
+    # Ciclo diario
+    return valor + math.sin(math.pi * (fecha_hora.hour - 7) / 12)
+
+
+def paso_nivel(valor: float, fecha_hora: datetime, minutos: int) -> float:
+    return valor + (random.random() - 0.5) * 20
+
+
+def paso_tension(valor: float, fecha_hora: datetime, minutos: int) -> float:
+    # Caída de la batería
+    valor -= random.random() * 0.03
+    # A veces, puede cargarse
+    if random.random() - 0.5 > 0.94:
+        valor += 2
+    return valor
+
+
+def paso_precipitacion(valor: float, fecha_hora: datetime, minutos: int) -> float:
+    numero = random.random()
+    return 0 if numero > 0.3 else numero * 10
+
+
+def paso_viento(valor: float, fecha_hora: datetime, minutos: int) -> float:
+    valor += (random.random() - 0.5) * (2 * minutos / 20)
+    # A veces, hay ráfagas
+    if random.random() > 0.92:
+        valor += random.random() * 15
+    return valor
+
+
+PASOS = {
+    TEMPERATURA: paso_temperatura,
+    PRECIPITACION: paso_precipitacion,
+    TENSION: paso_tension,
+    NIVEL_HIDROMETRICO: paso_nivel,
+    VIENTO: paso_viento,
+}
+
+
+class Simulador:
+    """Serie simulada de un tipo de dato para un nodo."""
+
+    def __init__(self, tipo: int, minimo: float, maximo: float, minutos: int = 20) -> None:
+        if tipo not in PASOS:
+            raise ValueError(f"No hay simulador para el tipo {tipo}")
+        self.tipo = tipo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.minutos = minutos
+        self.valor = INICIALES[tipo]
+        self._paso = PASOS[tipo]
+
+    def siguiente(self, fecha_hora: datetime) -> float:
+        """Avanza la simulación y retorna el valor, limitado a [mín, máx]."""
+        valor = self._paso(self.valor, fecha_hora, self.minutos)
+        self.valor = max(self.minimo, min(self.maximo, valor))
+        return self.valor
@@ -2,6 +2,27 @@ import { useEffect, useState } from "react";
 import { useAxios } from "../context/AxiosProvider";
 const baseURL = import.meta.env.VITE_API_URL;
 
+// Código de tipo del nivel hidrométrico
+const NIVEL_HIDROMETRICO = 25;
+// Todos los marcadores del mapa comparten una sola consulta de últimas lecturas
+const VIGENCIA_MS = 30 * 1000;
+let ultimasLecturas = null;
+let ultimasLecturasHasta = 0;
+
+const obtenerUltimasLecturas = (axios) => {
+  if (!ultimasLecturas || Date.now() > ultimasLecturasHasta) {
+    ultimasLecturasHasta = Date.now() + VIGENCIA_MS;
+    ultimasLecturas = axios
+      .get(baseURL + "/nodos/ultimas-lecturas")
+      .then((res) => res.data)
+      .catch((e) => {
+        ultimasLecturas = null;
+        throw e;
+      });
+  }
+  return ultimasLecturas;
+};
+
 const useColorBasedOnAlert = (nodo) => {
   const axios = useAxios();
   const [lastNivel, setLastNivel] = useState(null);
@@ -9,18 +30,10 @@ const useColorBasedOnAlert = (nodo) => {
   const [config, setConfig] = useState(null);
 
   useEffect(() => {
-    axios
-      .get(baseURL + "/paquetes", {
-        params: {
-          limit: 1,
-          nodo_id: nodo.id,
-          order_by: "date",
-          type: 25,
-          order: "desc",
-        },
-      })
-      .then((res) => {
-        setLastNivel(res.data.items[0]);
+    obtenerUltimasLecturas(axios)
+      .then((nodos) => {
+        const lecturas = nodos.find((n) => n.nodo_id === nodo.id)?.lecturas ?? [];
+        setLastNivel(lecturas.find((l) => l.type_id === NIVEL_HIDROMETRICO));
         return axios.get(baseURL + "/config");
       })
       .then((res) => {
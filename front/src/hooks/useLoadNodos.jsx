@@ -9,37 +9,24 @@ const useLoadNodos = (map, data, API_URL) => {
   useEffect(() => {
     if (!map || data?.length === 0) return;
 
-    data.forEach((nodo) => {
-      const TODAY = new Date(new Date().getTime() - 3 * 60 * 60 * 1000) 
-        .toISOString()
-        .substring(0, 10);
-
-      const FETCH_URL = `${API_URL}/paquetes?nodo_id=${nodo.id}&start_date=${TODAY}&end_date=${TODAY}`;
-
-      fetch(FETCH_URL)
-        .then((res) => res.json())
-        .then((dataNodo) => {
-          if (!dataNodo.items || dataNodo.items.length === 0) {
-            const LAST_PACKAGE_URL = `${API_URL}/paquetes?nodo_id=${nodo.id}&order_by=date&order=desc&limit=1`;
-            return fetch(LAST_PACKAGE_URL)
-              .then((res) => res.json())
-              .then((lastPackageData) => {
-                if (!lastPackageData.items || lastPackageData.items.length === 0) {
-                  console.warn(`No data found for node ${nodo.id}`);
-                  return;
-                }
-                const lastData = lastPackageData.items[0];
-                renderMarker(nodo, lastData, true); 
-              });
-          } else {
-            const lastData = dataNodo.items[dataNodo.items.length - 1];
-            const lastDate = new Date(lastData.date);
-            const isStale = new Date() - lastDate > 24 * 60 * 60 * 1000;
-            renderMarker(nodo, lastData, isStale); 
+    // Una sola consulta con la última lectura de cada nodo y tipo
+    fetch(`${API_URL}/nodos/ultimas-lecturas`)
+      .then((res) => res.json())
+      .then((ultimas) => {
+        data.forEach((nodo) => {
+          const lecturas = ultimas.find((n) => n.nodo_id === nodo.id)?.lecturas ?? [];
+          if (lecturas.length === 0) {
+            console.warn(`No data found for node ${nodo.id}`);
+            return;
           }
-        })
-        .catch((err) => console.error("Error fetching nodo data: ", err));
-    });
+          const lastData = lecturas.reduce((a, b) =>
+            new Date(a.timestamp) >= new Date(b.timestamp) ? a : b
+          );
+          const isStale = new Date() - new Date(lastData.timestamp) > 24 * 60 * 60 * 1000;
+          renderMarker(nodo, lastData, isStale);
+        });
+      })
+      .catch((err) => console.error("Error fetching nodo data: ", err));
 
     const renderMarker = (nodo, lastData, isStale) => {
       const stringUltimoDato = obtenerStringTiempoDesdeUltimoDato([lastData]);
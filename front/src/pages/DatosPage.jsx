@@ -27,6 +27,18 @@ const DatosPage = () => {
     type: selectedTipo || 1,
   };
 
+  // Mismos filtros que la tabla, para descargar todas las filas
+  const exportParams = new URLSearchParams({
+    format: "csv",
+    order: "desc",
+    order_by: "timestamp",
+    type_id: selectedTipo || 1,
+  });
+  exportParams.append("nodo_id", id || 1);
+  if (startDate) exportParams.append("start_date", startDate);
+  if (endDate) exportParams.append("end_date", endDate);
+  const exportUrl = `/paquetes/export?${exportParams}`;
+
   const { data, loading, error, mutate, isForbidden } =
     useFetchNodoData(params);
   const { nodos, loading: loadingSensores, error: errorSensores } = useNodos();
@@ -122,7 +134,7 @@ const DatosPage = () => {
         <div className="flex items-center mb-4 justify-between">
           <FiltroDatos onFilterChange={handleFilterChange} className="px-2" />
           <div className="flex space-x-2 px-2">
-            <DownloadCSVButton data={data?.items || []} disabled={loading} />
+            <DownloadCSVButton url={exportUrl} disabled={loading} />
             <button className="btn btn-secondary" onClick={handleNavigate}>
               Ver Archivos
             </button>
@@ -25,6 +25,18 @@ const DatosArchivo = () => {
     type: selectedTipo || 1,
   };
 
+  // Mismos filtros que la tabla, para descargar todas las filas
+  const exportParams = new URLSearchParams({
+    format: "csv",
+    order: "desc",
+    order_by: "timestamp",
+    type_id: selectedTipo || 1,
+  });
+  if (id) exportParams.append("nodo_id", id);
+  if (startDate) exportParams.append("start_date", startDate);
+  if (endDate) exportParams.append("end_date", endDate);
+  const exportUrl = `/paquetesarchivos/export?${exportParams}`;
+
   const { data, pagination, loading, error, isForbidden, mutate } =
     usePaqueteArchivo(params);
   const { tipos, loading: loadingTipos, error: errorTipos } = useTipoDato();
@@ -105,7 +117,7 @@ const DatosArchivo = () => {
         <div className="flex items-center mb-4 justify-between">
           <FiltroDatos onFilterChange={handleFilterChange} className="px-2" />
           <div className="flex space-x-2 px-2">
-            <DownloadCSVButton data={data || []} disabled={loading} />
+            <DownloadCSVButton url={exportUrl} disabled={loading} />
             <button
               className="btn btn-action btn-active"
               onClick={handleNavigate}